@@ -0,0 +1,33 @@
+"""Add notes.updated_at
+
+Revision ID: 4e8b2c6d1a9f
+Revises: 9c3e1f7a4b2d
+Create Date: 2026-10-18 14:03:27.518420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8b2c6d1a9f'
+down_revision: Union[str, Sequence[str], None] = '9c3e1f7a4b2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE notes SET updated_at = created_at WHERE updated_at IS NULL")
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_notes_updated_at'), 'notes', ['updated_at'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_notes_updated_at'), table_name='notes', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('notes', 'updated_at')
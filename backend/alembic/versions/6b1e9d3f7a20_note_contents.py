@@ -0,0 +1,36 @@
+"""note_contents table
+
+Revision ID: 6b1e9d3f7a20
+Revises: e5a1c7d3b9f2
+Create Date: 2026-10-19 14:15:08.662391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1e9d3f7a20'
+down_revision: Union[str, Sequence[str], None] = 'e5a1c7d3b9f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled by post-upload extraction and scripts/backfill_text.py
+    op.create_table('note_contents',
+    sa.Column('note_id', sa.UUID(), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('extracted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['note_id'], ['notes.id'], ),
+    sa.PrimaryKeyConstraint('note_id'),
+    if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('note_contents')
@@ -0,0 +1,36 @@
+"""Add notes.content_hash and notes.duplicate_of
+
+Revision ID: 7d1f0b3c5e28
+Revises: 4e8b2c6d1a9f
+Create Date: 2026-10-18 17:21:05.114302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d1f0b3c5e28'
+down_revision: Union[str, Sequence[str], None] = '4e8b2c6d1a9f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing notes keep a NULL hash; only new uploads take part in dedup
+    op.add_column('notes', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('notes', sa.Column('duplicate_of', postgresql.UUID(as_uuid=True), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_notes_content_hash'), 'notes', ['content_hash'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_notes_content_hash'), table_name='notes', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('notes', 'duplicate_of')
+    op.drop_column('notes', 'content_hash')
@@ -0,0 +1,57 @@
+"""Add catalog and interaction indexes
+
+Revision ID: 9c3e1f7a4b2d
+Revises: 2a65a6fcfa0c
+Create Date: 2026-10-18 10:12:41.215903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e1f7a4b2d'
+down_revision: Union[str, Sequence[str], None] = '2a65a6fcfa0c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PENDING_ONLY = sa.text("status = 'PENDING'")
+
+# (name, table, columns, extra kwargs)
+INDEXES = [
+    ('ix_notes_status_created', 'notes', ['status', 'created_at', 'id'], {}),
+    ('ix_notes_status_rating', 'notes', ['status', 'rating', 'vote_count', 'id'], {}),
+    ('ix_notes_status_category_semester_created', 'notes', ['status', 'category', 'semester', 'created_at', 'id'], {}),
+    ('ix_notes_status_branch_semester_created', 'notes', ['status', 'branch', 'semester', 'created_at', 'id'], {}),
+    ('ix_notes_uploaded_by_created', 'notes', ['uploaded_by', 'created_at'], {}),
+    ('ix_notes_pending_created', 'notes', ['created_at'], {'postgresql_where': PENDING_ONLY, 'sqlite_where': PENDING_ONLY}),
+    ('ix_downloads_user_note', 'downloads', ['user_id', 'note_id'], {}),
+    ('ix_downloads_user_created', 'downloads', ['user_id', 'created_at'], {}),
+    ('ix_votes_user_note', 'votes', ['user_id', 'note_id'], {}),
+    ('ix_reviews_user_note', 'reviews', ['user_id', 'note_id'], {}),
+    ('ix_reviews_note_created', 'reviews', ['note_id', 'created_at'], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination compares (rating, vote_count, id) tuples; NULLs would drop rows
+    # out of the rating sort, so normalise the columns added nullable in 2a65a6fcfa0c.
+    op.execute("UPDATE notes SET vote_count = 0 WHERE vote_count IS NULL")
+    op.execute("UPDATE notes SET rating = 0 WHERE rating IS NULL")
+    op.execute("UPDATE notes SET rating_count = 0 WHERE rating_count IS NULL")
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction; build them live on Postgres.
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
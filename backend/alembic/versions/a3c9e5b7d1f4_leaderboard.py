@@ -0,0 +1,39 @@
+"""leaderboard table
+
+Revision ID: a3c9e5b7d1f4
+Revises: 6b1e9d3f7a20
+Create Date: 2026-10-19 14:18:02.315847
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e5b7d1f4'
+down_revision: Union[str, Sequence[str], None] = '6b1e9d3f7a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Standings are filled at startup by ensure_leaderboard (app/core/leaderboard.py) when empty
+    op.create_table('leaderboard',
+    sa.Column('period', sa.String(), nullable=False),
+    sa.Column('branch', sa.String(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('period', 'branch', 'user_id'),
+    if_not_exists=True
+    )
+    with op.get_context().autocommit_block():
+        op.create_index('ix_leaderboard_rank', 'leaderboard', ['period', 'branch', 'count', 'user_id'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leaderboard_rank', table_name='leaderboard')
+    op.drop_table('leaderboard')
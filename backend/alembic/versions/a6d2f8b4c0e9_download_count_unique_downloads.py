@@ -0,0 +1,54 @@
+"""notes.download_count, unique download per (user_id, note_id)
+
+Revision ID: a6d2f8b4c0e9
+Revises: f3a7c9e1b5d2
+Create Date: 2026-10-18 21:48:19.377410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d2f8b4c0e9'
+down_revision: Union[str, Sequence[str], None] = 'f3a7c9e1b5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('download_count', sa.Integer(), nullable=True))
+    # The old check-then-insert could record a download twice; keep the first one
+    op.execute("""
+        DELETE FROM downloads WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, note_id ORDER BY created_at, id
+                ) AS rn
+                FROM downloads
+            ) ranked
+            WHERE rn > 1
+        )
+    """)
+    op.execute("""
+        UPDATE notes SET download_count = (
+            SELECT count(*) FROM downloads WHERE downloads.note_id = notes.id
+        )
+    """)
+    # Stop the old app version first, same as the votes migration (c8e3f1a2d6b9)
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_downloads_user_note', table_name='downloads', postgresql_concurrently=True, if_exists=True)
+        op.create_index('ix_downloads_user_note', 'downloads', ['user_id', 'note_id'], unique=True, postgresql_concurrently=True)
+        op.create_index('ix_notes_status_downloads', 'notes', ['status', 'download_count', 'id'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_notes_status_downloads', table_name='notes', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_downloads_user_note', table_name='downloads', postgresql_concurrently=True, if_exists=True)
+        op.create_index('ix_downloads_user_note', 'downloads', ['user_id', 'note_id'], postgresql_concurrently=True)
+    op.drop_column('notes', 'download_count')
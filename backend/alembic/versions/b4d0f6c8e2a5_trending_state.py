@@ -0,0 +1,34 @@
+"""trending_state table
+
+Revision ID: b4d0f6c8e2a5
+Revises: a3c9e5b7d1f4
+Create Date: 2026-10-19 14:24:39.581204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d0f6c8e2a5'
+down_revision: Union[str, Sequence[str], None] = 'a3c9e5b7d1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The anchor row is written by the app's first re-normalization (app/core/trending.py)
+    op.create_table('trending_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('anchor', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('trending_state')
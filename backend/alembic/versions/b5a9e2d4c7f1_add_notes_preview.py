@@ -0,0 +1,31 @@
+"""Add notes.preview_url and notes.page_count
+
+Revision ID: b5a9e2d4c7f1
+Revises: 7d1f0b3c5e28
+Create Date: 2026-10-18 18:02:44.630157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5a9e2d4c7f1'
+down_revision: Union[str, Sequence[str], None] = '7d1f0b3c5e28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Left NULL; scripts/backfill_previews.py fills them in
+    op.add_column('notes', sa.Column('preview_url', sa.String(), nullable=True))
+    op.add_column('notes', sa.Column('page_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('notes', 'page_count')
+    op.drop_column('notes', 'preview_url')
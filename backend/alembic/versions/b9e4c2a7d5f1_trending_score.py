@@ -0,0 +1,42 @@
+"""notes.trending_score for sort_by=trending
+
+Revision ID: b9e4c2a7d5f1
+Revises: a6d2f8b4c0e9
+Create Date: 2026-10-18 22:31:44.062918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e4c2a7d5f1'
+down_revision: Union[str, Sequence[str], None] = 'a6d2f8b4c0e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('trending_score', sa.Float(), nullable=True))
+    # Keyset pagination compares tuples, NULLs would drop out of the sort. The real
+    # scores are computed by the app on startup (trending.renormalize).
+    op.execute("UPDATE notes SET trending_score = 0")
+    with op.get_context().autocommit_block():
+        op.create_index('ix_notes_status_trending', 'notes', ['status', 'trending_score', 'id'], postgresql_concurrently=True, if_not_exists=True)
+        # The re-normalization aggregates the last TRENDING_HORIZON of events by created_at
+        op.create_index('ix_votes_created_note', 'votes', ['created_at', 'note_id', 'vote_type'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_reviews_created_note', 'reviews', ['created_at', 'note_id', 'rating'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_downloads_created_note', 'downloads', ['created_at', 'note_id'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_downloads_created_note', table_name='downloads', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_reviews_created_note', table_name='reviews', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_votes_created_note', table_name='votes', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_notes_status_trending', table_name='notes', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('notes', 'trending_score')
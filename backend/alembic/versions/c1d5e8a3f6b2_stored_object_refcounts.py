@@ -0,0 +1,42 @@
+"""stored_objects: reference counts for deduplicated files
+
+Revision ID: c1d5e8a3f6b2
+Revises: b9e4c2a7d5f1
+Create Date: 2026-10-19 10:12:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1d5e8a3f6b2'
+down_revision: Union[str, Sequence[str], None] = 'b9e4c2a7d5f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stored_objects',
+    sa.Column('file_url', sa.String(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+    sa.Column('refs', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('file_url'),
+    if_not_exists=True
+    )
+    # One reference per note pointing at the object (skipping any the app already counted)
+    op.execute("""
+        INSERT INTO stored_objects (file_url, content_hash, refs)
+        SELECT file_url, MAX(content_hash), COUNT(*) FROM notes
+        WHERE file_url != ''
+          AND NOT EXISTS (SELECT 1 FROM stored_objects s WHERE s.file_url = notes.file_url)
+        GROUP BY file_url
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('stored_objects')
@@ -0,0 +1,38 @@
+"""identity_invalidations table
+
+Revision ID: c5e1a7d9f3b6
+Revises: b4d0f6c8e2a5
+Create Date: 2026-10-19 14:29:13.768052
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e1a7d9f3b6'
+down_revision: Union[str, Sequence[str], None] = 'b4d0f6c8e2a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('identity_invalidations',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    # Every worker polls by created_at (app/core/identity.py)
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_identity_invalidations_created_at'), 'identity_invalidations', ['created_at'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_identity_invalidations_created_at'), table_name='identity_invalidations')
+    op.drop_table('identity_invalidations')
@@ -0,0 +1,52 @@
+"""Make votes unique per (user_id, note_id)
+
+Revision ID: c8e3f1a2d6b9
+Revises: b5a9e2d4c7f1
+Create Date: 2026-10-18 19:10:12.408731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e3f1a2d6b9'
+down_revision: Union[str, Sequence[str], None] = 'b5a9e2d4c7f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The old read-modify-write vote could double-insert; keep each user's latest vote
+    op.execute("""
+        DELETE FROM votes WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, note_id ORDER BY created_at DESC, id DESC
+                ) AS rn
+                FROM votes
+            ) ranked
+            WHERE rn > 1
+        )
+    """)
+    # ...and it could lose counter updates, so recount every note from its votes
+    op.execute("""
+        UPDATE notes SET vote_count = coalesce(
+            (SELECT sum(vote_type) FROM votes WHERE votes.note_id = notes.id), 0
+        )
+    """)
+    # Stop the old app version first: a duplicate written between these two steps
+    # makes the unique build fail (rerun the migration after the cleanup above)
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_votes_user_note', table_name='votes', postgresql_concurrently=True, if_exists=True)
+        op.create_index('ix_votes_user_note', 'votes', ['user_id', 'note_id'], unique=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_votes_user_note', table_name='votes', postgresql_concurrently=True, if_exists=True)
+        op.create_index('ix_votes_user_note', 'votes', ['user_id', 'note_id'], postgresql_concurrently=True)
@@ -0,0 +1,30 @@
+"""Index votes by (note_id, vote_type)
+
+Revision ID: d4f7a9c1e3b5
+Revises: c8e3f1a2d6b9
+Create Date: 2026-10-18 20:02:37.114209
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f7a9c1e3b5'
+down_revision: Union[str, Sequence[str], None] = 'c8e3f1a2d6b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_votes_note_type', 'votes', ['note_id', 'vote_type'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_votes_note_type', table_name='votes', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,31 @@
+"""note_contents.extracted_at index for the search ETag
+
+Revision ID: d7c3e9f1a5b8
+Revises: c5e1a7d9f3b6
+Create Date: 2026-10-20 09:41:17.305926
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7c3e9f1a5b8'
+down_revision: Union[str, Sequence[str], None] = 'c5e1a7d9f3b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GET /notes/?q= validates against max(extracted_at)
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_note_contents_extracted_at'), 'note_contents', ['extracted_at'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_note_contents_extracted_at'), table_name='note_contents', postgresql_concurrently=True, if_exists=True)
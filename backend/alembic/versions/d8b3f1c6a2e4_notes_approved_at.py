@@ -0,0 +1,31 @@
+"""notes.approved_at, so the leaderboard buckets notes by approval time
+
+Revision ID: d8b3f1c6a2e4
+Revises: c1d5e8a3f6b2
+Create Date: 2026-10-19 11:04:52.730915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b3f1c6a2e4'
+down_revision: Union[str, Sequence[str], None] = 'c1d5e8a3f6b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('approved_at', sa.DateTime(), nullable=True))
+    # The real approval time of existing notes isn't known; the upload time is what the
+    # leaderboard used so far, so the standings stay as they are
+    op.execute("UPDATE notes SET approved_at = created_at WHERE status = 'APPROVED'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('notes', 'approved_at')
@@ -0,0 +1,57 @@
+"""Keep note ratings incrementally: rating_sum, unique review per user
+
+Revision ID: e2c6a8d0f4b7
+Revises: d4f7a9c1e3b5
+Create Date: 2026-10-18 20:41:05.530218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c6a8d0f4b7'
+down_revision: Union[str, Sequence[str], None] = 'd4f7a9c1e3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('rating_sum', sa.Integer(), nullable=True))
+    # add_review's check-then-insert could double-insert; keep each user's latest review
+    op.execute("""
+        DELETE FROM reviews WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, note_id ORDER BY created_at DESC, id DESC
+                ) AS rn
+                FROM reviews
+            ) ranked
+            WHERE rn > 1
+        )
+    """)
+    # Seed the aggregates from reviews; from here on add/edit/delete move them by deltas
+    op.execute("""
+        UPDATE notes SET
+            rating_sum = coalesce((SELECT sum(rating) FROM reviews WHERE reviews.note_id = notes.id), 0),
+            rating_count = (SELECT count(*) FROM reviews WHERE reviews.note_id = notes.id)
+    """)
+    op.execute("""
+        UPDATE notes SET rating = CASE WHEN rating_count > 0
+            THEN CAST(rating_sum AS FLOAT) / rating_count ELSE 0.0 END
+    """)
+    # Stop the old app version first, same as the votes migration (c8e3f1a2d6b9)
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reviews_user_note', table_name='reviews', postgresql_concurrently=True, if_exists=True)
+        op.create_index('ix_reviews_user_note', 'reviews', ['user_id', 'note_id'], unique=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reviews_user_note', table_name='reviews', postgresql_concurrently=True, if_exists=True)
+        op.create_index('ix_reviews_user_note', 'reviews', ['user_id', 'note_id'], postgresql_concurrently=True)
+    op.drop_column('notes', 'rating_sum')
@@ -0,0 +1,50 @@
+"""upload_jobs table
+
+Revision ID: e5a1c7d3b9f2
+Revises: f2b8d4a6c0e3
+Create Date: 2026-10-19 14:11:26.940318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c7d3b9f2'
+down_revision: Union[str, Sequence[str], None] = 'f2b8d4a6c0e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # if_not_exists: deployments that started the app first already got it from create_all
+    op.create_table('upload_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('note_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('target_status', sa.String(), nullable=False),
+    sa.Column('spool_path', sa.String(), nullable=False),
+    sa.Column('storage_key', sa.String(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_upload_jobs_note_id'), 'upload_jobs', ['note_id'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_upload_jobs_status_updated', 'upload_jobs', ['status', 'updated_at'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_upload_jobs_status_updated', table_name='upload_jobs')
+    op.drop_index(op.f('ix_upload_jobs_note_id'), table_name='upload_jobs')
+    op.drop_table('upload_jobs')
@@ -0,0 +1,35 @@
+"""note_facets table
+
+Revision ID: f2b8d4a6c0e3
+Revises: d8b3f1c6a2e4
+Create Date: 2026-10-19 14:03:51.207663
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4a6c0e3'
+down_revision: Union[str, Sequence[str], None] = 'd8b3f1c6a2e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Counts are filled at startup by ensure_facets (app/core/facets.py) when the table is empty
+    op.create_table('note_facets',
+    sa.Column('dimension', sa.String(), nullable=False),
+    sa.Column('value', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dimension', 'value'),
+    if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('note_facets')
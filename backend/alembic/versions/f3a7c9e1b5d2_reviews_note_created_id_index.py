@@ -0,0 +1,34 @@
+"""Add id to ix_reviews_note_created for keyset review pages
+
+Revision ID: f3a7c9e1b5d2
+Revises: e2c6a8d0f4b7
+Create Date: 2026-10-18 21:14:52.806127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a7c9e1b5d2'
+down_revision: Union[str, Sequence[str], None] = 'e2c6a8d0f4b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rebuild(columns):
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reviews_note_created', table_name='reviews', postgresql_concurrently=True, if_exists=True)
+        op.create_index('ix_reviews_note_created', 'reviews', columns, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rebuild(['note_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild(['note_id', 'created_at'])
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func
 from ..core.database import get_db
-from ..models.models import SystemSetting, User, UserRole
+from ..core.cache import CACHES
+from ..core.conditional import make_etag, cache_headers, is_not_modified, not_modified_response
+from ..models.models import SystemSetting, UserRole
+from ..core.identity import UserSnapshot
 from .deps import get_current_admin
 from pydantic import BaseModel
 from typing import List
@@ -20,7 +24,7 @@ class SettingResponse(SettingUpdate):
 @router.get("/settings", response_model=List[SettingResponse])
 async def get_settings(
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: UserSnapshot = Depends(get_current_admin)
 ):
     result = await db.execute(select(SystemSetting))
     return result.scalars().all()
@@ -29,7 +33,7 @@ async def get_settings(
 async def update_setting(
     setting: SettingUpdate,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: UserSnapshot = Depends(get_current_admin)
 ):
     result = await db.execute(select(SystemSetting).filter(SystemSetting.key == setting.key))
     existing_setting = result.scalars().first()
@@ -52,11 +56,27 @@ async def update_setting(
     return existing_setting
 
 @router.get("/public-config")
-async def get_public_config(db: AsyncSession = Depends(get_db)):
+async def get_public_config(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
     """
     Public endpoint to fetch non-sensitive config like prices.
     """
     keys_to_fetch = ["semester_price", "yearly_price"]
+    
+    # Settings are only ever inserted or updated (bumping updated_at), never deleted
+    stats = await db.execute(
+        select(func.max(SystemSetting.updated_at), func.count(SystemSetting.key))
+        .filter(SystemSetting.key.in_(keys_to_fetch))
+    )
+    last_modified, total = stats.one()
+    etag = make_etag("public-config", last_modified, total)
+    headers = cache_headers(etag, last_modified, max_age=300)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+    response.headers.update(headers)
     result = await db.execute(select(SystemSetting).filter(SystemSetting.key.in_(keys_to_fetch)))
     settings = result.scalars().all()
     
@@ -72,3 +92,10 @@ async def get_public_config(db: AsyncSession = Depends(get_db)):
             pass
             
     return config
+
+@router.get("/cache-stats")
+async def get_cache_stats(admin: UserSnapshot = Depends(get_current_admin)):
+    """
+    Hit/miss/eviction counters for this worker's in-process caches.
+    """
+    return {name: cache.stats() for name, cache in CACHES.items()}
@@ -35,13 +35,15 @@ async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_db))
     return {"access_token": access_token, "token_type": "bearer"}
 
 from ..schemas.user import UserUpdate
-from .deps import get_current_user
+from ..core import identity
+from ..core.identity import UserSnapshot
+from .deps import get_current_user, get_current_user_fresh
 
 @router.put("/me", response_model=UserResponse)
 async def update_profile(
     user_update: UserUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_fresh)
 ):
     print(f"Received update for {current_user.email}: {user_update}")
     if user_update.full_name is not None:
@@ -58,86 +60,45 @@ async def update_profile(
         current_user.target_cgpa = user_update.target_cgpa
     if user_update.study_hours is not None:
         current_user.study_hours = user_update.study_hours
+    await identity.invalidate(db, current_user.email)
         
     await db.commit()
     await db.refresh(current_user)
     return current_user
 
 @router.get("/me", response_model=UserResponse)
-async def get_my_profile(current_user: User = Depends(get_current_user)):
+async def get_my_profile(current_user: User = Depends(get_current_user_fresh)):
     return current_user
 
 from typing import List
 from ..schemas.note import NoteResponse
 from ..models.models import Note, Download, NoteStatus
+from ..core.serialization import ORJSONResponse, dumps, note_columns, note_rows_to_dicts
 
 @router.get("/me/uploads", response_model=List[NoteResponse])
 async def get_my_uploads(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
+    # Owners always see their own file_url, so no premium masking here
     result = await db.execute(
-        select(Note)
+        select(*note_columns())
         .filter(Note.uploaded_by == current_user.id)
         .order_by(Note.created_at.desc())
     )
-    notes = result.scalars().all()
-    # Normalize for schema
-    final_notes = []
-    for note in notes:
-        final_notes.append({
-            "id": note.id,
-            "title": note.title,
-            "university": note.university,
-            "branch": note.branch,
-            "semester": note.semester,
-            "subject": note.subject,
-            "is_premium": note.is_premium,
-            "uploaded_by": note.uploaded_by,
-            "status": note.status,
-            "created_at": note.created_at,
-            "category": note.category,
-            "year": note.year,
-            "vote_count": note.vote_count or 0,
-            "rating": note.rating or 0.0,
-            "rating_count": note.rating_count or 0,
-            "file_url": note.file_url 
-        })
-    return final_notes
+    return ORJSONResponse(dumps(note_rows_to_dicts(result.all())))
 
 @router.get("/me/downloads", response_model=List[NoteResponse])
 async def get_my_downloads(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     # Join download -> note
     query = (
-        select(Note)
+        select(*note_columns())
         .join(Download, Download.note_id == Note.id)
         .filter(Download.user_id == current_user.id)
         .order_by(Download.created_at.desc())
     )
     result = await db.execute(query)
-    notes = result.scalars().all()
-    
-    final_notes = []
-    for note in notes:
-        final_notes.append({
-            "id": note.id,
-            "title": note.title,
-            "university": note.university,
-            "branch": note.branch,
-            "semester": note.semester,
-            "subject": note.subject,
-            "is_premium": note.is_premium,
-            "uploaded_by": note.uploaded_by,
-            "status": note.status,
-            "created_at": note.created_at,
-            "category": note.category,
-            "year": note.year,
-            "vote_count": note.vote_count or 0,
-            "rating": note.rating or 0.0,
-            "rating_count": note.rating_count or 0,
-            "file_url": note.file_url 
-        })
-    return final_notes
+    return ORJSONResponse(dumps(note_rows_to_dicts(result.all())))
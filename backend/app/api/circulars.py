@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func
 from typing import List
 from ..core.database import get_db
-from ..models.models import Circular, User, UserRole
+from ..core.conditional import make_etag, cache_headers, is_not_modified, not_modified_response
+from ..models.models import Circular, UserRole
+from ..core.identity import UserSnapshot
 from .deps import get_current_user, get_current_admin
 from pydantic import BaseModel
 from datetime import datetime
@@ -27,7 +30,7 @@ class CircularResponse(CircularCreate):
 async def create_circular(
     circular: CircularCreate,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: UserSnapshot = Depends(get_current_admin)
 ):
     new_circular = Circular(
         title=circular.title,
@@ -41,8 +44,20 @@ async def create_circular(
 
 @router.get("/", response_model=List[CircularResponse])
 async def list_circulars(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db)
 ):
+    # Newest timestamp + row count covers both new and deleted circulars.
+    # No Last-Modified: deleting an older circular wouldn't move the max date.
+    stats = await db.execute(select(func.max(Circular.created_at), func.count(Circular.id)))
+    newest, total = stats.one()
+    etag = make_etag("circulars", newest, total)
+    headers = cache_headers(etag, max_age=60)
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+    response.headers.update(headers)
+    
     result = await db.execute(select(Circular).order_by(Circular.created_at.desc()))
     return result.scalars().all()
 
@@ -50,7 +65,7 @@ async def list_circulars(
 async def delete_circular(
     circular_id: UUID,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: UserSnapshot = Depends(get_current_admin)
 ):
     result = await db.execute(select(Circular).filter(Circular.id == circular_id))
     circular = result.scalars().first()
@@ -7,81 +7,76 @@ from ..models.models import User, UserRole
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-import time
+import hashlib
+import os
+from typing import Optional
+from ..core.cache import TTLCache
+from ..core.supabase_auth import email_for_token, seconds_left
+from ..core import identity
+from ..core.identity import UserSnapshot
 
-# Simple in-memory cache: token -> (email, timestamp)
-TOKEN_CACHE = {}
+# Verified tokens: sha256(token) -> email. Bounded (LRU) with a TTL that never outlives
+# the token's own exp, swept in the background (app/core/cache.py); keyed by hash so raw
+# tokens never sit in memory.
+# Counters show up under "auth_tokens" in GET /admin/cache-stats.
 CACHE_TTL = 60  # seconds
+TOKEN_CACHE = TTLCache("auth_tokens", maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")), ttl=CACHE_TTL)
 
-async def get_current_user_optional(token: str = Depends(OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)), db: AsyncSession = Depends(get_db)):
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+async def _email_for_token(token: str) -> Optional[str]:
+    """
+    Email the token belongs to, from the cache or by verifying it (locally when we
+    can, see app/core/supabase_auth.py). Raises if the token is invalid.
+    """
+    key = _token_key(token)
+    email = TOKEN_CACHE.get(key)
+    if email:
+        return email
+
+    email = await email_for_token(token)
+    if email:
+        # Never past the token's own expiry: a token with 5s left is cached for 5s
+        TOKEN_CACHE.set(key, email, ttl=seconds_left(token))
+    return email
+
+async def get_current_user_optional(token: str = Depends(OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)), db: AsyncSession = Depends(get_db)) -> Optional[UserSnapshot]:
     if not token:
         return None
-    
-    current_time = time.time()
-    
-    # Check cache
-    if token in TOKEN_CACHE:
-        email, timestamp = TOKEN_CACHE[token]
-        if current_time - timestamp < CACHE_TTL:
-            # Cache hit
-            pass
-        else:
-             # Expired
-             del TOKEN_CACHE[token]
-             email = None
-    else:
-        email = None
 
+    try:
+        email = await _email_for_token(token)
+    except Exception:
+        return None
     if not email:
-        from ..core.supabase_client import supabase
-        try:
-            user_response = supabase.auth.get_user(token)
-            if not user_response or not user_response.user:
-                return None
-            email = user_response.user.email
-            # Update cache
-            TOKEN_CACHE[token] = (email, current_time)
-        except Exception:
-            return None
-        
+        return None
+
+    snapshot = identity.cached(email)
+    if snapshot is not None:
+        return snapshot
     result = await db.execute(select(User).filter(User.email == email))
     user = result.scalars().first()
-    return user
+    return identity.remember(user) if user else None
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+async def _authenticated_email(token: str) -> str:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    current_time = time.time()
-    email = None
 
-    # Check cache
-    if token in TOKEN_CACHE:
-        cached_email, timestamp = TOKEN_CACHE[token]
-        if current_time - timestamp < CACHE_TTL:
-            email = cached_email
-    
+    try:
+        email = await _email_for_token(token)
+    except Exception as e:
+        print(f"DEBUG: Token verification failed: {e}")
+        raise credentials_exception
     if not email:
-        # Verify Supabase Token
-        from ..core.supabase_client import supabase
-        try:
-            # print(f"DEBUG: Verifying token: {token[:10]}...") 
-            user_response = supabase.auth.get_user(token)
-            # print(f"DEBUG: Supabase response: {user_response}")
-            if not user_response or not user_response.user:
-                print("DEBUG: No user in Supabase response")
-                raise credentials_exception
-            email = user_response.user.email
-            # Update cache
-            TOKEN_CACHE[token] = (email, current_time)
-            # print(f"DEBUG: Backend verified email: {email}")
-        except Exception as e:
-            print(f"DEBUG: Supabase verification failed: {e}")
-            raise credentials_exception
+        print("DEBUG: No email for token")
+        raise credentials_exception
+    return email
 
+async def _load_user(db: AsyncSession, email: str) -> User:
     # Check against local DB
     result = await db.execute(select(User).filter(User.email == email))
     user = result.scalars().first()
@@ -100,7 +95,25 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         
     return user
 
-async def get_current_admin(user: User = Depends(get_current_user)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> UserSnapshot:
+    """
+    Who is calling, as a cached UserSnapshot (app/core/identity.py): no users query
+    unless the cache misses. Use get_current_user_fresh for the full, attached row.
+    """
+    email = await _authenticated_email(token)
+    snapshot = identity.cached(email)
+    if snapshot is not None:
+        return snapshot
+    return identity.remember(await _load_user(db, email))
+
+async def get_current_user_fresh(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    """The caller's users row, read now, for endpoints that show all of it or change it."""
+    email = await _authenticated_email(token)
+    user = await _load_user(db, email)
+    identity.remember(user)  # Warm the cache while we have the row
+    return user
+
+async def get_current_admin(user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
     if user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized")
     return user
@@ -1,18 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse
 from sqlalchemy.future import select
+from sqlalchemy import tuple_, literal, func, delete, update
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from uuid import UUID
+from datetime import datetime
+import os
 import uuid
-from ..core.database import get_db
-from ..models.models import Note, User, NoteStatus, UserRole, Vote, Review
-from ..schemas.note import NoteResponse, NoteList, NoteUpdate
-from ..schemas.interaction import VoteCreate, VoteResponse, ReviewCreate, ReviewResponse
+from ..core.database import get_db, SessionLocal, upsert
+from ..core.pagination import encode_cursor, decode_cursor, cursor_scope
+from ..core import search, facets, upload_jobs, dedup, vote_counter, ratings, download_events, leaderboard, trending
+from ..core.post_upload import schedule_post_processing
+from ..core.cache import TTLCache, catalog_version, bump_catalog_version
+from ..core.catalog import catalog_validator
+from ..core.serialization import (
+    ORJSONResponse, dumps, note_columns, note_rows_to_dicts, encode_ndjson, encode_csv
+)
+from ..core.uploads import spooled_upload, transfer_slot
+from ..core.storage import StorageBackend, get_storage
+from ..core.conditional import make_etag, cache_headers, is_not_modified, not_modified_response
+from ..models.models import Note, User, NoteStatus, UserRole, Vote, Review, Download, UploadJob, UploadJobStatus
+from ..schemas.note import NoteResponse, NoteList, NoteUpdate, NotePage, NoteFacets, UploadJobResponse
+from ..schemas.interaction import VoteCreate, VoteResponse, ReviewCreate, ReviewResponse, ReviewPage, NoteStateRequest, NoteUserState
+from ..core.identity import UserSnapshot
 from .deps import get_current_user, get_current_admin, get_current_user_optional
 
 router = APIRouter()
 
-@router.post("/upload", response_model=NoteResponse)
+# Rendered GET /notes/ pages as (etag, JSON bytes), see list_notes
+CATALOG_CACHE = TTLCache("notes_catalog", maxsize=512, ttl=30)
+
+@router.post("/upload", response_model=NoteResponse, responses={202: {"model": UploadJobResponse}})
 async def upload_note(
     title: str = Form(...),
     branch: str = Form(...),
@@ -22,51 +42,22 @@ async def upload_note(
     year: Optional[int] = Form(None),
     file: UploadFile = File(...),
     is_premium: bool = Form(False),
+    background: bool = Query(False), # Return 202 + job id right away, store the file in a worker
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: UserSnapshot = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage)
 ):
-    # Initialize Supabase Client
-    import os
-    from supabase import create_client, Client
-    
-    url: str = os.environ.get("SUPABASE_URL")
-    key: str = os.environ.get("SUPABASE_KEY")
-    
-    if not url or not key:
-        raise HTTPException(status_code=500, detail="Supabase credentials not configured")
-
-    supabase: Client = create_client(url, key)
-    
     # Create unique filename
     file_ext = file.filename.split(".")[-1]
     file_path = f"{user.id}/{uuid.uuid4()}.{file_ext}"
-    
-    # Read file content
-    content = await file.read()
-    
-    try:
-        # Upload to 'notes' bucket
-        res = supabase.storage.from_("notes").upload(
-            file_path,
-            content,
-            {"content-type": file.content_type}
-        )
-        
-        # Get Public URL
-        # Note: 'get_public_url' might vary by SDK version, usually it's this:
-        public_url_response = supabase.storage.from_("notes").get_public_url(file_path)
-        # Check if it returns a string or object. Recent SDK returns str usually. 
-        # If it returns an object, we might need to access .publicURL or similar.
-        # Assuming string for now based on common usage.
-        file_url = public_url_response
-        
-    except Exception as e:
-        print(f"Upload error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to upload file to storage")
-    
+    target_status = NoteStatus.APPROVED if user.role == UserRole.ADMIN else NoteStatus.PENDING
+
+    if background and await upload_jobs.queue_full(db):
+        raise HTTPException(status_code=503, detail="Upload queue is full, please retry shortly", headers={"Retry-After": "30"})
+
     new_note = Note(
         title=title,
-        file_url=file_url,
+        file_url="",
         uploaded_by=user.id,
         branch=branch,
         semester=semester,
@@ -74,149 +65,356 @@ async def upload_note(
         category=category,
         year=year,
         is_premium=is_premium,
-        status=NoteStatus.APPROVED if user.role == UserRole.ADMIN else NoteStatus.PENDING
+        status=target_status
     )
+    leaderboard.stamp_approval(new_note, was_approved=False)
+    job = None
+    post_source = None
+    stored_key = None  # Object this request stored itself; removed again if the note isn't saved
+
+    # Stream the upload to a temp file (bounded size, hashed on the way), then either
+    # reuse an identical stored file, queue it for a worker, or hand it to the
+    # storage backend, which streams it over its shared connection pool
+    spool_dir = upload_jobs.spool_dir() if background else None
+    async with spooled_upload(file, dir=spool_dir) as (spool_path, size, content_hash):
+        new_note.content_hash = content_hash
+        # Takes a reference on the object in this transaction, so a concurrent delete keeps it
+        original = await dedup.claim_stored_copy(db, content_hash, storage)
+        if original is not None:
+            # Same bytes already stored: nothing to transfer, even in background mode
+            dedup.mark_duplicate(new_note, original)
+        elif background:
+            job = UploadJob(
+                id=uuid.uuid4(),
+                user_id=user.id,
+                target_status=target_status,
+                storage_key=file_path,
+                content_type=file.content_type,
+            )
+            # Keep the spooled file for the worker (spooled_upload only removes its own path)
+            job.spool_path = upload_jobs.job_spool_path(job.id)
+            os.replace(spool_path, job.spool_path)
+            new_note.status = NoteStatus.PROCESSING
+        else:
+            try:
+                async with transfer_slot():
+                    await storage.put(file_path, spool_path, file.content_type)
+                stored_key = file_path
+                new_note.file_url = storage.get_url(file_path)
+            except HTTPException:
+                raise
+            except Exception as e:
+                print(f"Upload error: {e}")
+                raise HTTPException(status_code=500, detail="Failed to upload file to storage")
+
+        if job is None:
+            # Hang on to the local copy so preview/extraction don't have to download it again
+            post_source = spool_path + ".post"
+            os.replace(spool_path, post_source)
     
-    db.add(new_note)
-    await db.commit()
+    try:
+        db.add(new_note)
+        await db.flush()
+        if new_note.file_url and original is None:
+            await dedup.record_stored_object(db, new_note.file_url, content_hash)
+        await search.index_note(db, new_note.id)
+        await facets.apply_note_change(db, None, facets.facet_snapshot(new_note))
+        await leaderboard.apply_note_change(db, None, leaderboard.leaderboard_snapshot(new_note))
+        if job is not None:
+            job.note_id = new_note.id
+            db.add(job)
+        await db.commit()
+    except Exception:
+        if job is not None:
+            os.remove(job.spool_path)
+        if post_source:
+            os.remove(post_source)
+        if stored_key:
+            # Its stored_objects row rolled back too, so nothing can be sharing it
+            try:
+                await storage.delete(stored_key)
+            except Exception as e:
+                print(f"Upload: failed to remove orphaned {stored_key}: {e}")
+        raise
+
+    if job is not None:
+        upload_jobs.enqueue(job.id)
+        await db.refresh(job)
+        return ORJSONResponse(dumps(_job_dict(job)), status_code=status.HTTP_202_ACCEPTED)
+
     await db.refresh(new_note)
+    if new_note.status == NoteStatus.APPROVED:
+        bump_catalog_version()
+    if post_source:
+        schedule_post_processing(new_note.id, post_source)
     return new_note
 
-@router.get("/", response_model=List[NoteResponse])
+def _job_dict(job: UploadJob, note: Optional[Note] = None) -> dict:
+    return UploadJobResponse(
+        id=job.id,
+        note_id=job.note_id,
+        status=job.status,
+        attempts=job.attempts,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        note=NoteResponse.model_validate(note) if note is not None else None,
+    ).model_dump()
+
+@router.get("/jobs/{job_id}", response_model=UploadJobResponse)
+async def get_upload_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    user: UserSnapshot = Depends(get_current_user)
+):
+    job = await db.get(UploadJob, job_id)
+    if not job or (job.user_id != user.id and user.role != UserRole.ADMIN):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    note = None
+    if job.status == UploadJobStatus.DONE:
+        note = await db.get(Note, job.note_id)
+    return _job_dict(job, note)
+
+@router.get("/", response_model=NotePage)
 async def list_notes(
+    request: Request,
     branch: Optional[str] = None,
     semester: Optional[int] = None,
     subject: Optional[str] = None,
     category: Optional[str] = None,
     year: Optional[int] = None,
+    q: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-    user: Optional[User] = Depends(get_current_user_optional),
-    limit: int = 100,
-    sort_by: Optional[str] = "newest" # newest, rating
+    user: Optional[UserSnapshot] = Depends(get_current_user_optional),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort_by: Optional[str] = None # newest, rating, downloads, trending, relevance (default when searching)
 ):
-    query = select(Note).filter(Note.status == NoteStatus.APPROVED)
+    # `subject` used to be a substring ILIKE; it now goes through the search index too,
+    # restricted to the subject column so file text can't widen the filter
+    searching = bool(q or subject)
     
+    # Guests and non-premium users all see the same pages, so whole pages are cached per
+    # visibility class. The catalog version in the key retires entries on any write (in
+    # other workers within CATALOG_POLL_SECONDS, see app/core/catalog.py).
+    visibility = "premium" if user and user.is_premium else "public"
+    cache_key = (
+        catalog_version(), visibility, branch, semester, category, year,
+        search.build_match_terms(q, subject) if searching else None,
+        sort_by, limit, cursor,
+    )
+    # Signed-in responses may differ per user, keep them out of shared caches. Guest pages
+    # stay public but vary on Authorization, so a cache never hands a guest's page (premium
+    # files locked) to a premium user asking for the same URL.
+    private = user is not None
+    cached_page = CATALOG_CACHE.get(cache_key)
+    if cached_page is not None:
+        etag, body = cached_page
+        headers = cache_headers(etag, max_age=30, private=private, vary_auth=True)
+        if is_not_modified(request, etag):
+            return not_modified_response(headers)
+        return ORJSONResponse(body, headers=headers)
+    
+    # Cheap validator first, so a revalidating client never costs the listing query
+    etag = make_etag("notes", *(await catalog_validator(db, searching)), *cache_key[1:])
+    headers = cache_headers(etag, max_age=30, private=private, vary_auth=True)
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+    
+    hits = search.match_subquery(q, subject) if searching else None
+    
+    # Keyset pagination: every sort ends with Note.id so the cursor is a strict position
     if sort_by == "rating":
         # Sort by rating desc, then vote count desc
-        query = query.order_by(Note.rating.desc(), Note.vote_count.desc())
+        sort_mode, sort_columns = "rating", [Note.rating, Note.vote_count, Note.id]
+    elif sort_by == "downloads":
+        sort_mode, sort_columns = "downloads", [Note.download_count, Note.id]
+    elif sort_by == "trending":
+        sort_mode, sort_columns = "trending", [Note.trending_score, Note.id]
+    elif hits is not None and sort_by in (None, "relevance"):
+        sort_mode, sort_columns = "relevance", [hits.c.score, Note.id]
     else:
         # Default newest
-        query = query.order_by(Note.created_at.desc())
+        sort_mode, sort_columns = "newest", [Note.created_at, Note.id]
+    # Cursors only replay against the sort and filters (and visibility) that made them
+    scope = cursor_scope(sort_mode, *cache_key[1:7])
+    
+    # Only the response columns, with premium files already masked for guests and
+    # non-premium users. Sort keys ride along so the cursor can be built from the last row.
+    columns = note_columns(lock_premium=visibility != "premium")
+    query = select(*columns, *sort_columns).filter(Note.status == NoteStatus.APPROVED)
+    if searching:
+        if hits is None:
+            return ORJSONResponse({"items": [], "next_cursor": None})
+        query = query.join(hits, hits.c.note_id == Note.id)
+    query = query.order_by(*[col.desc() for col in sort_columns])
+    
+    if cursor:
+        after = decode_cursor(cursor, len(sort_columns), scope)
+        query = query.filter(tuple_(*sort_columns) < tuple(after))
     
     if branch:
         query = query.filter(Note.branch == branch)
     if semester:
         query = query.filter(Note.semester == semester)
-    if subject:
-        query = query.filter(Note.subject.ilike(f"%{subject}%"))
     if category:
         query = query.filter(Note.category == category)
     if year:
         query = query.filter(Note.year == year)
         
-    if limit:
-        query = query.limit(limit)
+    # One extra row tells us whether there is a next page
+    query = query.limit(limit + 1)
         
     result = await db.execute(query)
-    notes = result.scalars().all()
+    rows = result.all()
     
-    # Enforce Premium Access
-    final_notes = []
-    for note in notes:
-        # Clone to avoid DB detach issues or modify in place if safe (Pydantic from_attributes handles it)
-        # But we need to return objects with 'file_url' modified if locked.
-        # Since response_model is NoteResponse, we can populate it manually or return dicts.
-        # Easiest: modify the object attributes temporarily or wrap in a dict.
-        
-        # We can't easily modify the SQLAlchmey object without dirtying it.
-        # So we convert to schema first? Or just dict.
-        note_dict = {
-            "id": note.id,
-            "title": note.title,
-            "university": note.university,
-            "branch": note.branch,
-            "semester": note.semester,
-            "subject": note.subject,
-            "is_premium": note.is_premium,
-            "uploaded_by": note.uploaded_by,
-            "status": note.status,
-            "created_at": note.created_at,
-            "category": note.category,
-            "year": note.year,
-            "vote_count": note.vote_count or 0,
-            "rating": note.rating or 0.0,
-            "rating_count": note.rating_count or 0,
-            "file_url": note.file_url 
-        }
-        
-        if note.is_premium:
-            # If user is None (Guest) OR user is not premium --> LOCK IT
-            if not user or not user.is_premium:
-                note_dict["file_url"] = "LOCKED"
-        
-        final_notes.append(note_dict)
-            
-    return final_notes
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*rows[-1][len(columns):], scope=scope)
+    
+    body = dumps({"items": note_rows_to_dicts(rows), "next_cursor": next_cursor})
+    CATALOG_CACHE.set(cache_key, (etag, body))
+    return ORJSONResponse(body, headers=headers)
+
+@router.get("/facets", response_model=NoteFacets)
+async def get_note_facets(db: AsyncSession = Depends(get_db)):
+    """
+    Approved-note counts per branch, semester, subject, category and year.
+    """
+    return await facets.get_facets(db)
 
 @router.post("/{note_id}/vote", response_model=VoteResponse)
 async def vote_note(
     note_id: UUID,
     vote: VoteCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    # Check if note exists
-    result = await db.execute(select(Note).filter(Note.id == note_id))
-    note = result.scalars().first()
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-
-    # Check existing vote
-    result = await db.execute(select(Vote).filter(
-        Vote.user_id == current_user.id,
-        Vote.note_id == note_id
-    ))
-    existing_vote = result.scalars().first()
-
-    if existing_vote:
-        if existing_vote.vote_type == vote.vote_type:
-             # Toggle off (delete)
-             await db.delete(existing_vote)
-             # Update count
-             note.vote_count -= vote.vote_type
+    if vote.vote_type not in (1, -1):
+        raise HTTPException(status_code=400, detail="vote_type must be 1 or -1")
+
+    # One transaction, no read-modify-write in Python: the vote row and the counter
+    # change with single statements, so concurrent votes can't lose updates.
+    # Same vote again toggles it off...
+    removed = await db.execute(
+        delete(Vote)
+        .where(Vote.user_id == current_user.id, Vote.note_id == note_id, Vote.vote_type == vote.vote_type)
+        .returning(Vote.id)
+    )
+    if removed.first() is not None:
+        delta, user_vote = -vote.vote_type, 0
+    else:
+        # ...otherwise insert it, or flip an opposite vote. The fresh id only comes back
+        # if the row was inserted; nothing comes back if a concurrent click got there first.
+        new_id = uuid.uuid4()
+        stmt = upsert(Vote).values(id=new_id, user_id=current_user.id, note_id=note_id, vote_type=vote.vote_type)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Vote.user_id, Vote.note_id],
+            set_={"vote_type": stmt.excluded.vote_type},
+            where=Vote.vote_type != stmt.excluded.vote_type,
+        ).returning(Vote.id)
+        try:
+            written = (await db.execute(stmt)).scalar()
+        except IntegrityError:
+            # FK violation: no such note
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Note not found")
+        if written is None:
+            delta = 0
         else:
-             # Change vote
-             diff = vote.vote_type - existing_vote.vote_type
-             existing_vote.vote_type = vote.vote_type
-             note.vote_count += diff
+            delta = vote.vote_type if written == new_id else 2 * vote.vote_type
+        user_vote = vote.vote_type
+
+    if vote_counter.enabled():
+        # Write-behind: don't touch the (possibly hot) note row, the flusher batches it
+        vote_count = (await db.execute(select(Note.vote_count).where(Note.id == note_id))).scalar()
+        if vote_count is None:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Note not found")
+        await db.commit()
+        vote_counter.add(note_id, delta)
+        vote_count += vote_counter.pending(note_id)
     else:
-        new_vote = Vote(
-            user_id=current_user.id,
-            note_id=note_id,
-            vote_type=vote.vote_type
+        counted = await db.execute(
+            update(Note)
+            .where(Note.id == note_id)
+            .values(
+                vote_count=func.coalesce(Note.vote_count, 0) + delta,
+                trending_score=trending.bumped(delta * trending.VOTE_WEIGHT),
+            )
+            .returning(Note.vote_count)
         )
-        db.add(new_vote)
-        if note.vote_count is None: note.vote_count = 0
-        note.vote_count += vote.vote_type
-    
-    await db.commit()
-    await db.refresh(note)
-
-    # Get current user vote state
-    current_vote_state = 0
-    # Re-fetch to be safe or just deduce. Re-fetching is safer.
-    result = await db.execute(select(Vote).filter(
-        Vote.user_id == current_user.id,
-        Vote.note_id == note_id
-    ))
-    updated_vote = result.scalars().first()
-    if updated_vote:
-        current_vote_state = updated_vote.vote_type
+        vote_count = counted.scalar()
+        if vote_count is None:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Note not found")
+        await db.commit()
+        if delta:
+            bump_catalog_version()
 
     return {
         "note_id": note_id,
-        "vote_count": note.vote_count,
-        "user_vote": current_vote_state
+        "vote_count": vote_count,
+        "user_vote": user_vote
+    }
+
+MAX_STATE_NOTES = 100
+
+@router.post("/votes/state", response_model=List[NoteUserState])
+async def note_states(
+    request: NoteStateRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    The current user's vote, review and download state for a page of notes:
+    one IN query per table instead of a request per card.
+    """
+    note_ids = list(dict.fromkeys(request.note_ids))
+    if len(note_ids) > MAX_STATE_NOTES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STATE_NOTES} note ids per request")
+    if not note_ids:
+        return []
+
+    # Each is a range scan on that table's (user_id, note_id) index
+    votes = dict((await db.execute(
+        select(Vote.note_id, Vote.vote_type)
+        .filter(Vote.user_id == current_user.id, Vote.note_id.in_(note_ids))
+    )).all())
+    reviewed = set((await db.execute(
+        select(Review.note_id)
+        .filter(Review.user_id == current_user.id, Review.note_id.in_(note_ids))
+    )).scalars())
+    downloaded = set((await db.execute(
+        select(Download.note_id).distinct()
+        .filter(Download.user_id == current_user.id, Download.note_id.in_(note_ids))
+    )).scalars())
+
+    return ORJSONResponse([
+        {
+            "note_id": note_id,
+            "user_vote": votes.get(note_id, 0),
+            "reviewed": note_id in reviewed,
+            "downloaded": note_id in downloaded,
+        }
+        for note_id in note_ids
+    ])
+
+def _check_rating(rating: int):
+    if not 1 <= rating <= 5:
+        raise HTTPException(status_code=400, detail="rating must be between 1 and 5")
+
+def _review_dict(review: Review, user: UserSnapshot) -> dict:
+    return {
+        "id": review.id,
+        "user_id": review.user_id,
+        "note_id": review.note_id,
+        "rating": review.rating,
+        "comment": review.comment,
+        "created_at": review.created_at,
+        "user_name": user.full_name
     }
 
 @router.post("/{note_id}/review", response_model=ReviewResponse)
@@ -224,254 +422,149 @@ async def add_review(
     note_id: UUID,
     review: ReviewCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    # Check if note exists
-    result = await db.execute(select(Note).filter(Note.id == note_id))
-    note = result.scalars().first()
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-
-    # Check if user already reviewed
-    result = await db.execute(select(Review).filter(
-        Review.user_id == current_user.id,
-        Review.note_id == note_id
-    ))
-    existing_review = result.scalars().first()
-    
-    if existing_review:
-        raise HTTPException(status_code=400, detail="You have already reviewed this note")
+    _check_rating(review.rating)
 
+    # Review row and the note's rating aggregates change in one transaction
+    # (see app/core/ratings.py); the unique (user_id, note_id) index rejects a second review
     new_review = Review(
+        id=uuid.uuid4(),
         user_id=current_user.id,
         note_id=note_id,
         rating=review.rating,
-        comment=review.comment
+        comment=review.comment,
+        created_at=datetime.utcnow()
     )
-    db.add(new_review)
-    await db.commit() # Commit review to enable aggregate query
+    stmt = upsert(Review).values(
+        id=new_review.id, user_id=new_review.user_id, note_id=note_id,
+        rating=new_review.rating, comment=new_review.comment, created_at=new_review.created_at
+    ).on_conflict_do_nothing(index_elements=[Review.user_id, Review.note_id]).returning(Review.id)
+    try:
+        inserted = (await db.execute(stmt)).scalar()
+    except IntegrityError:
+        # FK violation: no such note
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Note not found")
+    if inserted is None:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="You have already reviewed this note")
 
-    # Update note average rating
-    rating_stats = await db.execute(
-        select(func.avg(Review.rating), func.count(Review.id)).filter(Review.note_id == note_id)
-    )
-    avg_rating, count_rating = rating_stats.one()
-    
-    note.rating = float(avg_rating) if avg_rating else 0.0
-    note.rating_count = count_rating
-    
+    if await ratings.apply_rating_delta(db, note_id, review.rating, 1, trending.review_weight(review.rating)) is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Note not found")
     await db.commit()
+    bump_catalog_version()
 
-    return {
-        "id": new_review.id,
-        "user_id": new_review.user_id,
-        "note_id": new_review.note_id,
-        "rating": new_review.rating,
-        "comment": new_review.comment,
-        "created_at": new_review.created_at,
-        "user_name": current_user.full_name
-    }
+    return _review_dict(new_review, current_user)
 
-@router.get("/{note_id}/reviews", response_model=List[ReviewResponse])
-async def list_reviews(
+@router.put("/{note_id}/review", response_model=ReviewResponse)
+async def update_review(
     note_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    review: ReviewCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    # Eager load user for name? OR join.
-    # Note: Review model has user relationship.
-    # We need to make sure we load it. Explicit join or joinedload options.
-    from sqlalchemy.orm import selectinload
+    _check_rating(review.rating)
+
+    # Lock the review so a concurrent edit can't make us apply a stale old rating
     result = await db.execute(
         select(Review)
-        .filter(Review.note_id == note_id)
-        .order_by(Review.created_at.desc())
-        .options(selectinload(Review.user))
+        .filter(Review.user_id == current_user.id, Review.note_id == note_id)
+        .with_for_update()
     )
-    reviews = result.scalars().all()
-    
-    return [
-        {
-            **review.__dict__,
-            "user_name": review.user.full_name if review.user else "Unknown"
-        }
-        for review in reviews
-    ]
-
-@router.post("/{note_id}/vote", response_model=VoteResponse)
-async def vote_note(
-    note_id: UUID,
-    vote: VoteCreate,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    # Check if note exists
-    result = await db.execute(select(Note).filter(Note.id == note_id))
-    note = result.scalars().first()
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    existing = result.scalars().first()
+    if not existing:
+        raise HTTPException(status_code=404, detail="Review not found")
 
-    # Check existing vote
-    result = await db.execute(select(Vote).filter(
-        Vote.user_id == current_user.id,
-        Vote.note_id == note_id
-    ))
-    existing_vote = result.scalars().first()
-
-    if existing_vote:
-        if existing_vote.vote_type == vote.vote_type:
-             # Toggle off (delete)
-             await db.delete(existing_vote)
-             # Update count
-             note.vote_count -= vote.vote_type
-        else:
-             # Change vote
-             diff = vote.vote_type - existing_vote.vote_type
-             existing_vote.vote_type = vote.vote_type
-             note.vote_count += diff
-    else:
-        new_vote = Vote(
-            user_id=current_user.id,
-            note_id=note_id,
-            vote_type=vote.vote_type
-        )
-        db.add(new_vote)
-        note.vote_count += vote.vote_type
-    
+    sum_delta = review.rating - existing.rating
+    existing.rating = review.rating
+    existing.comment = review.comment
+    if sum_delta:
+        await ratings.apply_rating_delta(db, note_id, sum_delta, 0)
     await db.commit()
-    await db.refresh(note)
+    if sum_delta:
+        bump_catalog_version()
 
-    # Get current user vote state
-    current_vote_state = 0
-    # Re-fetch to be safe or just deduce. Re-fetching is safer.
-    result = await db.execute(select(Vote).filter(
-        Vote.user_id == current_user.id,
-        Vote.note_id == note_id
-    ))
-    updated_vote = result.scalars().first()
-    if updated_vote:
-        current_vote_state = updated_vote.vote_type
+    return _review_dict(existing, current_user)
 
-    return {
-        "note_id": note_id,
-        "vote_count": note.vote_count,
-        "user_vote": current_vote_state
-    }
-
-@router.post("/{note_id}/download")
-async def download_note(
+@router.delete("/{note_id}/review")
+async def delete_review(
     note_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    # Check note
-    result = await db.execute(select(Note).filter(Note.id == note_id))
-    note = result.scalars().first()
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-        
-    # Check if already filtered (optional, but good for history to avoid duplicates?)
-    # Let's simple add a new record for every download or just one?
-    # History usually implies unique items. Let's check unique (user_id, note_id).
-    
-    from ..models.models import Download
-    result = await db.execute(select(Download).filter(
-        Download.user_id == current_user.id,
-        Download.note_id == note_id
-    ))
-    existing = result.scalars().first()
-    
-    if not existing:
-        new_download = Download(user_id=current_user.id, note_id=note_id)
-        db.add(new_download)
-        await db.commit()
-        
-    return {"message": "Download recorded"}
+    removed = await db.execute(
+        delete(Review)
+        .where(Review.user_id == current_user.id, Review.note_id == note_id)
+        .returning(Review.rating)
+    )
+    rating = removed.scalar()
+    if rating is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Review not found")
 
-@router.post("/{note_id}/review", response_model=ReviewResponse)
-async def add_review(
+    await ratings.apply_rating_delta(db, note_id, -rating, -1)
+    await db.commit()
+    bump_catalog_version()
+    return {"message": "Review deleted successfully"}
+
+@router.get("/{note_id}/reviews", response_model=ReviewPage)
+async def list_reviews(
     note_id: UUID,
-    review: ReviewCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
 ):
-    # Check if note exists
-    result = await db.execute(select(Note).filter(Note.id == note_id))
-    note = result.scalars().first()
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-
-    # Check if user already reviewed
-    result = await db.execute(select(Review).filter(
-        Review.user_id == current_user.id,
-        Review.note_id == note_id
-    ))
-    existing_review = result.scalars().first()
-    
-    if existing_review:
-        raise HTTPException(status_code=400, detail="You have already reviewed this note")
-
-    new_review = Review(
-        user_id=current_user.id,
-        note_id=note_id,
-        rating=review.rating,
-        comment=review.comment
+    # Newest first, keyset-paginated off ix_reviews_note_created; only the reviewer's
+    # name is joined in, never the whole users row
+    sort_columns = [Review.created_at, Review.id]
+    scope = cursor_scope("reviews", str(note_id))
+    query = (
+        select(
+            Review.id, Review.user_id, Review.note_id, Review.rating, Review.comment, Review.created_at,
+            func.coalesce(User.full_name, "Unknown").label("user_name"),
+        )
+        .outerjoin(User, User.id == Review.user_id)
+        .filter(Review.note_id == note_id)
+        .order_by(*[col.desc() for col in sort_columns])
     )
-    db.add(new_review)
-    await db.commit() # Commit review to enable aggregate query
+    if cursor:
+        after = decode_cursor(cursor, len(sort_columns), scope)
+        query = query.filter(tuple_(*sort_columns) < tuple(after))
 
-    # Update note average rating
-    rating_stats = await db.execute(
-        select(func.avg(Review.rating), func.count(Review.id)).filter(Review.note_id == note_id)
-    )
-    avg_rating, count_rating = rating_stats.one()
-    
-    note.rating = float(avg_rating) if avg_rating else 0.0
-    note.rating_count = count_rating
-    
-    await db.commit()
+    # One extra row tells us whether there is a next page
+    rows = (await db.execute(query.limit(limit + 1))).all()
 
-    return {
-        "id": new_review.id,
-        "user_id": new_review.user_id,
-        "note_id": new_review.note_id,
-        "rating": new_review.rating,
-        "comment": new_review.comment,
-        "created_at": new_review.created_at,
-        "user_name": current_user.full_name
-    }
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id, scope=scope)
 
-@router.get("/{note_id}/reviews", response_model=List[ReviewResponse])
-async def list_reviews(
+    return ORJSONResponse({"items": [row._asdict() for row in rows], "next_cursor": next_cursor})
+
+@router.post("/{note_id}/download", status_code=status.HTTP_202_ACCEPTED)
+async def download_note(
     note_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    # Eager load user for name? OR join.
-    # Note: Review model has user relationship.
-    # We need to make sure we load it. Explicit join or joinedload options.
-    # For simplicity, let's assume lazy loading might verify, but async requires eager.
-    from sqlalchemy.orm import selectinload
-    result = await db.execute(
-        select(Review)
-        .filter(Review.note_id == note_id)
-        .order_by(Review.created_at.desc())
-        .options(selectinload(Review.user))
-    )
-    reviews = result.scalars().all()
-    
-    return [
-        {
-            **review.__dict__,
-            "user_name": review.user.full_name if review.user else "Unknown"
-        }
-        for review in reviews
-    ]
+    # Buffered and written in batches (app/core/download_events.py). The only DB work here
+    # is a per-note existence check, cached; notes deleted since are dropped at flush time.
+    if not await download_events.note_exists(db, note_id):
+        raise HTTPException(status_code=404, detail="Note not found")
+    if not download_events.record(current_user.id, note_id):
+        raise HTTPException(status_code=503, detail="Download tracking is busy, please retry", headers={"Retry-After": "30"})
+    return {"message": "Download recorded"}
 
 @router.get("/pending", response_model=List[NoteResponse])
 async def list_pending_notes(
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: UserSnapshot = Depends(get_current_admin)
 ):
-    result = await db.execute(select(Note).filter(Note.status == NoteStatus.PENDING))
+    # Inline the literal so the planner can match the partial ix_notes_pending_created index
+    pending = literal(NoteStatus.PENDING.value, literal_execute=True)
+    result = await db.execute(select(Note).filter(Note.status == pending))
     return result.scalars().all()
 
 @router.put("/{note_id}/verify", response_model=NoteResponse)
@@ -479,7 +572,7 @@ async def verify_note(
     note_id: UUID,
     action: str = Query(..., regex="^(approve|reject)$"),
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: UserSnapshot = Depends(get_current_admin)
 ):
     result = await db.execute(select(Note).filter(Note.id == note_id))
     note = result.scalars().first()
@@ -487,31 +580,78 @@ async def verify_note(
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
         
+    before = facets.facet_snapshot(note)
+    standing_before = leaderboard.leaderboard_snapshot(note)
+    was_approved = note.status == NoteStatus.APPROVED
     if action == "approve":
         note.status = NoteStatus.APPROVED
     else:
         note.status = NoteStatus.REJECTED
+    leaderboard.stamp_approval(note, was_approved)
+    await facets.apply_note_change(db, before, facets.facet_snapshot(note))
+    await leaderboard.apply_note_change(db, standing_before, leaderboard.leaderboard_snapshot(note))
         
     await db.commit()
+    bump_catalog_version()
     await db.refresh(note)
     return note
 
 @router.get("/admin/all", response_model=List[NoteResponse])
 async def list_all_notes_admin(
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: UserSnapshot = Depends(get_current_admin)
 ):
     result = await db.execute(select(Note).order_by(Note.created_at.desc()))
     return result.scalars().all()
 
-from ..schemas.note import NoteUpdate
+EXPORT_BATCH_SIZE = 1000
+
+@router.get("/admin/export")
+async def export_notes_admin(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    note_status: Optional[str] = Query(None, alias="status"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    admin: UserSnapshot = Depends(get_current_admin)
+):
+    """
+    Stream the whole catalog (optionally filtered by status / created_at range) as
+    NDJSON or CSV. Rows come off a server-side cursor in batches, so worker memory
+    stays flat regardless of table size. Rows are in storage order, not sorted.
+    """
+    query = select(*note_columns())
+    if note_status:
+        query = query.filter(Note.status == note_status)
+    if since:
+        query = query.filter(Note.created_at >= since)
+    if until:
+        query = query.filter(Note.created_at < until)
+    query = query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+    
+    async def generate():
+        # Own session: the request-scoped one may be closed before the body is done
+        async with SessionLocal() as session:
+            result = await session.stream(query)
+            if format == "csv":
+                yield encode_csv([], header=True)
+            async for batch in result.partitions():
+                dicts = note_rows_to_dicts(batch)
+                yield encode_csv(dicts) if format == "csv" else encode_ndjson(dicts)
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"notes-export.{format}"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 @router.put("/{note_id}", response_model=NoteResponse)
 async def update_note(
     note_id: UUID,
     note_update: NoteUpdate,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: UserSnapshot = Depends(get_current_admin)
 ):
     result = await db.execute(select(Note).filter(Note.id == note_id))
     note = result.scalars().first()
@@ -519,15 +659,24 @@ async def update_note(
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
         
+    before = facets.facet_snapshot(note)
+    standing_before = leaderboard.leaderboard_snapshot(note)
+    was_approved = note.status == NoteStatus.APPROVED
     if note_update.title is not None:
         note.title = note_update.title
     if note_update.status is not None:
         note.status = note_update.status
+        leaderboard.stamp_approval(note, was_approved)
     if note_update.is_premium is not None:
         note.is_premium = note_update.is_premium
     # Add other fields as needed from NoteUpdate schema
         
+    await db.flush()
+    await search.index_note(db, note.id)
+    await facets.apply_note_change(db, before, facets.facet_snapshot(note))
+    await leaderboard.apply_note_change(db, standing_before, leaderboard.leaderboard_snapshot(note))
     await db.commit()
+    bump_catalog_version()
     await db.refresh(note)
     return note
 
@@ -535,7 +684,8 @@ async def update_note(
 async def delete_note(
     note_id: UUID,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: UserSnapshot = Depends(get_current_admin),
+    storage: StorageBackend = Depends(get_storage)
 ):
     result = await db.execute(select(Note).filter(Note.id == note_id))
     note = result.scalars().first()
@@ -543,34 +693,59 @@ async def delete_note(
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
         
+    file_url = note.file_url
+    preview_url = note.preview_url
+    await search.remove_note(db, note.id)
+    await facets.apply_note_change(db, facets.facet_snapshot(note), None)
+    await leaderboard.apply_note_change(db, leaderboard.leaderboard_snapshot(note), None)
+    # In the same transaction as the delete, so a duplicate upload can't claim the object in between
+    last_reference = await dedup.release_stored_object(db, file_url) if file_url else False
     await db.delete(note)
     await db.commit()
+    bump_catalog_version()
+
+    # Only after the commit: a failed delete leaves an orphaned object, never a note without its file
+    key = storage.key_for_url(file_url)
+    if not last_reference:
+        print(f"Delete note {note_id}: file still used by other notes (or not ours), keeping it")
+    elif key is None:
+        print(f"Delete note {note_id}: file not in current storage backend, leaving it: {file_url}")
+    else:
+        try:
+            await storage.delete(key)
+            preview = storage.key_for_url(preview_url)
+            if preview is not None:
+                await storage.delete(preview)
+        except Exception as e:
+            print(f"Delete note {note_id}: failed to remove stored file {key}: {e}")
     return {"message": "Note deleted successfully"}
 
-from sqlalchemy import func
-
 @router.get("/leaderboard", response_model=List[dict])
 async def get_leaderboard(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    limit: int = 10
+    limit: int = Query(10, ge=1, le=100),
+    window: str = Query("all", pattern="^(week|month|semester|all)$"),
+    branch: Optional[str] = None
 ):
     """
-    Get top users by number of approved notes uploaded.
+    Get top users by number of approved notes uploaded, in the current week, month,
+    semester or all time, optionally for one branch. Read from the precomputed
+    `leaderboard` table (app/core/leaderboard.py), no aggregation per request.
     """
-    query = (
-        select(User.full_name, func.count(Note.id).label("note_count"))
-        .join(Note, User.id == Note.uploaded_by)
-        .filter(Note.status == NoteStatus.APPROVED)
-        .group_by(User.id, User.full_name)
-        .order_by(func.count(Note.id).desc())
-        .limit(limit)
-    )
-    
-    result = await db.execute(query)
-    leaderboard = result.all()
-    
+    # Standings only move when the approved catalog does
+    etag = make_etag("leaderboard", limit, window, branch, leaderboard.period_key(window, datetime.utcnow()),
+                     *(await catalog_validator(db)))
+    headers = cache_headers(etag, max_age=60)
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+    response.headers.update(headers)
+
+    standings = await leaderboard.get_leaderboard(db, window, branch, limit)
+
     # Format result as list of dicts
     return [
-        {"rank": idx + 1, "name": row.full_name or "Anonymous", "count": row.note_count}
-        for idx, row in enumerate(leaderboard)
+        {"rank": idx + 1, "name": row.full_name or "Anonymous", "count": row.count}
+        for idx, row in enumerate(standings)
     ]
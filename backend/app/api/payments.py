@@ -6,7 +6,9 @@ from sqlalchemy.future import select
 from ..core.database import get_db
 from ..models.models import User, Subscription, SubscriptionPlan, UserRole, SystemSetting
 
-from .deps import get_current_user
+from ..core import identity
+from ..core.identity import UserSnapshot
+from .deps import get_current_user, get_current_user_fresh
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 import uuid
@@ -30,7 +32,7 @@ class PaymentVerify(BaseModel):
 @router.post("/create-order")
 async def create_subscription_order(
     sub_data: SubscriptionCreate,
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     if not RAZORPAY_KEY_ID or not RAZORPAY_KEY_SECRET:
@@ -82,7 +84,7 @@ async def create_subscription_order(
 async def verify_payment(
     data: PaymentVerify,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_user_fresh)
 ):
     if not RAZORPAY_KEY_ID or not RAZORPAY_KEY_SECRET:
         raise HTTPException(status_code=500, detail="Payment gateway not configured")
@@ -115,6 +117,7 @@ async def verify_payment(
     
     db.add(new_sub)
     user.is_premium = True # Activate premium for user
+    await identity.invalidate(db, user.email)
     
     await db.commit()
     return {"status": "success", "message": "Premium activated"}
@@ -0,0 +1,59 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+from uuid import UUID
+from sqlalchemy import Select
+from .database import SessionLocal
+from .storage import close_storage
+from .pdf_tools import stop_pdf_pool
+from ..models.models import Note
+
+# Shared loop for the per-note backfill scripts (scripts/backfill_previews.py,
+# scripts/backfill_text.py): walk the notes still missing something in id order, a batch
+# at a time, and run `process` on each with bounded concurrency. `process` commits its
+# own note, so a stopped run loses nothing and a rerun picks up what is left.
+
+BATCH_SIZE = 200
+
+async def backfill_notes(
+    pending: Select,
+    process: Callable[[UUID], Awaitable[bool]],
+    concurrency: int,
+    label: str,
+):
+    """
+    `pending` selects Note.id of the notes still to do; `process` returns False when
+    it skipped a note (e.g. its file isn't in the current storage backend).
+    """
+    slots = asyncio.Semaphore(concurrency)
+    done = skipped = failed = 0
+    last_id = None
+    started = time.monotonic()
+
+    async def one(note_id):
+        nonlocal done, skipped, failed
+        async with slots:
+            try:
+                if await process(note_id):
+                    done += 1
+                else:
+                    skipped += 1
+            except Exception as e:
+                failed += 1
+                print(f"  {note_id}: {e}")
+
+    while True:
+        async with SessionLocal() as session:
+            query = pending.order_by(Note.id).limit(BATCH_SIZE)
+            if last_id is not None:
+                query = query.filter(Note.id > last_id)
+            note_ids = (await session.execute(query)).scalars().all()
+        if not note_ids:
+            break
+        last_id = note_ids[-1]
+        await asyncio.gather(*(one(note_id) for note_id in note_ids))
+        print(f"{done} done, {skipped} skipped, {failed} failed ({time.monotonic() - started:.0f}s)")
+
+    stop_pdf_pool()
+    await close_storage()
+    print(f"Finished: {done} {label}, {skipped} skipped, {failed} failures")
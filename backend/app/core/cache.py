@@ -0,0 +1,127 @@
+import asyncio
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# In-process caches. Each uvicorn worker has its own copy, so anything cached here
+# must be safe to serve slightly stale (bounded by the TTL) from other workers.
+
+CACHES = {}  # name -> TTLCache, for the admin stats endpoint
+
+CACHE_SWEEP_SECONDS = int(os.getenv("CACHE_SWEEP_SECONDS", "30"))
+
+class TTLCache:
+    """
+    Bounded key/value cache: entries expire after `ttl` seconds and the least
+    recently used entry is evicted once `maxsize` is reached. Expired entries
+    nobody asks for again are dropped by the background sweeper.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        CACHES[name] = self
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        """Store value for `ttl` seconds (default: the cache's TTL; never longer)."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def sweep(self) -> int:
+        """Drop every expired entry. Returns how many were removed."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+            self.expirations += len(expired)
+        return len(expired)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+_sweeper: Optional[asyncio.Task] = None
+
+async def _sweep_loop():
+    while True:
+        await asyncio.sleep(CACHE_SWEEP_SECONDS)
+        for cache in list(CACHES.values()):
+            cache.sweep()
+
+def start_cache_sweeper():
+    global _sweeper
+    if _sweeper is None:
+        _sweeper = asyncio.create_task(_sweep_loop())
+
+async def stop_cache_sweeper():
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.cancel()
+        await asyncio.gather(_sweeper, return_exceptions=True)
+        _sweeper = None
+
+# Catalog version: bumped by every write that can change what GET /notes/ returns
+# (including the write-behind vote and download flushes). Cache keys include it, so a
+# bump makes all older entries unreachable at once. It only counts this process's
+# writes; app/core/catalog.py bumps it for everyone else's.
+_catalog_version = 0
+
+def catalog_version() -> int:
+    return _catalog_version
+
+def bump_catalog_version():
+    global _catalog_version
+    _catalog_version += 1
@@ -0,0 +1,70 @@
+import asyncio
+import os
+from typing import Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import SessionLocal
+from .cache import bump_catalog_version
+from ..models.models import Note, NoteFacet, NoteContent, TrendingState
+
+# Cross-worker invalidation for the GET /notes/ page cache. The catalog version in
+# cache.py is per process: a write bumps it only in the worker that made it. So every
+# worker also polls the catalog validator (the same one the catalog ETag is built from)
+# every CATALOG_POLL_SECONDS and bumps its own version when it moved. Pages cached
+# before another worker's (or a script's) write are then served for at most about
+# that long, rather than for the cache TTL.
+
+CATALOG_POLL_SECONDS = int(os.getenv("CATALOG_POLL_SECONDS", "2"))
+
+_last_seen = None
+_task: Optional[asyncio.Task] = None
+
+async def catalog_validator(db: AsyncSession, searching: bool = False) -> list:
+    """
+    Changes whenever the approved catalog can have changed: any note write bumps
+    notes.updated_at (indexed max), and removals show up in the approved total
+    kept in note_facets. The hourly trending rebuild rewrites scores without
+    touching updated_at, so the trending anchor is part of it as well. Searches
+    also depend on extracted text, which background extraction adds without
+    touching the note, so they include the newest note_contents row too.
+    """
+    last_updated = await db.execute(select(func.max(Note.updated_at)))
+    approved = await db.execute(
+        select(func.coalesce(func.sum(NoteFacet.count), 0)).filter(NoteFacet.dimension == "semester")
+    )
+    anchor = await db.execute(select(TrendingState.anchor).filter(TrendingState.id == 1))
+    parts = [last_updated.scalar(), approved.scalar(), anchor.scalar()]
+    if searching:
+        parts.append((await db.execute(select(func.max(NoteContent.extracted_at)))).scalar())
+    return parts
+
+async def _poll():
+    global _last_seen
+    async with SessionLocal() as db:
+        seen = await catalog_validator(db, searching=True)
+    if _last_seen is not None and seen != _last_seen:
+        bump_catalog_version()
+    _last_seen = seen
+
+async def _poll_loop():
+    while True:
+        # First poll right away, as the baseline for everything cached from startup on
+        try:
+            await _poll()
+        except Exception as e:
+            print(f"Catalog poll failed: {e}")
+        await asyncio.sleep(CATALOG_POLL_SECONDS)
+
+def start_catalog_sync():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_poll_loop())
+
+async def stop_catalog_sync():
+    global _task, _last_seen
+    if _task is None:
+        return
+    _task.cancel()
+    await asyncio.gather(_task, return_exceptions=True)
+    _task = None
+    _last_seen = None
@@ -0,0 +1,69 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+# Conditional GET for read-mostly endpoints. Each endpoint computes a cheap validator
+# (max timestamps / counts, never the body itself), answers If-None-Match or
+# If-Modified-Since with a bare 304, and otherwise sends ETag/Last-Modified/Cache-Control
+# so browsers and the CDN in front of Render can revalidate instead of refetching.
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def _http_date(value: datetime) -> str:
+    # Timestamps are stored as naive UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value, usegmt=True)
+
+def cache_headers(
+    etag: str, last_modified: Optional[datetime] = None, max_age: int = 60,
+    private: bool = False, vary_auth: bool = False,
+) -> dict:
+    """
+    private: the body is for this user only. vary_auth: shared caches may keep it, but
+    per token, because who is asking changes the body (e.g. premium masking).
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"{'private' if private else 'public'}, max-age={max_age}, must-revalidate",
+    }
+    if private or vary_auth:
+        # Body depends on who is asking; caches must key on the token
+        headers["Vary"] = "Authorization"
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    return headers
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # RFC 7232: If-None-Match wins over If-Modified-Since; weak comparison for GET
+        if if_none_match.strip() == "*":
+            return True
+        ours = _strip_weak(etag)
+        return any(_strip_weak(tag) == ours for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have second precision
+        return modified.replace(microsecond=0) <= since
+    return False
+
+def not_modified_response(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
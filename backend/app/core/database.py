@@ -61,6 +61,14 @@ SessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+def upsert(table):
+    """INSERT with on_conflict_do_update/do_nothing, for whichever backend we're on."""
+    if engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
 async def get_db():
     async with SessionLocal() as session:
         yield session
@@ -0,0 +1,100 @@
+import os
+from typing import Optional
+from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from .storage import StorageBackend
+from ..models.models import Note, StoredObject
+
+# Content-hash dedup for uploads. Notes keep the SHA-256 of their file; a new upload
+# whose hash matches an already-stored note points at that note's object instead of
+# storing another copy.
+#
+# Objects can therefore be shared, so each one has a `stored_objects` row counting the
+# notes that use it. A duplicate upload takes a reference (claim_stored_copy) and a
+# delete drops one (release_stored_object), both inside the note write's transaction, so
+# the two serialize on that row: either the upload's reference lands first and the
+# delete keeps the object, or the delete wins, the row is gone, and the upload stores
+# its own copy. Only a delete that dropped the last reference removes the object.
+
+# Mark re-uploads with duplicate_of so admins can spot them in the moderation queue
+FLAG_DUPLICATE_UPLOADS = os.getenv("FLAG_DUPLICATE_UPLOADS", "true").lower() == "true"
+
+async def find_stored_copy(db: AsyncSession, content_hash: str, storage: StorageBackend) -> Optional[Note]:
+    """
+    Earliest note whose file has this hash and lives in the current storage backend.
+    Notes still PROCESSING have no object yet and are skipped.
+    """
+    result = await db.execute(
+        select(Note)
+        .filter(Note.content_hash == content_hash, Note.file_url != "")
+        .order_by(Note.created_at)
+        .limit(5)
+    )
+    for note in result.scalars():
+        if storage.key_for_url(note.file_url) is not None:
+            return note
+    return None
+
+async def claim_stored_copy(db: AsyncSession, content_hash: str, storage: StorageBackend) -> Optional[Note]:
+    """
+    find_stored_copy, plus a reference on its object for the note about to use it.
+    None if there is no copy or it is being deleted; the caller stores its own then.
+    """
+    original = await find_stored_copy(db, content_hash, storage)
+    if original is None:
+        return None
+    claimed = await db.execute(
+        update(StoredObject)
+        .where(StoredObject.file_url == original.file_url, StoredObject.refs > 0)
+        .values(refs=StoredObject.refs + 1)
+        .returning(StoredObject.refs)
+        .execution_options(synchronize_session=False)
+    )
+    return original if claimed.first() is not None else None
+
+async def record_stored_object(db: AsyncSession, file_url: str, content_hash: Optional[str]):
+    """A freshly stored object, referenced by the note being written."""
+    await db.execute(insert(StoredObject).values(file_url=file_url, content_hash=content_hash, refs=1))
+
+async def release_stored_object(db: AsyncSession, file_url: str) -> bool:
+    """
+    Drop a deleted note's reference. True if it was the last one: the object may be
+    removed from storage once this transaction has committed.
+    """
+    result = await db.execute(
+        update(StoredObject)
+        .where(StoredObject.file_url == file_url)
+        .values(refs=StoredObject.refs - 1)
+        .returning(StoredObject.refs)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.first()
+    if row is None:
+        return False  # Not an object we stored (e.g. placeholder note, other backend)
+    if row.refs > 0:
+        return False
+    await db.execute(delete(StoredObject).where(StoredObject.file_url == file_url))
+    return True
+
+def mark_duplicate(note: Note, original: Note):
+    note.file_url = original.file_url
+    note.preview_url = original.preview_url
+    note.page_count = original.page_count
+    if FLAG_DUPLICATE_UPLOADS:
+        note.duplicate_of = original.id
+
+def rebuild_stored_objects(conn):
+    """Recount references from `notes`. Sync connection, for startup/repair only."""
+    conn.execute(delete(StoredObject))
+    conn.execute(
+        insert(StoredObject).from_select(
+            ["file_url", "content_hash", "refs"],
+            select(Note.file_url, func.max(Note.content_hash), func.count())
+            .filter(Note.file_url != "")
+            .group_by(Note.file_url),
+        )
+    )
+
+def ensure_stored_objects(conn):
+    if not conn.execute(select(func.count()).select_from(StoredObject)).scalar():
+        rebuild_stored_objects(conn)
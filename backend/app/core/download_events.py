@@ -0,0 +1,153 @@
+import asyncio
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+from uuid import UUID, uuid4
+from sqlalchemy import select, update, func, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import SessionLocal, upsert
+from .cache import TTLCache, bump_catalog_version
+from . import trending
+from ..models.models import Note, Download
+
+# Download clicks are buffered in memory and written in batches. POST /notes/{id}/download
+# only adds (user, note) to the buffer and returns; every DOWNLOAD_FLUSH_MS a background
+# task inserts the batch with INSERT ... ON CONFLICT (user_id, note_id) DO NOTHING and,
+# in the same transaction, adds the rows that were actually new to notes.download_count.
+# So repeat downloads by the same user are free and never counted twice, whichever
+# worker they land on.
+#
+# Clicks still in the buffer when a worker is killed (not shut down) are lost; for
+# "most downloaded" and download history that is an acceptable trade. So are clicks
+# past DOWNLOAD_BUFFER_MAX while flushes keep failing: they are dropped (and counted in
+# the flush-failure log) rather than growing the buffer without bound.
+
+DOWNLOAD_FLUSH_MS = int(os.getenv("DOWNLOAD_FLUSH_MS", "2000"))
+DOWNLOAD_BUFFER_LIMIT = int(os.getenv("DOWNLOAD_BUFFER_LIMIT", "10000"))  # flush early past this
+DOWNLOAD_BUFFER_MAX = int(os.getenv("DOWNLOAD_BUFFER_MAX", "100000"))  # hard cap, clicks past it are dropped
+FLUSH_CHUNK = 500  # rows per INSERT, well under SQLite's bound parameter limit
+
+_buffer = {}  # (user_id, note_id) -> first click time
+_dropped = 0  # clicks dropped at the cap since the last log line
+_known_notes = TTLCache("download_known_notes", maxsize=10000, ttl=300)
+_flusher: Optional[asyncio.Task] = None
+_wake: Optional[asyncio.Event] = None
+
+_notes = Note.__table__
+_BUMP = (
+    update(_notes)
+    .where(_notes.c.id == bindparam("b_note_id"))
+    .values(
+        download_count=func.coalesce(_notes.c.download_count, 0) + bindparam("b_count"),
+        trending_score=func.coalesce(_notes.c.trending_score, 0.0) + bindparam("b_trending"),
+    )
+)
+
+async def note_exists(db: AsyncSession, note_id: UUID) -> bool:
+    """Existence check for the click endpoint, cached so repeat clicks skip the DB."""
+    if _known_notes.get(note_id):
+        return True
+    found = (await db.execute(select(Note.id).where(Note.id == note_id))).scalar() is not None
+    if found:
+        _known_notes.set(note_id, True)
+    return found
+
+def record(user_id: UUID, note_id: UUID) -> bool:
+    """Buffer a click. False if it was dropped because the buffer is full."""
+    global _dropped
+    key = (user_id, note_id)
+    if key not in _buffer and len(_buffer) >= DOWNLOAD_BUFFER_MAX:
+        _dropped += 1
+        return False
+    _buffer.setdefault(key, datetime.utcnow())
+    if len(_buffer) >= DOWNLOAD_BUFFER_LIMIT and _wake is not None:
+        _wake.set()
+    return True
+
+async def flush() -> int:
+    """Write everything buffered so far. Returns the number of new download rows."""
+    global _buffer
+    batch, _buffer = _buffer, {}
+    if not batch:
+        return 0
+    # Sorted so concurrent flushes from several workers take row locks in the same order
+    keys = sorted(batch)
+    new_per_note = Counter()
+    try:
+        async with SessionLocal() as db:
+            for start in range(0, len(keys), FLUSH_CHUNK):
+                chunk = keys[start:start + FLUSH_CHUNK]
+                # Clicks on notes deleted since would fail the FK and the whole batch with it
+                known = set((await db.execute(
+                    select(Note.id).where(Note.id.in_({note_id for _, note_id in chunk}))
+                )).scalars())
+                rows = [
+                    {"id": uuid4(), "user_id": user_id, "note_id": note_id, "created_at": batch[(user_id, note_id)]}
+                    for user_id, note_id in chunk if note_id in known
+                ]
+                if not rows:
+                    continue
+                stmt = (
+                    upsert(Download).values(rows)
+                    .on_conflict_do_nothing(index_elements=[Download.user_id, Download.note_id])
+                    .returning(Download.note_id)
+                )
+                new_per_note.update((await db.execute(stmt)).scalars())
+            if new_per_note:
+                await db.execute(_BUMP, [
+                    {"b_note_id": note_id, "b_count": count, "b_trending": trending.event_value(count * trending.DOWNLOAD_WEIGHT)}
+                    for note_id, count in sorted(new_per_note.items())
+                ])
+            await db.commit()
+    except BaseException:
+        # Keep them for the next flush (setdefault: a newer click doesn't move the first-click time),
+        # as far as the cap allows
+        global _dropped
+        for key, clicked_at in batch.items():
+            if key in _buffer or len(_buffer) < DOWNLOAD_BUFFER_MAX:
+                _buffer.setdefault(key, clicked_at)
+            else:
+                _dropped += 1
+        raise
+    if new_per_note:
+        bump_catalog_version()
+    return sum(new_per_note.values())
+
+async def _flush_loop():
+    while True:
+        try:
+            await asyncio.wait_for(_wake.wait(), DOWNLOAD_FLUSH_MS / 1000)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+        try:
+            await flush()
+        except Exception as e:
+            print(f"Download flush failed, will retry: {e}")
+        _log_dropped()
+
+def _log_dropped():
+    global _dropped
+    if _dropped:
+        print(f"Download buffer full ({DOWNLOAD_BUFFER_MAX} clicks), dropped {_dropped} clicks")
+        _dropped = 0
+
+async def start_download_buffer():
+    global _flusher, _wake
+    if _flusher is not None:
+        return
+    _wake = asyncio.Event()
+    _flusher = asyncio.create_task(_flush_loop())
+
+async def stop_download_buffer():
+    global _flusher, _wake
+    if _flusher is None:
+        return
+    _flusher.cancel()
+    await asyncio.gather(_flusher, return_exceptions=True)
+    _flusher = _wake = None
+    try:
+        await flush()
+    except Exception as e:
+        print(f"Download buffer: final flush failed, {len(_buffer)} clicks lost: {e}")
@@ -0,0 +1,66 @@
+import os
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import select
+from .database import SessionLocal
+from .storage import get_storage, download_to_temp
+from .cache import bump_catalog_version
+from .pdf_tools import run_in_pool, extract_text
+from . import search
+from ..models.models import Note, NoteContent, NoteStatus
+
+# Text extraction for search. The PDF's text is pulled in the PDF process pool,
+# normalized and cut to MAX_BODY_CHARS, stored in note_contents and indexed with the
+# note (lowest weight, see search.py). A note with a note_contents row is done, even
+# if the body is empty (scans, non-PDFs), so scripts/backfill_text.py can resume by
+# looking for notes without one.
+
+MAX_BODY_CHARS = int(os.getenv("MAX_BODY_CHARS", "20000"))
+
+async def extract_note(note_id: UUID, source_path: Optional[str] = None) -> bool:
+    """
+    Extract, store and index the text of one note. Uses the local copy at
+    source_path when the caller still has one, otherwise downloads the file.
+    False if the note is gone, already extracted, or its file isn't in the
+    current storage backend.
+    """
+    async with SessionLocal() as db:
+        note = await db.get(Note, note_id)
+        if note is None or not note.file_url:
+            return False
+        if await db.get(NoteContent, note_id) is not None:
+            return False
+
+        body = None
+        if note.content_hash:
+            # Same file already extracted for a dedup'd sibling
+            result = await db.execute(
+                select(NoteContent.body)
+                .join(Note, Note.id == NoteContent.note_id)
+                .filter(Note.content_hash == note.content_hash)
+                .limit(1)
+            )
+            body = result.scalar()
+
+        if body is None:
+            storage = await get_storage()
+            file_key = storage.key_for_url(note.file_url)
+            if file_key is None:
+                return False
+            downloaded = None
+            if source_path is None:
+                source_path = downloaded = await download_to_temp(storage, file_key)
+            try:
+                body = await run_in_pool(extract_text, source_path, MAX_BODY_CHARS)
+            finally:
+                if downloaded:
+                    os.remove(downloaded)
+
+        db.add(NoteContent(note_id=note.id, body=body))
+        await db.flush()
+        await search.index_note(db, note.id)
+        await db.commit()
+        if body and note.status == NoteStatus.APPROVED:
+            # Search results can change
+            bump_catalog_version()
+        return True
@@ -0,0 +1,74 @@
+from collections import Counter
+from typing import Optional
+from sqlalchemy import select, insert, delete, literal, cast, func, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import upsert
+from ..models.models import Note, NoteFacet, NoteStatus
+
+# Facet counts for the catalog filters, stored in `note_facets` and adjusted by +/-1
+# in the same transaction as the note write, so reads never GROUP BY over `notes`.
+
+DIMENSIONS = ("branch", "semester", "subject", "category", "year")
+
+def facet_snapshot(note: Note) -> Optional[dict]:
+    """
+    What a note contributes to the facets right now: None unless it is approved.
+    Take one before changing a note and pass it to apply_note_change afterwards.
+    """
+    if note.status != NoteStatus.APPROVED:
+        return None
+    values = {}
+    for dimension in DIMENSIONS:
+        value = getattr(note, dimension)
+        if value is not None:
+            values[dimension] = str(value)
+    return values
+
+async def apply_note_change(db: AsyncSession, before: Optional[dict], after: Optional[dict]):
+    deltas = Counter()
+    for dimension, value in (before or {}).items():
+        deltas[(dimension, value)] -= 1
+    for dimension, value in (after or {}).items():
+        deltas[(dimension, value)] += 1
+
+    # Fixed order, so concurrent note writes can't deadlock on each other's rows
+    for (dimension, value), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        stmt = upsert(NoteFacet).values(dimension=dimension, value=value, count=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[NoteFacet.dimension, NoteFacet.value],
+            set_={"count": NoteFacet.count + delta},
+        )
+        await db.execute(stmt)
+
+async def get_facets(db: AsyncSession) -> dict:
+    result = await db.execute(
+        select(NoteFacet.dimension, NoteFacet.value, NoteFacet.count)
+        .filter(NoteFacet.count > 0)
+        .order_by(NoteFacet.dimension, NoteFacet.value)
+    )
+    facets = {dimension: {} for dimension in DIMENSIONS}
+    for dimension, value, count in result.all():
+        facets.setdefault(dimension, {})[value] = count
+    return facets
+
+def rebuild_facets(conn):
+    """
+    Recompute every count from `notes`. Sync connection, for startup/repair only.
+    """
+    conn.execute(delete(NoteFacet))
+    for dimension in DIMENSIONS:
+        column = getattr(Note, dimension)
+        counts = (
+            select(literal(dimension), cast(column, String), func.count())
+            .filter(Note.status == NoteStatus.APPROVED, column.is_not(None))
+            .group_by(column)
+        )
+        conn.execute(
+            insert(NoteFacet).from_select([NoteFacet.dimension, NoteFacet.value, NoteFacet.count], counts)
+        )
+
+def ensure_facets(conn):
+    if not conn.execute(select(func.count()).select_from(NoteFacet)).scalar():
+        rebuild_facets(conn)
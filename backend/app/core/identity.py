@@ -0,0 +1,110 @@
+import asyncio
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from .cache import TTLCache
+from .database import SessionLocal
+from ..models.models import User, IdentityInvalidation
+
+# Who is making the request, without a users lookup per request. get_current_user hands
+# endpoints a UserSnapshot (id, email, role, is_premium, full_name) cached by email for
+# IDENTITY_CACHE_TTL seconds. Endpoints that need the whole row, or will change it, use
+# get_current_user_fresh instead (app/api/deps.py).
+#
+# Anything that changes one of the snapshot's fields calls invalidate() in its own
+# transaction. That drops the entry here and writes an `identity_invalidations` row that
+# every worker polls, so changes made by other workers or by scripts (promote_admin.py)
+# land within IDENTITY_POLL_SECONDS. The TTL bounds staleness if polling stops.
+
+IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", "30"))
+IDENTITY_POLL_SECONDS = 2
+POLL_LOOKBACK = timedelta(seconds=10)  # re-read a little, for transactions that commit late
+INVALIDATION_RETENTION = timedelta(minutes=10)
+
+IDENTITY_CACHE = TTLCache("identities", maxsize=int(os.getenv("IDENTITY_CACHE_SIZE", "10000")), ttl=IDENTITY_CACHE_TTL)
+
+_last_poll: Optional[datetime] = None
+_task: Optional[asyncio.Task] = None
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: uuid.UUID
+    email: str
+    role: str
+    is_premium: bool
+    full_name: Optional[str] = None
+
+def remember(user: User) -> UserSnapshot:
+    snapshot = UserSnapshot(
+        id=user.id, email=user.email, role=user.role,
+        is_premium=bool(user.is_premium), full_name=user.full_name,
+    )
+    IDENTITY_CACHE.set(user.email, snapshot)
+    return snapshot
+
+def cached(email: str) -> Optional[UserSnapshot]:
+    return IDENTITY_CACHE.get(email)
+
+async def invalidate(db: AsyncSession, *emails: str):
+    """Call in the transaction that changes these users' role/premium/name."""
+    emails = [email for email in emails if email]
+    if not emails:
+        return
+    for email in emails:
+        IDENTITY_CACHE.pop(email)
+    await db.execute(insert(IdentityInvalidation), [{"email": email} for email in emails])
+
+async def _poll():
+    global _last_poll
+    started = datetime.utcnow()
+    async with SessionLocal() as db:
+        emails = (await db.execute(
+            select(IdentityInvalidation.email)
+            .filter(IdentityInvalidation.created_at >= _last_poll - POLL_LOOKBACK)
+            .distinct()
+        )).scalars().all()
+    for email in emails:
+        IDENTITY_CACHE.pop(email)
+    _last_poll = started
+
+async def _prune():
+    # Rows every worker has long since applied
+    async with SessionLocal() as db:
+        await db.execute(
+            delete(IdentityInvalidation)
+            .where(IdentityInvalidation.created_at < datetime.utcnow() - INVALIDATION_RETENTION)
+        )
+        await db.commit()
+
+async def _poll_loop():
+    polls_per_prune = int(INVALIDATION_RETENTION.total_seconds() // IDENTITY_POLL_SECONDS)
+    polls = 0
+    while True:
+        await asyncio.sleep(IDENTITY_POLL_SECONDS)
+        polls += 1
+        try:
+            await _poll()
+            if polls % polls_per_prune == 0:
+                await _prune()
+        except Exception as e:
+            print(f"Identity invalidation poll failed: {e}")
+
+def start_identity_sync():
+    global _task, _last_poll
+    if _task is not None:
+        return
+    # The cache starts empty, so older invalidations don't matter
+    _last_poll = datetime.utcnow()
+    _task = asyncio.create_task(_poll_loop())
+
+async def stop_identity_sync():
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    await asyncio.gather(_task, return_exceptions=True)
+    _task = None
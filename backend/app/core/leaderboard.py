@@ -0,0 +1,116 @@
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import upsert
+from ..models.models import Note, NoteStatus, User, LeaderboardEntry
+
+# Uploader standings, stored in `leaderboard` and adjusted by +/-1 in the same transaction
+# as the note write (same idea as facets.py), so a read is one index range scan of
+# `limit` rows. Every approved note counts once in each of its windows, for all branches
+# ("") and for its own branch.
+#
+# Windows bucket a note by its approval time (notes.approved_at, falling back to the
+# upload time for rows approved before that was recorded): ISO week, calendar month,
+# academic semester (AKTU: odd = Jul-Dec, even = Jan-Jun) and all time. A note uploaded
+# last month and approved today counts for this week. Reads ask for the current bucket,
+# so a new week simply starts with an empty board.
+
+WINDOWS = ("week", "month", "semester", "all")
+ALL_BRANCHES = ""
+
+def period_key(window: str, at: datetime) -> str:
+    if window == "week":
+        year, week, _ = at.isocalendar()
+        return f"week:{year}-W{week:02d}"
+    if window == "month":
+        return f"month:{at:%Y-%m}"
+    if window == "semester":
+        return f"semester:{at.year}-{'even' if at.month <= 6 else 'odd'}"
+    return "all"
+
+def stamp_approval(note: Note, was_approved: bool):
+    """Record approved_at when a status change has just made the note approved."""
+    if note.status == NoteStatus.APPROVED and not was_approved:
+        note.approved_at = datetime.utcnow()
+
+def leaderboard_snapshot(note: Note) -> Optional[tuple]:
+    """
+    What a note contributes to the standings right now: None unless it is approved.
+    Take one before changing a note and pass it to apply_note_change afterwards.
+    """
+    if note.status != NoteStatus.APPROVED or note.uploaded_by is None:
+        return None
+    return note.uploaded_by, note.branch, note.approved_at or note.created_at
+
+def _entries(snapshot: tuple):
+    user_id, branch, approved_at = snapshot
+    windows = WINDOWS if approved_at is not None else ("all",)
+    for window in windows:
+        period = period_key(window, approved_at)
+        yield period, ALL_BRANCHES, user_id
+        if branch:
+            yield period, branch, user_id
+
+async def apply_note_change(db: AsyncSession, before: Optional[tuple], after: Optional[tuple]):
+    deltas = Counter()
+    if before:
+        for key in _entries(before):
+            deltas[key] -= 1
+    if after:
+        for key in _entries(after):
+            deltas[key] += 1
+
+    # Fixed order, so concurrent approvals can't deadlock on each other's rows
+    for (period, branch, user_id), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        stmt = upsert(LeaderboardEntry).values(period=period, branch=branch, user_id=user_id, count=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LeaderboardEntry.period, LeaderboardEntry.branch, LeaderboardEntry.user_id],
+            set_={"count": LeaderboardEntry.count + delta},
+        )
+        await db.execute(stmt)
+
+async def get_leaderboard(db: AsyncSession, window: str = "all", branch: Optional[str] = None, limit: int = 10):
+    """Top uploaders in the current `window`, as (name, count) rows, best first."""
+    period = period_key(window, datetime.utcnow())
+    result = await db.execute(
+        select(User.full_name, LeaderboardEntry.count)
+        .select_from(LeaderboardEntry)
+        .outerjoin(User, User.id == LeaderboardEntry.user_id)
+        .filter(
+            LeaderboardEntry.period == period,
+            LeaderboardEntry.branch == (branch or ALL_BRANCHES),
+            LeaderboardEntry.count > 0,
+        )
+        .order_by(LeaderboardEntry.count.desc(), LeaderboardEntry.user_id.desc())
+        .limit(limit)
+    )
+    return result.all()
+
+def rebuild_leaderboard(conn):
+    """
+    Recompute every board from `notes`. Sync connection, for startup/repair only.
+    Windows are bucketed in Python so the same code works on SQLite and Postgres.
+    """
+    counts = Counter()
+    approved = conn.execute(
+        select(Note.uploaded_by, Note.branch, func.coalesce(Note.approved_at, Note.created_at))
+        .filter(Note.status == NoteStatus.APPROVED, Note.uploaded_by.is_not(None))
+    )
+    for row in approved:
+        counts.update(_entries(tuple(row)))
+
+    conn.execute(delete(LeaderboardEntry))
+    rows = [
+        {"period": period, "branch": branch, "user_id": user_id, "count": count}
+        for (period, branch, user_id), count in counts.items()
+    ]
+    for start in range(0, len(rows), 1000):
+        conn.execute(insert(LeaderboardEntry), rows[start:start + 1000])
+
+def ensure_leaderboard(conn):
+    if not conn.execute(select(func.count()).select_from(LeaderboardEntry)).scalar():
+        rebuild_leaderboard(conn)
@@ -0,0 +1,52 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+from uuid import UUID
+from fastapi import HTTPException
+
+# Opaque keyset cursors: the last row's sort key values plus its id (tie-breaker),
+# JSON encoded and base64url'd so clients treat it as a token, not something to build.
+# Each cursor also carries the scope it was made for (sort mode + filter fingerprint),
+# so replaying it against another sort or other filters is a 400, not a wrong page.
+
+def cursor_scope(sort: str, *filters) -> str:
+    """Scope string for a listing: the sort mode plus a short hash of its filters."""
+    fingerprint = hashlib.sha1(json.dumps(filters, default=str).encode("utf-8")).hexdigest()[:12]
+    return f"{sort}:{fingerprint}"
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(*values, scope: str) -> str:
+    raw = json.dumps({"s": scope, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, size: int, scope: str) -> list:
+    """
+    Decode a cursor produced by encode_cursor. The last value is always the row id.
+    Raises a 400 if the cursor is malformed or was built for a different scope
+    (another sort or other filters).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(payload, dict) or payload.get("s") != scope:
+            raise ValueError("cursor scope mismatch")
+        values = payload.get("v")
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("cursor size mismatch")
+        values = [_decode_value(v) for v in values]
+        values[-1] = UUID(values[-1])
+        return values
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,104 @@
+import asyncio
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# CPU-heavy PDF work (rendering, parsing) runs in a small process pool so it never
+# holds the GIL in an API worker. Functions in this module are what the pool runs:
+# keep them top-level, picklable, and keep this module's imports light, since every
+# pool process imports it.
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def start_pdf_pool():
+    global _pool
+    if _pool is None:
+        # spawn, not fork: forking a process with an event loop and threads running is asking for trouble
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def stop_pdf_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def run_in_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(start_pdf_pool(), fn, *args)
+
+def is_pdf(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(5) == b"%PDF-"
+
+def render_first_page(pdf_path: str, out_path: str, width: int = 360, quality: int = 70) -> Optional[int]:
+    """
+    Write a JPEG of page 1, `width` px wide, to out_path and return the page count.
+    None if the file isn't a PDF we can open.
+    """
+    import pypdfium2 as pdfium
+
+    if not is_pdf(pdf_path):
+        return None
+    try:
+        pdf = pdfium.PdfDocument(pdf_path)
+    except pdfium.PdfiumError:
+        return None
+    try:
+        page_count = len(pdf)
+        if page_count == 0:
+            return 0
+        page = pdf[0]
+        page_width, _ = page.get_size()
+        bitmap = page.render(scale=width / page_width)
+        image = bitmap.to_pil().convert("RGB")
+        image.save(out_path, "JPEG", quality=quality, optimize=True)
+        page.close()
+        return page_count
+    finally:
+        pdf.close()
+
+def normalize_text(raw: str) -> str:
+    # Re-join words hyphenated across line breaks, drop control chars, collapse whitespace
+    raw = re.sub(r"(\w)-\s*\n\s*(\w)", r"\1\2", raw)
+    raw = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]", " ", raw)
+    return re.sub(r"\s+", " ", raw).strip()
+
+def extract_text(pdf_path: str, max_chars: int = 20000) -> str:
+    """
+    Normalized text of the PDF, cut at a word boundary near max_chars.
+    Empty for non-PDFs, unreadable files and scans without a text layer.
+    """
+    import pypdfium2 as pdfium
+
+    if not is_pdf(pdf_path):
+        return ""
+    try:
+        pdf = pdfium.PdfDocument(pdf_path)
+    except pdfium.PdfiumError:
+        return ""
+    parts = []
+    total = 0
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            text = normalize_text(textpage.get_text_bounded())
+            textpage.close()
+            page.close()
+            if text:
+                parts.append(text)
+                total += len(text) + 1
+            if total >= max_chars:
+                break  # No need to parse the rest of a 300-page scan
+    finally:
+        pdf.close()
+
+    body = " ".join(parts)
+    if len(body) > max_chars:
+        cut = body.rfind(" ", 0, max_chars)
+        body = body[:cut if cut > 0 else max_chars]
+    return body
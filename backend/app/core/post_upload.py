@@ -0,0 +1,39 @@
+import asyncio
+import os
+from typing import Optional
+from uuid import UUID
+from .previews import preview_note
+from .extraction import extract_note
+
+# Work on a note's file once the note is committed: first-page preview and text
+# extraction. Both steps are best effort; whatever doesn't finish (errors, restarts)
+# is left for scripts/backfill_previews.py and scripts/backfill_text.py.
+
+_tasks = set()
+
+async def process_upload(note_id: UUID, source_path: Optional[str] = None):
+    """Run both steps; they share the local copy at source_path when there is one."""
+    steps = (("preview", preview_note), ("text extraction", extract_note))
+    results = await asyncio.gather(*(step(note_id, source_path) for _, step in steps), return_exceptions=True)
+    for (name, _), result in zip(steps, results):
+        if isinstance(result, Exception):
+            print(f"Note {note_id}: {name} failed: {result}")
+
+def schedule_post_processing(note_id: UUID, source_path: Optional[str] = None):
+    """
+    Fire-and-forget process_upload after a request has committed the note. Takes
+    ownership of source_path and removes it when done.
+    """
+    async def run():
+        try:
+            await process_upload(note_id, source_path)
+        finally:
+            if source_path:
+                try:
+                    os.remove(source_path)
+                except OSError:
+                    pass
+
+    task = asyncio.create_task(run())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
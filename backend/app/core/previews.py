@@ -0,0 +1,72 @@
+import os
+import tempfile
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import update
+from .database import SessionLocal
+from .storage import StorageBackend, get_storage, download_to_temp
+from .cache import bump_catalog_version
+from .pdf_tools import run_in_pool, render_first_page
+from ..models.models import Note, NoteStatus
+
+# First-page thumbnails + page counts for the notes grid. Rendering runs in the PDF
+# process pool (app/core/pdf_tools.py); the JPEG is stored next to the file as
+# "<file key>.preview.jpg". page_count is NULL until a note has been processed and
+# 0 when there is nothing to preview (not a PDF, unreadable), so the backfill
+# (scripts/backfill_previews.py) only ever picks up unprocessed notes.
+
+PREVIEW_SUFFIX = ".preview.jpg"
+PREVIEW_WIDTH = int(os.getenv("PREVIEW_WIDTH", "360"))
+
+def preview_key(file_key: str) -> str:
+    return file_key + PREVIEW_SUFFIX
+
+async def render_and_store(storage: StorageBackend, file_key: str, source_path: str):
+    """Returns (preview_url or None, page_count)."""
+    fd, out_path = tempfile.mkstemp(prefix="preview-", suffix=".jpg")
+    os.close(fd)
+    try:
+        page_count = await run_in_pool(render_first_page, source_path, out_path, PREVIEW_WIDTH)
+        if not page_count:
+            return None, 0
+        await storage.put(preview_key(file_key), out_path, "image/jpeg")
+        return storage.get_url(preview_key(file_key)), page_count
+    finally:
+        os.remove(out_path)
+
+async def preview_note(note_id: UUID, source_path: Optional[str] = None) -> bool:
+    """
+    Render and store the preview for one note. Uses the local copy at source_path
+    when the caller still has one, otherwise downloads the file from storage.
+    False if the note is gone, already has a preview, or its file isn't in the
+    current storage backend.
+    """
+    async with SessionLocal() as db:
+        note = await db.get(Note, note_id)
+        if note is None or not note.file_url or note.page_count is not None:
+            return False
+        storage = await get_storage()
+        file_key = storage.key_for_url(note.file_url)
+        if file_key is None:
+            return False
+
+        downloaded = None
+        if source_path is None:
+            source_path = downloaded = await download_to_temp(storage, file_key)
+        try:
+            preview_url, page_count = await render_and_store(storage, file_key, source_path)
+        finally:
+            if downloaded:
+                os.remove(downloaded)
+
+        # Every note sharing this stored file (see dedup.py) shares the preview too
+        shared = Note.id == note.id
+        if note.content_hash:
+            shared = shared | ((Note.content_hash == note.content_hash) & (Note.file_url == note.file_url))
+        await db.execute(
+            update(Note).where(shared).values(preview_url=preview_url, page_count=page_count)
+        )
+        await db.commit()
+        if note.status == NoteStatus.APPROVED:
+            bump_catalog_version()
+        return True
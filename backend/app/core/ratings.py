@@ -0,0 +1,69 @@
+from sqlalchemy import update, select, func, case, cast, Float
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import trending
+from ..models.models import Note, Review
+
+# notes.rating is kept incrementally: every review write moves rating_sum and
+# rating_count by a delta in the same transaction, and rating (the average the
+# catalog sorts on) is recomputed from the two in that same UPDATE. No AVG/COUNT
+# scan over reviews per write. recompute_ratings() rebuilds all three from
+# `reviews` if they ever drift (scripts/repair_ratings.py).
+
+def _average(rating_sum, rating_count):
+    return case(
+        (rating_count > 0, cast(rating_sum, Float) / rating_count),
+        else_=0.0,
+    )
+
+async def apply_rating_delta(db: AsyncSession, note_id, sum_delta: int, count_delta: int, trending_weight: float = 0):
+    """
+    Shift the note's rating aggregates; call in the review write's transaction.
+    A new review also passes its trending weight (app/core/trending.py).
+    Returns (rating, rating_count), or None if the note doesn't exist.
+    """
+    new_sum = func.coalesce(Note.rating_sum, 0) + sum_delta
+    new_count = func.coalesce(Note.rating_count, 0) + count_delta
+    result = await db.execute(
+        update(Note)
+        .where(Note.id == note_id)
+        .values(
+            rating_sum=new_sum, rating_count=new_count, rating=_average(new_sum, new_count),
+            trending_score=trending.bumped(trending_weight),
+        )
+        .returning(Note.rating, Note.rating_count)
+        .execution_options(synchronize_session=False)
+    )
+    return result.first()
+
+async def recompute_ratings(db: AsyncSession) -> int:
+    """
+    Rebuild rating_sum/rating_count/rating for every note from `reviews` in one
+    grouped UPDATE; only rows that are off get written. Returns notes fixed.
+    """
+    totals = (
+        select(
+            Note.id.label("note_id"),
+            func.coalesce(func.sum(Review.rating), 0).label("rating_sum"),
+            func.count(Review.id).label("rating_count"),
+        )
+        .select_from(Note)
+        .outerjoin(Review, Review.note_id == Note.id)
+        .group_by(Note.id)
+        .subquery()
+    )
+    result = await db.execute(
+        update(Note)
+        .where(Note.id == totals.c.note_id)
+        .where(
+            (func.coalesce(Note.rating_sum, -1) != totals.c.rating_sum)
+            | (func.coalesce(Note.rating_count, -1) != totals.c.rating_count)
+            | (func.coalesce(Note.rating, -1.0) != _average(totals.c.rating_sum, totals.c.rating_count))
+        )
+        .values(
+            rating_sum=totals.c.rating_sum,
+            rating_count=totals.c.rating_count,
+            rating=_average(totals.c.rating_sum, totals.c.rating_count),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,149 @@
+import re
+from sqlalchemy import text, bindparam, column, Float
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import engine
+from ..models.models import Note
+
+# Full-text index over notes, kept in a side table `note_search`:
+#  - SQLite: FTS5 virtual table, ranked with bm25()
+#  - Postgres: tsvector column with a GIN index, ranked with ts_rank()
+# The index holds every note regardless of status; callers join back to `notes`
+# for status/premium filtering, so approving/rejecting never needs a reindex.
+# Extracted file text (note_contents.body) is indexed too, at the lowest weight;
+# extraction.py reindexes a note once its body is stored.
+
+IS_SQLITE = engine.dialect.name == "sqlite"
+
+MAX_QUERY_TOKENS = 8
+
+# Column weights: title > subject > branch > category > body
+if IS_SQLITE:
+    # note_id is an indexed column (one hex token) so single-note deletes are an index
+    # lookup instead of a scan; user queries are restricted to the text columns.
+    _TEXT_COLUMNS = "{title subject branch category body}"
+    _SCHEMA = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS note_search USING fts5(
+            note_id, title, subject, branch, category, body,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """,
+    ]
+    _DOCUMENT_SELECT = """
+        SELECT notes.id, notes.title, notes.subject, notes.branch,
+               replace(coalesce(notes.category, ''), '_', ' '),
+               coalesce(note_contents.body, '')
+        FROM notes LEFT JOIN note_contents ON note_contents.note_id = notes.id
+    """
+    _INSERT = "INSERT INTO note_search (note_id, title, subject, branch, category, body) " + _DOCUMENT_SELECT
+    # LIMIT -1 keeps SQLite from flattening the subquery, where bm25() is not allowed
+    _MATCH = """
+        SELECT note_id, -bm25(note_search, 0.0, 10.0, 6.0, 2.0, 1.0, 0.5) AS score
+        FROM note_search
+        WHERE note_search MATCH :terms
+        LIMIT -1
+    """
+    _DELETE = text("""
+        DELETE FROM note_search WHERE rowid IN (
+            SELECT rowid FROM note_search WHERE note_search MATCH 'note_id : "' || :note_id || '"'
+        )
+    """).bindparams(bindparam("note_id", type_=Note.__table__.c.id.type))
+else:
+    _SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS note_search (
+            note_id UUID PRIMARY KEY REFERENCES notes(id) ON DELETE CASCADE,
+            document TSVECTOR NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_note_search_document ON note_search USING GIN (document)",
+    ]
+    _DOCUMENT_SELECT = """
+        SELECT notes.id,
+               setweight(to_tsvector('simple', coalesce(notes.title, '')), 'A') ||
+               setweight(to_tsvector('simple', coalesce(notes.subject, '')), 'A') ||
+               setweight(to_tsvector('simple', coalesce(notes.branch, '')), 'B') ||
+               setweight(to_tsvector('simple', replace(coalesce(notes.category, ''), '_', ' ')), 'C') ||
+               setweight(to_tsvector('simple', coalesce(note_contents.body, '')), 'D')
+        FROM notes LEFT JOIN note_contents ON note_contents.note_id = notes.id
+    """
+    _INSERT = "INSERT INTO note_search (note_id, document) " + _DOCUMENT_SELECT
+    _MATCH = """
+        SELECT note_id, ts_rank(document, to_tsquery('simple', :terms)) AS score
+        FROM note_search
+        WHERE document @@ to_tsquery('simple', :terms)
+    """
+    _DELETE = text("DELETE FROM note_search WHERE note_id = :note_id").bindparams(
+        bindparam("note_id", type_=Note.__table__.c.id.type)
+    )
+
+_INSERT_ONE = text(_INSERT + " WHERE notes.id = :note_id").bindparams(
+    bindparam("note_id", type_=Note.__table__.c.id.type)
+)
+
+def _tokens(q: str):
+    return re.findall(r"\w+", (q or "").lower())[:MAX_QUERY_TOKENS]
+
+def build_match_terms(q: str, subject: str = None):
+    """
+    Turn free user input into a safe engine query: every word must match (AND),
+    each as a prefix so partial words work while typing. `q` matches anywhere,
+    including the file text; `subject` words only match the subject (on Postgres:
+    title or subject, which share weight A). None if nothing searchable.
+    """
+    tokens, subject_tokens = _tokens(q), _tokens(subject)
+    if not tokens and not subject_tokens:
+        return None
+    if IS_SQLITE:
+        parts = []
+        if tokens:
+            parts.append(_TEXT_COLUMNS + " : (" + " ".join(f'"{t}"*' for t in tokens) + ")")
+        if subject_tokens:
+            parts.append("subject : (" + " ".join(f'"{t}"*' for t in subject_tokens) + ")")
+        return " AND ".join(parts)
+    return " & ".join([f"{t}:*" for t in tokens] + [f"{t}:*A" for t in subject_tokens])
+
+def match_subquery(q: str, subject: str = None):
+    """
+    Subquery of (note_id, score) for notes matching `q` (and `subject`), higher
+    score = more relevant. Returns None when there are no searchable tokens.
+    """
+    terms = build_match_terms(q, subject)
+    if terms is None:
+        return None
+    stmt = text(_MATCH).bindparams(terms=terms).columns(
+        column("note_id", Note.__table__.c.id.type),
+        column("score", Float),
+    )
+    return stmt.subquery("search_hits")
+
+async def index_note(db: AsyncSession, note_id):
+    """
+    (Re)index one note from its current row. Call after flush, before commit,
+    so the index changes with the note in the same transaction.
+    """
+    await db.execute(_DELETE, {"note_id": note_id})
+    await db.execute(_INSERT_ONE, {"note_id": note_id})
+
+async def remove_note(db: AsyncSession, note_id):
+    await db.execute(_DELETE, {"note_id": note_id})
+
+def ensure_search_schema(conn):
+    """
+    Create the index if missing and fill it from `notes` when empty.
+    Runs on a sync connection (engine.begin() + run_sync) at startup.
+    """
+    if IS_SQLITE:
+        # FTS5 tables can't ALTER; one from before the body column is rebuilt from scratch
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(note_search)"))]
+        if columns and "body" not in columns:
+            conn.execute(text("DROP TABLE note_search"))
+    for ddl in _SCHEMA:
+        conn.execute(text(ddl))
+    indexed = conn.execute(text("SELECT count(*) FROM note_search")).scalar()
+    if not indexed:
+        conn.execute(text(_INSERT))
+
+def rebuild_search_index(conn):
+    conn.execute(text("DELETE FROM note_search"))
+    conn.execute(text(_INSERT))
@@ -0,0 +1,80 @@
+from typing import Any
+import csv
+import io
+import orjson
+from fastapi.responses import Response
+from sqlalchemy import case, func, literal
+from ..models.models import Note
+
+# Fast path for note listings: select only the NoteResponse columns as plain tuples,
+# mask locked premium files in SQL, and dump straight to JSON bytes with orjson.
+# Endpoints using it return an ORJSONResponse, which FastAPI sends as-is without
+# re-validating through the response_model (still declared for the OpenAPI docs).
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content)
+
+# Column defaults mirror NoteResponse so old rows with NULLs still serialize the same way
+_NOTE_FIELDS = [
+    ("id", Note.id),
+    ("title", Note.title),
+    ("university", func.coalesce(Note.university, "AKTU")),
+    ("branch", Note.branch),
+    ("semester", Note.semester),
+    ("subject", Note.subject),
+    ("is_premium", func.coalesce(Note.is_premium, False)),
+    ("uploaded_by", Note.uploaded_by),
+    ("status", Note.status),
+    ("created_at", Note.created_at),
+    ("category", func.coalesce(Note.category, "NOTE")),
+    ("year", Note.year),
+    ("vote_count", func.coalesce(Note.vote_count, 0)),
+    ("rating", func.coalesce(Note.rating, 0.0)),
+    ("rating_count", func.coalesce(Note.rating_count, 0)),
+    ("download_count", func.coalesce(Note.download_count, 0)),
+    ("page_count", Note.page_count),
+]
+
+NOTE_KEYS = tuple(name for name, _ in _NOTE_FIELDS) + ("preview_url", "file_url")
+
+_LOCKED_FILE_URL = case((Note.is_premium == True, literal("LOCKED")), else_=Note.file_url)
+# The preview is a render of the first page, i.e. part of the file: no teaser for locked notes
+_LOCKED_PREVIEW_URL = case((Note.is_premium == True, literal(None)), else_=Note.preview_url)
+
+def note_columns(lock_premium: bool = False) -> list:
+    """
+    Columns for a NoteResponse row, in NOTE_KEYS order. With lock_premium the
+    file_url of premium notes comes back as "LOCKED" and their preview_url as null,
+    straight from the database.
+    """
+    preview_url = _LOCKED_PREVIEW_URL if lock_premium else Note.preview_url
+    file_url = _LOCKED_FILE_URL if lock_premium else Note.file_url
+    return [expr.label(name) for name, expr in _NOTE_FIELDS] + [preview_url.label("preview_url"), file_url.label("file_url")]
+
+def note_rows_to_dicts(rows) -> list:
+    """
+    Turn projected rows into NoteResponse-shaped dicts. Extra trailing columns
+    (sort keys etc.) are dropped by zip().
+    """
+    keys = NOTE_KEYS
+    return [dict(zip(keys, row)) for row in rows]
+
+def encode_ndjson(dicts) -> bytes:
+    return b"".join(orjson.dumps(d, option=orjson.OPT_APPEND_NEWLINE) for d in dicts)
+
+def encode_csv(dicts, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(NOTE_KEYS)
+    for d in dicts:
+        writer.writerow([d[key] for key in NOTE_KEYS])
+    return buffer.getvalue().encode("utf-8")
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+from urllib.parse import quote, unquote
+import httpx
+
+# Where note files live. One backend instance per worker, created at startup and
+# reused by every request, so uploads share a single pooled HTTP client instead of
+# building a new Supabase client each time.
+#
+#   STORAGE_BACKEND=supabase (default)  Supabase Storage bucket, public URLs
+#   STORAGE_BACKEND=local               files under LOCAL_STORAGE_DIR, served by the /uploads mount
+#
+# Without SUPABASE_URL/SUPABASE_KEY the default falls back to local storage (with a
+# warning at startup) instead of failing every request that touches storage.
+#
+# Objects are addressed by key ("<user_id>/<uuid>.<ext>"); notes only store the
+# public URL, so each backend can map its own URLs back to a key for deletes.
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "uploads")
+LOCAL_STORAGE_URL = os.getenv("LOCAL_STORAGE_URL", "http://localhost:8000/uploads")
+STREAM_CHUNK_BYTES = 1024 * 1024
+
+class StorageBackend(ABC):
+    @abstractmethod
+    async def put(self, key: str, path: str, content_type: Optional[str] = None):
+        """Store the file at local `path` under `key`."""
+
+    @abstractmethod
+    def stream(self, key: str) -> AsyncIterator[bytes]:
+        """Yield the stored object in chunks."""
+
+    @abstractmethod
+    def get_url(self, key: str) -> str:
+        """Public URL of the object."""
+
+    @abstractmethod
+    def key_for_url(self, url: str) -> Optional[str]:
+        """Inverse of get_url; None if the URL isn't one of ours."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Remove the object. Missing objects are not an error."""
+
+    async def close(self):
+        pass
+
+class SupabaseStorage(StorageBackend):
+    def __init__(self, url: str, key: str, bucket: str = "notes", max_connections: int = 20):
+        from storage3 import AsyncStorageClient
+
+        self.bucket = bucket
+        self._public_prefix = f"{url.rstrip('/')}/storage/v1/object/public/{bucket}/"
+        auth = {"apiKey": key, "Authorization": f"Bearer {key}"}
+        # storage3 reads auth headers off the client itself, so they go here
+        self._http = httpx.AsyncClient(
+            headers=auth,
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            follow_redirects=True,
+            http2=True,
+        )
+        self._client = AsyncStorageClient(f"{url.rstrip('/')}/storage/v1/", auth, http_client=self._http)
+
+    async def put(self, key, path, content_type=None):
+        # httpx streams the open file in 64 KiB chunks
+        with open(path, "rb") as f:
+            # upsert: keys are unique per upload, so the only overwrites are deliberate (previews)
+            await self._client.from_(self.bucket).upload(
+                key, f, {"content-type": content_type or "application/octet-stream", "upsert": "true"}
+            )
+
+    async def stream(self, key):
+        async with self._http.stream("GET", self.get_url(key)) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_BYTES):
+                yield chunk
+
+    def get_url(self, key):
+        # Same format as the SDK's get_public_url, without the round trip through it
+        return self._public_prefix + quote(key)
+
+    def key_for_url(self, url):
+        if not url or not url.startswith(self._public_prefix):
+            return None
+        return unquote(url[len(self._public_prefix):].split("?", 1)[0])
+
+    async def delete(self, key):
+        await self._client.from_(self.bucket).remove([key])
+
+    async def close(self):
+        await self._http.aclose()
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str = "uploads", base_url: str = "http://localhost:8000/uploads"):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    async def put(self, key, path, content_type=None):
+        dest = self._path(key)
+
+        def _copy():
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            # Copy to a sibling then rename, so readers never see half a file
+            tmp = dest + ".part"
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, dest)
+
+        await asyncio.to_thread(_copy)
+
+    async def stream(self, key):
+        with open(self._path(key), "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+
+    def get_url(self, key):
+        return f"{self.base_url}/{quote(key)}"
+
+    def key_for_url(self, url):
+        prefix = self.base_url + "/"
+        if not url or not url.startswith(prefix):
+            return None
+        return unquote(url[len(prefix):])
+
+    async def delete(self, key):
+        try:
+            await asyncio.to_thread(os.remove, self._path(key))
+        except FileNotFoundError:
+            pass
+
+async def download_to_temp(storage: StorageBackend, key: str) -> str:
+    """Copy a stored object to a local temp file and return its path; caller removes it."""
+    fd, path = tempfile.mkstemp(prefix="download-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async for chunk in storage.stream(key):
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+_backend: Optional[StorageBackend] = None
+
+def create_storage() -> StorageBackend:
+    if STORAGE_BACKEND == "local":
+        return LocalStorage(LOCAL_STORAGE_DIR, LOCAL_STORAGE_URL)
+    if STORAGE_BACKEND != "supabase":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+    if not url or not key:
+        print(f"Storage: SUPABASE_URL/SUPABASE_KEY not set, storing files locally in {LOCAL_STORAGE_DIR}")
+        return LocalStorage(LOCAL_STORAGE_DIR, LOCAL_STORAGE_URL)
+    return SupabaseStorage(url, key, max_connections=int(os.getenv("STORAGE_MAX_CONNECTIONS", "20")))
+
+async def init_storage():
+    global _backend
+    if _backend is None:
+        _backend = create_storage()
+    return _backend
+
+async def close_storage():
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+async def get_storage() -> StorageBackend:
+    # Dependency; also covers scripts/tests that never ran the startup hook
+    return await init_storage()
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import update, exists
+from .database import SessionLocal
+from . import identity
+from ..models.models import User, Subscription
+
+# Premium ends with the subscription: every SUBSCRIPTION_CHECK_SECONDS, subscriptions past
+# their end_date are marked inactive, and their users lose is_premium unless another
+# subscription is still running. Their cached identities are invalidated in the same
+# transaction.
+
+SUBSCRIPTION_CHECK_SECONDS = 300
+
+_task: Optional[asyncio.Task] = None
+
+async def expire_subscriptions() -> int:
+    """Close out ended subscriptions. Returns the number of users who lost premium."""
+    now = datetime.utcnow()
+    async with SessionLocal() as db:
+        ended = await db.execute(
+            update(Subscription)
+            .where(Subscription.is_active == True, Subscription.end_date <= now)
+            .values(is_active=False)
+            .returning(Subscription.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        user_ids = {user_id for (user_id,) in ended if user_id is not None}
+        if not user_ids:
+            await db.commit()
+            return 0
+
+        still_active = exists().where(
+            Subscription.user_id == User.id, Subscription.is_active == True, Subscription.end_date > now
+        )
+        demoted = await db.execute(
+            update(User)
+            .where(User.id.in_(user_ids), User.is_premium == True, ~still_active)
+            .values(is_premium=False)
+            .returning(User.email)
+            .execution_options(synchronize_session=False)
+        )
+        emails = demoted.scalars().all()
+        await identity.invalidate(db, *emails)
+        await db.commit()
+    if emails:
+        print(f"Subscriptions: premium ended for {len(emails)} users")
+    return len(emails)
+
+async def _expiry_loop():
+    while True:
+        try:
+            await expire_subscriptions()
+        except Exception as e:
+            print(f"Subscription expiry failed: {e}")
+        await asyncio.sleep(SUBSCRIPTION_CHECK_SECONDS)
+
+def start_subscription_expiry():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_expiry_loop())
+
+async def stop_subscription_expiry():
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    await asyncio.gather(_task, return_exceptions=True)
+    _task = None
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+from typing import Optional
+import httpx
+from dotenv import load_dotenv
+from jose import jwt, JWTError, ExpiredSignatureError
+from jose.exceptions import JWTClaimsError
+
+# Supabase access tokens are JWTs, so most requests can be authenticated without asking
+# Supabase: check the signature and expiry here and read the email from the claims.
+#  - Legacy projects sign with HS256 and the project's JWT secret (SUPABASE_JWT_SECRET).
+#  - Projects on asymmetric signing keys publish them as a JWKS; we fetch it once and
+#    keep it for JWKS_CACHE_SECONDS, refetching early when a token names an unknown kid.
+# Tokens we can't check locally (no secret configured, unknown key, bad signature from a
+# key we might have wrong) fall back to supabase.auth.get_user, run in a thread so the
+# HTTP call never blocks the event loop. An expired token or wrong audience is rejected
+# straight away; Supabase would say the same thing.
+#
+# AUTH_VERIFY_MODE=remote turns local verification off.
+
+load_dotenv()
+
+AUTH_VERIFY_MODE = os.getenv("AUTH_VERIFY_MODE", "local")
+SUPABASE_URL = os.getenv("SUPABASE_URL", "")
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or (
+    SUPABASE_URL.rstrip("/") + "/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None
+)
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+JWKS_CACHE_SECONDS = 600
+JWKS_MIN_REFETCH_SECONDS = 30  # unknown kids can't make us hammer the JWKS endpoint
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+class TokenRejected(Exception):
+    """The token is definitely not valid (expired, wrong audience); don't ask Supabase."""
+
+_jwks = {}  # kid -> JWK dict
+_jwks_fetched_at = 0.0
+_jwks_lock: Optional[asyncio.Lock] = None
+
+async def _refresh_jwks(force: bool = False):
+    global _jwks, _jwks_fetched_at, _jwks_lock
+    if not SUPABASE_JWKS_URL:
+        return
+    if _jwks_lock is None:
+        _jwks_lock = asyncio.Lock()
+    async with _jwks_lock:
+        age = time.monotonic() - _jwks_fetched_at
+        if age < (JWKS_MIN_REFETCH_SECONDS if force else JWKS_CACHE_SECONDS):
+            return
+        _jwks_fetched_at = time.monotonic()
+        try:
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.get(SUPABASE_JWKS_URL)
+                response.raise_for_status()
+            _jwks = {key["kid"]: key for key in response.json().get("keys", []) if "kid" in key}
+        except Exception as e:
+            print(f"JWKS fetch failed, keeping {len(_jwks)} cached keys: {e}")
+
+async def _signing_key(header: dict):
+    """Key and algorithms to verify a token with this header, or (None, None) if we have none."""
+    alg = header.get("alg")
+    if alg == "HS256":
+        return (SUPABASE_JWT_SECRET, ["HS256"]) if SUPABASE_JWT_SECRET else (None, None)
+    if alg not in ASYMMETRIC_ALGORITHMS:
+        return None, None
+    kid = header.get("kid")
+    await _refresh_jwks()
+    if kid not in _jwks:
+        await _refresh_jwks(force=True)  # Keys rotated since the last fetch?
+    key = _jwks.get(kid)
+    return (key, [alg]) if key else (None, None)
+
+async def verify_locally(token: str) -> Optional[dict]:
+    """
+    Claims of a token whose signature and expiry check out locally. None if it can't
+    be decided here (caller falls back to Supabase); TokenRejected if it is invalid.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError:
+        raise TokenRejected("malformed token")
+    key, algorithms = await _signing_key(header)
+    if key is None:
+        return None
+    try:
+        return jwt.decode(token, key, algorithms=algorithms, audience=SUPABASE_JWT_AUDIENCE)
+    except ExpiredSignatureError:
+        raise TokenRejected("token expired")
+    except JWTClaimsError as e:
+        raise TokenRejected(str(e))
+    except JWTError:
+        # Bad signature: forged, or our secret/keys are out of date. Let Supabase decide.
+        return None
+
+def seconds_left(token: str) -> Optional[float]:
+    """
+    Seconds until the token's `exp`, None if it has none. Only read this once the
+    token has been verified; it doesn't check the signature itself.
+    """
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return None
+    return float(exp) - time.time() if exp is not None else None
+
+async def _remote_email(token: str) -> Optional[str]:
+    from .supabase_client import supabase
+    user_response = await asyncio.to_thread(supabase.auth.get_user, token)
+    if not user_response or not user_response.user:
+        return None
+    return user_response.user.email
+
+async def email_for_token(token: str) -> Optional[str]:
+    """
+    Email of the user the access token belongs to, None if there is none.
+    Raises if the token is invalid.
+    """
+    if AUTH_VERIFY_MODE != "remote":
+        claims = await verify_locally(token)
+        if claims is not None:
+            return claims.get("email") or None
+    return await _remote_email(token)
@@ -0,0 +1,176 @@
+import asyncio
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, update, func, literal, union_all, DateTime
+from .database import SessionLocal, engine
+from .cache import bump_catalog_version
+from ..models.models import Note, Vote, Review, Download, TrendingState
+
+# "Trending" = recent engagement with exponential time decay. An event of weight w at
+# time t is worth w * exp(-(now - t) / TAU) now. Because decay multiplies every note by
+# the same factor, the ranking doesn't change if we store each event as
+# w * exp((t - anchor) / TAU) for a fixed anchor instead: older events still weigh less,
+# and nothing has to be rewritten as time passes. So notes.trending_score only ever
+# grows by one `trending_score + :x` term per event, in the UPDATE the event already
+# runs, and ix_notes_status_trending serves sort_by=trending like created_at serves newest.
+#
+# The stored values grow as exp((now - anchor) / TAU), so the anchor moves forward once
+# per RENORMALIZE_EVERY and one worker re-normalizes: it rebuilds the scores relative to
+# the new anchor from the events of the last TRENDING_HORIZON from `votes`, `reviews` and
+# `downloads` (older events have decayed to noise), aggregated in SQL off their
+# created_at indexes. That also repairs what the incremental path approximates: removed
+# votes and edited/deleted reviews.
+#
+# The anchor is the start of the current RENORMALIZE_EVERY period, so every worker gets
+# the same one from the clock instead of polling for it, and all of them switch at the
+# boundary, when their maintenance loops wake up and race to claim the rebuild.
+# `trending_state` records the anchor the stored scores are relative to; only for the
+# few seconds the rebuild takes do new events (valued against the new anchor) land on
+# old-anchor scores, and the rebuild overwrites those anyway. The rebuild doesn't touch
+# notes.updated_at (that would invalidate every ETag hourly); the catalog validator
+# picks the anchor change up instead.
+
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "36"))
+TAU = TRENDING_HALF_LIFE_HOURS * 3600 / math.log(2)  # seconds
+TRENDING_HORIZON = timedelta(hours=TRENDING_HALF_LIFE_HOURS * 10)  # < 0.1% left after this
+RENORMALIZE_EVERY = timedelta(hours=1)
+RENORMALIZE_CHECK_SECONDS = 60  # retry interval if a rebuild failed
+_EPOCH = datetime(1970, 1, 1)
+
+VOTE_WEIGHT = 1.0  # per +1/-1
+DOWNLOAD_WEIGHT = 0.5
+REVIEW_WEIGHT = 1.0  # per star above/below 3, so a 1-star review pushes a note down
+
+_task: Optional[asyncio.Task] = None
+
+def review_weight(rating: int) -> float:
+    return REVIEW_WEIGHT * (rating - 3)
+
+def current_anchor(now: Optional[datetime] = None) -> datetime:
+    """Start of the RENORMALIZE_EVERY period `now` (default: now) falls in."""
+    now = now or datetime.utcnow()
+    return _EPOCH + ((now - _EPOCH) // RENORMALIZE_EVERY) * RENORMALIZE_EVERY
+
+def event_value(weight: float, at: Optional[datetime] = None) -> float:
+    """What an event of `weight` happening `at` (default now) adds to trending_score."""
+    if not weight:
+        return 0.0
+    now = datetime.utcnow()
+    return weight * math.exp(((at or now) - current_anchor(now)).total_seconds() / TAU)
+
+def bumped(weight: float, column=Note.trending_score):
+    """SET expression adding one event to trending_score, for an UPDATE the caller already runs."""
+    return func.coalesce(column, 0.0) + event_value(weight)
+
+async def _load_anchor(db) -> Optional[datetime]:
+    return (await db.execute(select(TrendingState.anchor).filter(TrendingState.id == 1))).scalar()
+
+def _decay(created_at, anchor: datetime):
+    """exp((created_at - anchor) / TAU) in SQL: what an event at created_at stores as, relative to `anchor`."""
+    if engine.dialect.name == "sqlite":
+        age = (func.julianday(created_at) - func.julianday(literal(anchor, DateTime))) * 86400.0
+    else:
+        age = func.extract("epoch", created_at - literal(anchor, DateTime))
+    return func.exp(age / TAU)
+
+def _renormalize_statement(now: datetime, anchor: datetime):
+    """
+    One UPDATE ... FROM: decay-weighted event totals per note over the last
+    TRENDING_HORIZON (range scans on the created_at indexes, grouped in SQL), written to
+    the notes that have recent events and zeroed on notes whose events all aged out.
+    """
+    since = now - TRENDING_HORIZON
+    events = union_all(
+        select(Vote.note_id, (VOTE_WEIGHT * func.coalesce(Vote.vote_type, 0) * _decay(Vote.created_at, anchor)).label("score"))
+        .where(Vote.created_at >= since),
+        select(Review.note_id, (REVIEW_WEIGHT * (func.coalesce(Review.rating, 3) - 3) * _decay(Review.created_at, anchor)).label("score"))
+        .where(Review.created_at >= since),
+        select(Download.note_id, (DOWNLOAD_WEIGHT * _decay(Download.created_at, anchor)).label("score"))
+        .where(Download.created_at >= since),
+    ).subquery()
+    totals = (
+        select(events.c.note_id, func.sum(events.c.score).label("score"))
+        .group_by(events.c.note_id)
+        .subquery()
+    )
+    notes = Note.__table__
+    targets = (
+        select(notes.c.id, func.coalesce(totals.c.score, 0.0).label("score"))
+        .select_from(notes.outerjoin(totals, totals.c.note_id == notes.c.id))
+        .where((notes.c.trending_score != 0) | totals.c.note_id.is_not(None))
+        .subquery()
+    )
+    return (
+        update(notes)
+        .where(notes.c.id == targets.c.id)
+        # Explicit updated_at so the column's onupdate doesn't fire: scores moving to a
+        # new anchor isn't an edit, and updated_at feeds the catalog ETags
+        .values(trending_score=targets.c.score, updated_at=notes.c.updated_at)
+    )
+
+async def renormalize(force: bool = False) -> bool:
+    """
+    Rebuild all scores relative to the current anchor, unless they already are (some
+    worker got there first). True if this call did the work.
+    """
+    now = datetime.utcnow()
+    anchor = current_anchor(now)
+    async with SessionLocal() as db:
+        current = await _load_anchor(db)
+        # >= rather than ==: a worker whose clock is a little behind mustn't move it back.
+        # An anchor off the period grid (written before anchors were aligned) is replaced.
+        if current is not None and not force and current >= anchor and current == current_anchor(current):
+            return False
+        # Claim the run: only one worker's conditional UPDATE matches the old anchor
+        if current is None:
+            db.add(TrendingState(id=1, anchor=anchor))
+            try:
+                await db.flush()
+            except Exception:
+                await db.rollback()
+                return False
+        else:
+            claimed = await db.execute(
+                update(TrendingState)
+                .where(TrendingState.id == 1, TrendingState.anchor == current)
+                .values(anchor=anchor)
+            )
+            if claimed.rowcount != 1:
+                await db.rollback()
+                return False
+
+        result = await db.execute(_renormalize_statement(now, anchor))
+        await db.commit()
+
+    bump_catalog_version()
+    print(f"Trending: re-normalized {result.rowcount} notes")
+    return True
+
+async def _maintenance_loop():
+    while True:
+        # Wake at the next period boundary (or sooner, to retry a failed rebuild); when
+        # the scores are already current renormalize() is one indexed read
+        now = datetime.utcnow()
+        until_next = (current_anchor(now) + RENORMALIZE_EVERY - now).total_seconds()
+        await asyncio.sleep(min(until_next, RENORMALIZE_CHECK_SECONDS))
+        try:
+            await renormalize()
+        except Exception as e:
+            print(f"Trending maintenance failed: {e}")
+
+async def start_trending():
+    global _task
+    if _task is not None:
+        return
+    await renormalize()
+    _task = asyncio.create_task(_maintenance_loop())
+
+async def stop_trending():
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    await asyncio.gather(_task, return_exceptions=True)
+    _task = None
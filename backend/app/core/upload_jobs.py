@@ -0,0 +1,218 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import SessionLocal
+from .storage import get_storage
+from . import search, facets, leaderboard
+from .cache import bump_catalog_version
+from .dedup import claim_stored_copy, record_stored_object, mark_duplicate
+from .post_upload import process_upload
+from ..models.models import Note, NoteStatus, UploadJob, UploadJobStatus, StoredObject
+
+# Background upload pipeline. POST /notes/upload?background=true spools the file into
+# UPLOAD_SPOOL_DIR, inserts the note as PROCESSING plus an upload_jobs row, and returns
+# 202. A fixed pool of worker tasks per uvicorn worker then stores the file and flips
+# the note to its real status. Job state lives in the DB so any worker can answer
+# GET /notes/jobs/{id}, and unfinished jobs are picked up again after a restart.
+#
+# Jobs are claimed with a conditional UPDATE (QUEUED -> RUNNING), so a job that ends
+# up in more than one worker's queue still runs once. Backpressure counts unfinished
+# jobs in the table, so UPLOAD_QUEUE_LIMIT holds across all workers.
+
+UPLOAD_SPOOL_DIR = os.path.abspath(os.getenv("UPLOAD_SPOOL_DIR", "upload_spool"))
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+UPLOAD_QUEUE_LIMIT = int(os.getenv("UPLOAD_QUEUE_LIMIT", "200"))  # unfinished jobs, all workers together
+UPLOAD_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2  # seconds, doubled on every attempt
+STALE_RUNNING_AFTER = timedelta(minutes=15)
+
+_queue: Optional[asyncio.Queue] = None
+_workers = []
+_retry_handles = set()
+
+async def queue_full(db: AsyncSession) -> bool:
+    unfinished = await db.execute(
+        select(func.count()).select_from(UploadJob)
+        .filter(UploadJob.status.in_([UploadJobStatus.QUEUED, UploadJobStatus.RUNNING]))
+    )
+    return unfinished.scalar() >= UPLOAD_QUEUE_LIMIT
+
+def spool_dir() -> str:
+    # Created on use, so background uploads still spool (and get recovered on the next
+    # start) when this worker's job workers failed to start
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    return UPLOAD_SPOOL_DIR
+
+def job_spool_path(job_id: UUID) -> str:
+    return os.path.join(UPLOAD_SPOOL_DIR, f"{job_id}.upload")
+
+def enqueue(job_id: UUID):
+    if _queue is None:
+        # Workers not running (e.g. a script); the next startup recovers the job
+        print(f"Upload job {job_id} queued but no workers are running")
+        return
+    _queue.put_nowait(job_id)
+
+def _retry_later(job_id: UUID, delay: float):
+    def fire():
+        _retry_handles.discard(handle)
+        enqueue(job_id)
+
+    handle = asyncio.get_running_loop().call_later(delay, fire)
+    _retry_handles.add(handle)
+
+def _remove_spool(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+async def _claim(job_id: UUID) -> Optional[UploadJob]:
+    async with SessionLocal() as db:
+        result = await db.execute(
+            update(UploadJob)
+            .where(UploadJob.id == job_id, UploadJob.status == UploadJobStatus.QUEUED)
+            .values(status=UploadJobStatus.RUNNING, attempts=UploadJob.attempts + 1, updated_at=datetime.utcnow())
+        )
+        await db.commit()
+        if result.rowcount != 1:
+            return None  # Done, failed, or another worker has it
+        return await db.get(UploadJob, job_id)
+
+async def _finish(job_id: UUID, status: UploadJobStatus, error: Optional[str] = None):
+    async with SessionLocal() as db:
+        await db.execute(
+            update(UploadJob).where(UploadJob.id == job_id)
+            .values(status=status, error=error, updated_at=datetime.utcnow())
+        )
+        await db.commit()
+
+async def process_job(job_id: UUID):
+    job = await _claim(job_id)
+    if job is None:
+        return
+
+    try:
+        async with SessionLocal() as db:
+            note = await db.get(Note, job.note_id)
+            if note is None:
+                # Deleted while queued; nothing to store
+                await _finish(job.id, UploadJobStatus.FAILED, "Note was deleted before upload finished")
+                _remove_spool(job.spool_path)
+                return
+            if note.status != NoteStatus.PROCESSING:
+                # Stored and flipped on an earlier attempt, only the job update was lost
+                await _finish(job.id, UploadJobStatus.DONE)
+                _remove_spool(job.spool_path)
+                return
+
+            storage = await get_storage()
+            # An identical file may have been stored since this job was queued
+            original = await claim_stored_copy(db, note.content_hash, storage) if note.content_hash else None
+            if original is not None:
+                mark_duplicate(note, original)
+            else:
+                await storage.put(job.storage_key, job.spool_path, job.content_type)
+                note.file_url = storage.get_url(job.storage_key)
+                await record_stored_object(db, note.file_url, note.content_hash)
+            note.status = job.target_status
+            leaderboard.stamp_approval(note, was_approved=False)
+            # Already in the search index since the request; facets and standings only count approved notes
+            await facets.apply_note_change(db, None, facets.facet_snapshot(note))
+            await leaderboard.apply_note_change(db, None, leaderboard.leaderboard_snapshot(note))
+            db.add(note)
+            await db.commit()
+            if note.status == NoteStatus.APPROVED:
+                bump_catalog_version()
+
+        # Preview + text extraction; best effort, never fails the upload
+        await process_upload(note.id, job.spool_path)
+
+        await _finish(job.id, UploadJobStatus.DONE)
+        _remove_spool(job.spool_path)
+    except Exception as e:
+        print(f"Upload job {job.id} attempt {job.attempts} failed: {e}")
+        if job.attempts < UPLOAD_MAX_ATTEMPTS:
+            await _finish(job.id, UploadJobStatus.QUEUED, str(e))
+            _retry_later(job.id, RETRY_BASE_DELAY * 2 ** (job.attempts - 1))
+        else:
+            await _fail_note(job, str(e))
+
+async def _fail_note(job: UploadJob, error: str):
+    # Out of retries: drop the placeholder note, keep the job row so the client sees why
+    async with SessionLocal() as db:
+        note = await db.get(Note, job.note_id)
+        if note is not None and note.status == NoteStatus.PROCESSING:
+            await search.remove_note(db, note.id)
+            await db.delete(note)
+            await db.commit()
+    await _finish(job.id, UploadJobStatus.FAILED, error)
+    _remove_spool(job.spool_path)
+    await _discard_unrecorded(job.storage_key)
+
+async def _discard_unrecorded(key: str):
+    # An attempt may have stored the file and then failed to commit. Without a
+    # stored_objects row no note points at it, and none can claim it (see dedup.py).
+    try:
+        storage = await get_storage()
+        async with SessionLocal() as db:
+            if await db.get(StoredObject, storage.get_url(key)) is not None:
+                return
+        await storage.delete(key)
+    except Exception as e:
+        print(f"Upload jobs: failed to remove unreferenced {key}: {e}")
+
+async def _worker(n: int):
+    while True:
+        job_id = await _queue.get()
+        try:
+            await process_job(job_id)
+        except Exception as e:
+            # Bookkeeping itself failed (DB down?); recovery on next start picks it up
+            print(f"Upload worker {n}: job {job_id} crashed: {e}")
+        finally:
+            _queue.task_done()
+
+async def _recover_jobs():
+    async with SessionLocal() as db:
+        # RUNNING for this long means the process that had it died mid-transfer
+        await db.execute(
+            update(UploadJob)
+            .where(UploadJob.status == UploadJobStatus.RUNNING, UploadJob.updated_at < datetime.utcnow() - STALE_RUNNING_AFTER)
+            .values(status=UploadJobStatus.QUEUED, updated_at=datetime.utcnow())
+        )
+        await db.commit()
+        result = await db.execute(
+            select(UploadJob.id).filter(UploadJob.status == UploadJobStatus.QUEUED).order_by(UploadJob.created_at)
+        )
+        job_ids = result.scalars().all()
+    for job_id in job_ids:
+        _queue.put_nowait(job_id)
+    if job_ids:
+        print(f"Upload jobs: recovered {len(job_ids)} unfinished job(s)")
+
+async def start_upload_workers():
+    global _queue
+    if _queue is not None:
+        return
+    spool_dir()
+    _queue = asyncio.Queue()
+    for n in range(UPLOAD_WORKERS):
+        _workers.append(asyncio.create_task(_worker(n)))
+    await _recover_jobs()
+
+async def stop_upload_workers():
+    global _queue
+    # In-flight jobs are abandoned as RUNNING and recovered once they go stale
+    for handle in _retry_handles:
+        handle.cancel()
+    _retry_handles.clear()
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
@@ -0,0 +1,76 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import HTTPException, UploadFile
+
+# Upload handling that never holds a whole file in memory:
+#  - the UploadFile is copied to a named temp file in fixed-size chunks, enforcing the size cap
+#    and hashing as it goes (SHA-256, used to dedupe identical files)
+#  - storage backends get the temp file *path* and stream it from disk: Supabase through the
+#    shared async httpx client on the event loop, local storage via a copy in a worker thread
+#  - a per-worker semaphore bounds concurrent storage transfers; excess uploads wait,
+#    and give up with 503 if no slot frees up in time
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+MAX_CONCURRENT_TRANSFERS = int(os.getenv("MAX_CONCURRENT_UPLOADS", "4"))
+TRANSFER_SLOT_TIMEOUT = 30  # seconds
+
+# Multipart framing + the other form fields; used for the early Content-Length check
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+_transfer_slots = asyncio.Semaphore(MAX_CONCURRENT_TRANSFERS)
+
+def too_large_error() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)",
+    )
+
+@asynccontextmanager
+async def spooled_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES, dir: Optional[str] = None):
+    """
+    Copy `file` to a temp file chunk by chunk and yield (path, size, sha256 hex digest).
+    Raises 413 as soon as the copy passes `max_bytes`. The temp file is removed on
+    exit unless the caller has moved it elsewhere (background jobs do, within `dir`).
+    """
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=".part", dir=dir)
+    try:
+        size = 0
+        digest = hashlib.sha256()
+
+        def _write(chunk):
+            # hashlib releases the GIL on big buffers, so hash in the same worker thread
+            digest.update(chunk)
+            out.write(chunk)
+
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise too_large_error()
+                # Disk writes off the event loop too
+                await asyncio.to_thread(_write, chunk)
+        yield path, size, digest.hexdigest()
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+@asynccontextmanager
+async def transfer_slot():
+    try:
+        await asyncio.wait_for(_transfer_slots.acquire(), timeout=TRANSFER_SLOT_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Too many uploads in progress, please retry shortly")
+    try:
+        yield
+    finally:
+        _transfer_slots.release()
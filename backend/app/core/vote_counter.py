@@ -0,0 +1,131 @@
+import asyncio
+import os
+from collections import defaultdict
+from typing import Optional
+from sqlalchemy import update, select, func, bindparam
+from .database import SessionLocal
+from .cache import bump_catalog_version
+from . import trending
+from ..models.models import Note, Vote
+
+# Optional write-behind for notes.vote_count (VOTE_WRITE_BEHIND=true).
+#
+# Normally vote_note bumps the counter in the same transaction as the vote row, so a
+# note that goes viral has every voter queueing on its row lock. In write-behind mode
+# the vote row is still committed per request, but the +/- delta only goes into an
+# in-memory tally that a background task applies every VOTE_FLUSH_MS, one UPDATE per
+# touched note in a single transaction. The counter is then up to one flush interval
+# behind (responses add the pending delta, so the voter sees their own click; a batch
+# being written still counts as pending until its transaction has committed).
+#
+# Deltas not yet flushed are lost if the process dies, so startup recomputes counts
+# from `votes` before the flusher starts. With several uvicorn workers, restart them
+# together: a worker that reconciles while another one still holds unflushed deltas
+# would see those votes counted twice (until the next restart).
+
+VOTE_WRITE_BEHIND = os.getenv("VOTE_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+VOTE_FLUSH_MS = int(os.getenv("VOTE_FLUSH_MS", "250"))
+
+_pending = defaultdict(int)  # note_id -> summed delta since the last flush
+_inflight = {}  # note_id -> delta of the batch being flushed, not committed yet
+_trending = defaultdict(float)  # note_id -> trending_score to add, valued when each vote happened
+_flusher: Optional[asyncio.Task] = None
+
+_notes = Note.__table__
+_APPLY = (
+    update(_notes)
+    .where(_notes.c.id == bindparam("b_note_id"))
+    .values(
+        vote_count=func.coalesce(_notes.c.vote_count, 0) + bindparam("b_delta"),
+        trending_score=func.coalesce(_notes.c.trending_score, 0.0) + bindparam("b_trending"),
+    )
+)
+
+def enabled() -> bool:
+    return _flusher is not None
+
+def add(note_id, delta: int):
+    """Record a committed vote's effect on the counter."""
+    if delta:
+        _pending[note_id] += delta
+        _trending[note_id] += trending.event_value(delta * trending.VOTE_WEIGHT)
+
+def pending(note_id) -> int:
+    return _pending.get(note_id, 0) + _inflight.get(note_id, 0)
+
+async def flush() -> int:
+    """Apply all pending deltas in one transaction. Returns the number of notes updated."""
+    global _pending, _trending, _inflight
+    batch, _pending = _pending, defaultdict(int)
+    trend, _trending = _trending, defaultdict(float)
+    # Fixed lock order, so two workers flushing the same notes can't deadlock
+    rows = [
+        {"b_note_id": note_id, "b_delta": batch.get(note_id, 0), "b_trending": trend.get(note_id, 0.0)}
+        for note_id in sorted(batch.keys() | trend.keys())
+    ]
+    if not rows:
+        return 0
+    _inflight = batch
+    try:
+        async with SessionLocal() as db:
+            await db.execute(_APPLY, rows)
+            await db.commit()
+    except BaseException:
+        # Put them back for the next flush (or the one on shutdown)
+        for row in rows:
+            _pending[row["b_note_id"]] += row["b_delta"]
+            _trending[row["b_note_id"]] += row["b_trending"]
+        raise
+    finally:
+        # Now either in the DB or back in _pending
+        _inflight = {}
+    bump_catalog_version()
+    return len(rows)
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(VOTE_FLUSH_MS / 1000)
+        try:
+            await flush()
+        except Exception as e:
+            print(f"Vote counter flush failed, will retry: {e}")
+
+async def reconcile_vote_counts() -> int:
+    """Recompute vote_count from `votes` wherever it drifted. Returns notes fixed."""
+    counted = (
+        select(func.coalesce(func.sum(Vote.vote_type), 0))
+        .where(Vote.note_id == Note.id)
+        .scalar_subquery()
+    )
+    async with SessionLocal() as db:
+        result = await db.execute(
+            update(Note)
+            .where(func.coalesce(Note.vote_count, 0) != counted)
+            .values(vote_count=counted)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    if result.rowcount:
+        bump_catalog_version()
+    return result.rowcount
+
+async def start_vote_counter():
+    global _flusher
+    if not VOTE_WRITE_BEHIND or _flusher is not None:
+        return
+    fixed = await reconcile_vote_counts()
+    if fixed:
+        print(f"Vote counter: reconciled vote_count on {fixed} notes")
+    _flusher = asyncio.create_task(_flush_loop())
+
+async def stop_vote_counter():
+    global _flusher
+    if _flusher is None:
+        return
+    _flusher.cancel()
+    await asyncio.gather(_flusher, return_exceptions=True)
+    _flusher = None
+    try:
+        await flush()
+    except Exception as e:
+        print(f"Vote counter: final flush failed, startup reconciliation will fix it: {e}")
@@ -13,6 +13,21 @@ app = FastAPI(
 from .core.database import engine, Base
 # Import models to ensure they are registered
 from .models import models 
+from .core.search import ensure_search_schema
+from .core.facets import ensure_facets
+from .core.leaderboard import ensure_leaderboard
+from .core.dedup import ensure_stored_objects
+from .core.uploads import MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD_BYTES, too_large_error
+from .core.storage import LOCAL_STORAGE_DIR, init_storage, close_storage
+from .core.upload_jobs import start_upload_workers, stop_upload_workers
+from .core.pdf_tools import stop_pdf_pool
+from .core.vote_counter import start_vote_counter, stop_vote_counter
+from .core.download_events import start_download_buffer, stop_download_buffer
+from .core.trending import start_trending, stop_trending
+from .core.cache import start_cache_sweeper, stop_cache_sweeper
+from .core.catalog import start_catalog_sync, stop_catalog_sync
+from .core.identity import start_identity_sync, stop_identity_sync
+from .core.subscriptions import start_subscription_expiry, stop_subscription_expiry
 
 @app.on_event("startup")
 async def startup_db_client():
@@ -26,9 +41,64 @@ async def startup_db_client():
         
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(ensure_search_schema)
+            await conn.run_sync(ensure_facets)
+            await conn.run_sync(ensure_leaderboard)
+            await conn.run_sync(ensure_stored_objects)
     except Exception as e:
         print(f"Startup DB Connection Failed: {e}")
 
+    try:
+        # One storage client (and connection pool) for the life of the worker
+        await init_storage()
+    except Exception as e:
+        print(f"Startup Storage Init Failed: {e}")
+
+    try:
+        await start_upload_workers()
+    except Exception as e:
+        print(f"Startup Upload Workers Failed: {e}")
+
+    try:
+        await start_vote_counter()
+    except Exception as e:
+        print(f"Startup Vote Counter Failed: {e}")
+
+    await start_download_buffer()
+
+    try:
+        await start_trending()
+    except Exception as e:
+        print(f"Startup Trending Failed: {e}")
+
+    start_cache_sweeper()
+    start_catalog_sync()
+    start_identity_sync()
+    start_subscription_expiry()
+
+@app.on_event("shutdown")
+async def shutdown_storage():
+    await stop_upload_workers()
+    await stop_vote_counter()
+    await stop_download_buffer()
+    await stop_trending()
+    await stop_cache_sweeper()
+    await stop_catalog_sync()
+    await stop_identity_sync()
+    await stop_subscription_expiry()
+    stop_pdf_pool()
+    await close_storage()
+
+# Reject oversized uploads from the Content-Length header, before the body is read at all
+# (registered before CORS so the 413 still carries CORS headers)
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    if request.method == "POST" and request.url.path.endswith("/notes/upload"):
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+            return JSONResponse(status_code=413, content={"detail": too_large_error().detail})
+    return await call_next(request)
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -58,10 +128,11 @@ async def global_exception_handler(request: Request, exc: Exception):
 from fastapi.staticfiles import StaticFiles
 import os
 
-if not os.path.exists("uploads"):
-    os.makedirs("uploads")
+# Served files for STORAGE_BACKEND=local
+if not os.path.exists(LOCAL_STORAGE_DIR):
+    os.makedirs(LOCAL_STORAGE_DIR)
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", StaticFiles(directory=LOCAL_STORAGE_DIR), name="uploads")
 
 @app.get("/debug-network")
 async def debug_network():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Integer, Text, Float
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Integer, Text, Float, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -11,10 +11,17 @@ class UserRole(str, enum.Enum):
     ADMIN = "ADMIN"
 
 class NoteStatus(str, enum.Enum):
+    PROCESSING = "PROCESSING" # Accepted, file still being stored by an upload job
     PENDING = "PENDING"
     APPROVED = "APPROVED"
     REJECTED = "REJECTED"
 
+class UploadJobStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
 class SubscriptionPlan(str, enum.Enum):
     MONTHLY = "MONTHLY"
     SEMESTER = "SEMESTER"
@@ -67,14 +74,112 @@ class Note(Base):
     category = Column(String, default=NoteCategory.NOTE)
     year = Column(Integer, nullable=True)
     vote_count = Column(Integer, default=0)
-    rating = Column(Float, default=0.0) # Average rating
+    rating = Column(Float, default=0.0) # rating_sum / rating_count, see app/core/ratings.py
     rating_count = Column(Integer, default=0)
+    rating_sum = Column(Integer, default=0)
+    download_count = Column(Integer, default=0) # Distinct users, kept by app/core/download_events.py
+    trending_score = Column(Float, default=0.0) # Time-decayed engagement, see app/core/trending.py
     created_at = Column(DateTime, default=datetime.utcnow)
+    approved_at = Column(DateTime, nullable=True) # When it last became approved; buckets the leaderboard
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    content_hash = Column(String(64), nullable=True, index=True) # SHA-256 of the file, for dedup
+    duplicate_of = Column(UUID(as_uuid=True), nullable=True) # Earlier note with the same file, flagged for admins
+    preview_url = Column(String, nullable=True) # First-page thumbnail, see app/core/previews.py
+    page_count = Column(Integer, nullable=True) # NULL = not processed yet, 0 = nothing to preview
     
     uploader = relationship("User", back_populates="notes")
     votes = relationship("Vote", back_populates="note", cascade="all, delete-orphan")
     reviews = relationship("Review", back_populates="note", cascade="all, delete-orphan")
     downloads = relationship("Download", back_populates="note", cascade="all, delete-orphan")
+    content = relationship("NoteContent", uselist=False, cascade="all, delete-orphan")
+
+    # Catalog listings always filter on status first, then optional facets, then sort.
+    # Each index ends with the sort key (+ id) so pages come straight off the index.
+    __table_args__ = (
+        Index("ix_notes_status_created", "status", "created_at", "id"),
+        Index("ix_notes_status_rating", "status", "rating", "vote_count", "id"),
+        Index("ix_notes_status_downloads", "status", "download_count", "id"),
+        Index("ix_notes_status_trending", "status", "trending_score", "id"),
+        Index("ix_notes_status_category_semester_created", "status", "category", "semester", "created_at", "id"),
+        Index("ix_notes_status_branch_semester_created", "status", "branch", "semester", "created_at", "id"),
+        Index("ix_notes_uploaded_by_created", "uploaded_by", "created_at"),
+        # Moderation queue is tiny compared to the catalog, keep its index tiny too
+        Index(
+            "ix_notes_pending_created", "created_at",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'"),
+        ),
+    )
+
+class UploadJob(Base):
+    # Background upload, see app/core/upload_jobs.py. Kept after completion as a record.
+    __tablename__ = "upload_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # No FK: the note may be deleted (e.g. by an admin) while its job is still queued
+    note_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    status = Column(String, nullable=False, default=UploadJobStatus.QUEUED)
+    target_status = Column(String, nullable=False) # Note status once the file is stored
+    spool_path = Column(String, nullable=False)
+    storage_key = Column(String, nullable=False)
+    content_type = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Startup recovery looks for unfinished jobs
+        Index("ix_upload_jobs_status_updated", "status", "updated_at"),
+    )
+
+class StoredObject(Base):
+    # One row per file in storage, counting the notes that point at it (app/core/dedup.py).
+    # Dedup takes a reference and delete drops one, each in the note write's transaction.
+    __tablename__ = "stored_objects"
+
+    file_url = Column(String, primary_key=True)
+    content_hash = Column(String(64), nullable=True)
+    refs = Column(Integer, nullable=False, default=1)
+
+class NoteContent(Base):
+    # Text extracted from the note's file (app/core/extraction.py), fed to the search index.
+    # Separate table so the catalog queries never drag the body along.
+    __tablename__ = "note_contents"
+
+    note_id = Column(UUID(as_uuid=True), ForeignKey("notes.id"), primary_key=True)
+    body = Column(Text, nullable=False, default="") # Normalized, truncated; "" if no text layer
+    extracted_at = Column(DateTime, default=datetime.utcnow, index=True) # max() is part of the search ETag
+
+class NoteFacet(Base):
+    # Approved-note counts per filter value, kept up to date by app/core/facets.py
+    __tablename__ = "note_facets"
+
+    dimension = Column(String, primary_key=True) # branch, semester, subject, category, year
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class LeaderboardEntry(Base):
+    # Approved notes per uploader, per time window and branch; kept by app/core/leaderboard.py
+    __tablename__ = "leaderboard"
+
+    period = Column(String, primary_key=True) # "all", "week:2026-W42", "month:2026-10", "semester:2026-odd"
+    branch = Column(String, primary_key=True) # "" = all branches
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Standings for one board are a backwards range scan, no sort
+        Index("ix_leaderboard_rank", "period", "branch", "count", "user_id"),
+    )
+
+class TrendingState(Base):
+    # Single row: the time trending scores are currently expressed relative to
+    __tablename__ = "trending_state"
+
+    id = Column(Integer, primary_key=True)
+    anchor = Column(DateTime, nullable=False)
 
 class Download(Base):
     __tablename__ = "downloads"
@@ -87,6 +192,14 @@ class Download(Base):
     user = relationship("User", back_populates="downloads")
     note = relationship("Note", back_populates="downloads")
 
+    __table_args__ = (
+        # One row per user per note; also the ON CONFLICT target in download_events.py
+        Index("ix_downloads_user_note", "user_id", "note_id", unique=True),
+        Index("ix_downloads_user_created", "user_id", "created_at"),
+        # Recent downloads for the trending re-normalization, index-only
+        Index("ix_downloads_created_note", "created_at", "note_id"),
+    )
+
 class Vote(Base):
     __tablename__ = "votes"
     
@@ -99,6 +212,15 @@ class Vote(Base):
     user = relationship("User")
     note = relationship("Note", back_populates="votes")
 
+    __table_args__ = (
+        # One vote per user per note; also the ON CONFLICT target in vote_note
+        Index("ix_votes_user_note", "user_id", "note_id", unique=True),
+        # Covers SUM(vote_type) per note for the vote_count reconciliation
+        Index("ix_votes_note_type", "note_id", "vote_type"),
+        # Recent votes for the trending re-normalization, index-only
+        Index("ix_votes_created_note", "created_at", "note_id", "vote_type"),
+    )
+
 class Review(Base):
     __tablename__ = "reviews"
     
@@ -112,6 +234,23 @@ class Review(Base):
     user = relationship("User")
     note = relationship("Note", back_populates="reviews")
 
+    __table_args__ = (
+        # One review per user per note; also the ON CONFLICT target in add_review
+        Index("ix_reviews_user_note", "user_id", "note_id", unique=True),
+        # Review pages for a note, newest first; ends with id so the cursor is a strict position
+        Index("ix_reviews_note_created", "note_id", "created_at", "id"),
+        # Recent reviews for the trending re-normalization, index-only
+        Index("ix_reviews_created_note", "created_at", "note_id", "rating"),
+    )
+
+class IdentityInvalidation(Base):
+    # Users whose cached identity (app/core/identity.py) went stale; every worker polls this
+    __tablename__ = "identity_invalidations"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    email = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
 class Subscription(Base):
     __tablename__ = "subscriptions"
     
@@ -26,3 +26,16 @@ class ReviewResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class ReviewPage(BaseModel):
+    items: List[ReviewResponse]
+    next_cursor: Optional[str] = None # Pass back as ?cursor= to get the next page
+
+class NoteStateRequest(BaseModel):
+    note_ids: List[UUID]
+
+class NoteUserState(BaseModel):
+    note_id: UUID
+    user_vote: int # 1, -1 or 0
+    reviewed: bool
+    downloaded: bool
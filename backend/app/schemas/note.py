@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from uuid import UUID
 from datetime import datetime
 
@@ -30,6 +30,10 @@ class NoteResponse(NoteBase):
     vote_count: int = 0
     rating: float = 0.0
     rating_count: int = 0
+    download_count: int = 0
+    duplicate_of: Optional[UUID] = None # Same file as this earlier note (admin hint)
+    preview_url: Optional[str] = None # Low-res first page image, when available
+    page_count: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -37,3 +41,28 @@ class NoteResponse(NoteBase):
 class NoteList(BaseModel):
     items: List[NoteResponse]
     total: int
+
+class NotePage(BaseModel):
+    items: List[NoteResponse]
+    next_cursor: Optional[str] = None # Pass back as ?cursor= to get the next page
+
+class NoteFacets(BaseModel):
+    # value -> number of approved notes, e.g. {"CSE": 120, "ECE": 80}
+    branch: Dict[str, int] = {}
+    semester: Dict[str, int] = {}
+    subject: Dict[str, int] = {}
+    category: Dict[str, int] = {}
+    year: Dict[str, int] = {}
+
+class UploadJobResponse(BaseModel):
+    id: UUID
+    note_id: UUID
+    status: str # QUEUED, RUNNING, DONE or FAILED
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    note: Optional[NoteResponse] = None # Set once the job is DONE
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,29 @@
+"""
+Generate first-page previews and page counts for notes that don't have them yet.
+
+Safe to stop and rerun: only notes with page_count IS NULL are picked up, and each
+note is committed as soon as its preview is stored. Notes that fail stay NULL and
+are retried on the next run.
+
+Usage: python scripts/backfill_previews.py [concurrency]
+"""
+import asyncio
+import sys
+import os
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from app.core.backfill import backfill_notes
+from app.core.pdf_tools import PDF_WORKERS
+from app.core.previews import preview_note
+from app.models.models import Note
+
+def pending():
+    return select(Note.id).filter(Note.page_count.is_(None), Note.file_url != "")
+
+if __name__ == "__main__":
+    # Default keeps every pool process busy while the next files download
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else PDF_WORKERS * 2
+    asyncio.run(backfill_notes(pending(), preview_note, concurrency, "previews"))
@@ -0,0 +1,33 @@
+"""
+Extract text from existing notes' files into note_contents and the search index.
+
+Safe to stop and rerun: only notes without a note_contents row are picked up, and
+each note is committed as soon as it is extracted. Notes that fail (download
+errors etc.) have no row and are retried on the next run.
+
+Usage: python scripts/backfill_text.py [concurrency]
+"""
+import asyncio
+import sys
+import os
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from app.core.backfill import backfill_notes
+from app.core.pdf_tools import PDF_WORKERS
+from app.core.extraction import extract_note
+from app.models.models import Note, NoteContent
+
+def pending():
+    return (
+        select(Note.id)
+        .outerjoin(NoteContent, NoteContent.note_id == Note.id)
+        .filter(NoteContent.note_id.is_(None), Note.file_url != "")
+    )
+
+if __name__ == "__main__":
+    # Default keeps every pool process busy while the next files download
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else PDF_WORKERS * 2
+    asyncio.run(backfill_notes(pending(), extract_note, concurrency, "extracted"))
@@ -0,0 +1,122 @@
+"""
+Benchmark: authenticated requests/sec on GET /auth/me when every request is a token
+cache miss, verifying with Supabase (AUTH_VERIFY_MODE=remote) vs locally
+(app/core/supabase_auth.py).
+
+Tokens come from a local issuer signing HS256 with a throwaway secret, the way
+Supabase does for legacy projects. "Supabase" is a stub HTTP server on localhost
+that answers /auth/v1/user after `latency_ms`, so the remote mode goes through the
+real supabase client. Every request uses a fresh token, so TOKEN_CACHE never hits.
+
+Runs against a throwaway SQLite file.
+
+Usage: python scripts/bench_auth.py [requests] [concurrency] [latency_ms]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECRET = "bench-secret-" + uuid.uuid4().hex
+LATENCY_MS = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+class StubSupabase(BaseHTTPRequestHandler):
+    def do_GET(self):
+        from jose import jwt
+        time.sleep(LATENCY_MS / 1000)
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        claims = jwt.decode(token, SECRET, algorithms=["HS256"], audience="authenticated")
+        body = json.dumps({
+            "id": claims["sub"], "aud": "authenticated", "role": "authenticated", "email": claims["email"],
+            "app_metadata": {}, "user_metadata": {}, "created_at": "2024-01-01T00:00:00Z",
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StubSupabase)
+server.daemon_threads = True
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_auth.db")
+os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+os.environ["SUPABASE_KEY"] = "bench-anon-key"
+os.environ["SUPABASE_JWT_SECRET"] = SECRET
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from jose import jwt
+from sqlalchemy import insert
+from app.core.database import engine, Base
+from app.core import supabase_auth
+from app.api.deps import TOKEN_CACHE
+from app.models.models import User
+from app.main import app
+
+USERS = 50
+
+def issue_token(i: int) -> str:
+    now = int(time.time())
+    return jwt.encode(
+        {
+            "sub": str(uuid.UUID(int=i + 1)), "email": f"bench-auth-{i}@example.com", "aud": "authenticated",
+            "role": "authenticated", "iat": now, "exp": now + 3600, "jti": uuid.uuid4().hex,
+        },
+        SECRET,
+        algorithm="HS256",
+    )
+
+async def run(label: str, mode: str, requests: int, concurrency: int):
+    supabase_auth.AUTH_VERIFY_MODE = mode
+    TOKEN_CACHE.clear()
+    tokens = [issue_token(i % USERS) for i in range(requests)]  # jti makes each one unique
+    queue = asyncio.Queue()
+    for token in tokens:
+        queue.put_nowait(token)
+    failures = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            nonlocal failures
+            while not queue.empty():
+                token = queue.get_nowait()
+                response = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+                if response.status_code != 200:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    print(f"{label:<8} {requests} requests in {elapsed:.2f}s -> {requests / elapsed:8.1f} req/s, {failures} failed")
+
+async def main(requests: int, concurrency: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {"id": uuid.uuid4(), "email": f"bench-auth-{i}@example.com", "hashed_password": "x", "full_name": f"User {i}"}
+            for i in range(USERS)
+        ])
+
+    print(f"{requests} requests, concurrency {concurrency}, stub Supabase latency {LATENCY_MS}ms, every request a cache miss")
+    await run("remote", "remote", requests, concurrency)
+    await run("local", "local", requests, concurrency)
+    await engine.dispose()
+    server.shutdown()
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(requests, concurrency))
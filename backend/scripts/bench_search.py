@@ -0,0 +1,141 @@
+"""
+Benchmark: substring ILIKE vs the full-text index for the notes catalog search.
+
+Seeds a scratch database with N notes (default 200k) and times the query that
+GET /notes/ runs for a handful of typical searches, reporting p50/p99 in ms.
+
+Usage: python scripts/bench_search.py [num_notes] [runs_per_query]
+Set DATABASE_URL to benchmark against Postgres instead of the scratch SQLite file.
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./bench_search.db")
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, insert, delete
+from app.core.database import engine, Base, SessionLocal
+from app.core import search
+from app.models.models import Note, NoteStatus, NoteCategory
+
+BRANCHES = ["CSE", "IT", "ECE", "EE", "ME", "CE"]
+SUBJECTS = [
+    f"{area} {topic}"
+    for area in ["Engineering", "Applied", "Advanced", "Introduction to", "Fundamentals of", "Principles of"]
+    for topic in [
+        "Mathematics", "Physics", "Chemistry", "Mechanics", "Data Structures", "Algorithms",
+        "Operating Systems", "Computer Networks", "Thermodynamics", "Digital Electronics",
+        "Database Systems", "Automata Theory", "Machine Learning", "Software Engineering",
+        "Fluid Mechanics", "Signals and Systems", "Control Systems", "Power Systems",
+        "Microprocessors", "Compiler Design", "Computer Graphics", "Cryptography",
+        "Surveying", "Structural Analysis", "Heat Transfer", "Manufacturing Processes",
+        "Engineering Drawing", "Environmental Studies", "Economics", "Soft Skills",
+    ]
+]
+WORDS = ["unit", "notes", "final", "complete", "handwritten", "short", "important", "questions", "solved", "revision"]
+
+def subject_code(branch: str, semester: int, number: int) -> str:
+    # AKTU-style, e.g. KCSE301; the seeded subjects start with one of these
+    return f"K{branch}{semester}{number:02d}"
+
+# Broad queries hit a few % of the catalog; narrow ones are subject codes (~0.05% each)
+BROAD_QUERIES = ["operating", "data structures", "compiler", "machine learning", "fluid", "cryptography"]
+NARROW_QUERIES = [
+    subject_code("CSE", 3, 1), subject_code("ECE", 5, 12), subject_code("ME", 4, 5),
+    subject_code("IT", 6, 18), subject_code("EE", 2, 3), subject_code("CE", 7, 34),
+]
+
+async def seed(num_notes: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(search.ensure_search_schema)
+        await conn.execute(delete(Note))
+
+    random.seed(42)
+    start = datetime.utcnow() - timedelta(days=365)
+    batch = []
+    async with engine.begin() as conn:
+        for i in range(num_notes):
+            batch.append({
+                "id": uuid.uuid4(),
+                "title": f"{random.choice(SUBJECTS)} {' '.join(random.sample(WORDS, 2))} {i}",
+                "file_url": f"seed/{i}.pdf",
+                "status": NoteStatus.APPROVED if i % 10 else NoteStatus.PENDING,
+                "branch": random.choice(BRANCHES),
+                "semester": random.randint(1, 8),
+                "subject": f"{subject_code(random.choice(BRANCHES), random.randint(1, 8), random.randint(1, 40))} {random.choice(SUBJECTS)}",
+                "category": random.choice(list(NoteCategory)).value,
+                "created_at": start + timedelta(seconds=i * 60),
+                "vote_count": 0,
+                "rating": 0.0,
+            })
+            if len(batch) == 5000:
+                await conn.execute(insert(Note), batch)
+                batch = []
+        if batch:
+            await conn.execute(insert(Note), batch)
+        await conn.run_sync(search.rebuild_search_index)
+
+def ilike_query(q: str):
+    return (
+        select(Note)
+        .filter(Note.status == NoteStatus.APPROVED)
+        .filter(Note.subject.ilike(f"%{q}%"))
+        .order_by(Note.created_at.desc(), Note.id.desc())
+        .limit(21)
+    )
+
+def fts_query(q: str):
+    hits = search.match_subquery(q)
+    return (
+        select(Note, hits.c.score, Note.id)
+        .join(hits, hits.c.note_id == Note.id)
+        .filter(Note.status == NoteStatus.APPROVED)
+        .order_by(hits.c.score.desc(), Note.id.desc())
+        .limit(21)
+    )
+
+async def time_path(name: str, build, queries, runs: int):
+    timings = []
+    empty = []
+    async with SessionLocal() as db:
+        for q in queries:
+            if not (await db.execute(build(q))).all():  # warm up
+                empty.append(q)
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                result = await db.execute(build(q))
+                result.all()
+                timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    p50 = statistics.median(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{name:<8} p50={p50:8.2f} ms   p99={p99:8.2f} ms   ({len(timings)} queries)")
+    if empty:
+        # Empty lookups are cheap for an index and would flatter it
+        print(f"         no results for: {', '.join(empty)}")
+
+async def main(num_notes: int, runs: int):
+    print(f"Seeding {num_notes} notes...")
+    t0 = time.perf_counter()
+    await seed(num_notes)
+    print(f"Seeded in {time.perf_counter() - t0:.1f}s")
+
+    for label, queries in [("broad", BROAD_QUERIES), ("narrow", NARROW_QUERIES)]:
+        print(f"-- {label}: {', '.join(queries)}")
+        await time_path("ILIKE", ilike_query, queries, runs)
+        await time_path("FTS", fts_query, queries, runs)
+    await engine.dispose()
+
+if __name__ == "__main__":
+    num_notes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(num_notes, runs))
@@ -0,0 +1,115 @@
+"""
+Microbenchmark: per-row CPU cost of building a GET /notes/ page.
+
+Compares the old path (full ORM Note objects -> dict per row -> NoteResponse
+validation -> JSON) with the projection path (column tuples with SQL-side premium
+masking -> dict -> orjson bytes). Runs against an in-memory SQLite database.
+
+Usage: python scripts/bench_serialization.py [page_size] [iterations]
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+from sqlalchemy import select, insert
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.core.serialization import dumps, note_columns, note_rows_to_dicts
+from app.models.models import Note, NoteStatus
+from app.schemas.note import NoteResponse
+
+# One shared in-memory connection so every session sees the seeded rows
+engine = create_async_engine(
+    "sqlite+aiosqlite:///:memory:", poolclass=StaticPool, connect_args={"check_same_thread": False}
+)
+Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+NOTE_LIST = TypeAdapter(List[NoteResponse])
+
+async def seed(num_notes: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        start = datetime.utcnow()
+        await conn.execute(insert(Note), [
+            {
+                "id": uuid.uuid4(),
+                "title": f"Operating Systems unit {i % 5} notes",
+                "file_url": f"https://example.supabase.co/storage/v1/object/public/notes/{uuid.uuid4()}.pdf",
+                "uploaded_by": uuid.uuid4(),
+                "status": NoteStatus.APPROVED,
+                "branch": "CSE",
+                "semester": 4,
+                "subject": "Operating Systems",
+                "is_premium": i % 3 == 0,
+                "category": "NOTE",
+                "created_at": start - timedelta(minutes=i),
+                "vote_count": i % 7,
+                "rating": 4.5,
+                "rating_count": 2,
+            }
+            for i in range(num_notes)
+        ])
+
+async def orm_page(db, limit):
+    result = await db.execute(
+        select(Note).filter(Note.status == NoteStatus.APPROVED)
+        .order_by(Note.created_at.desc()).limit(limit)
+    )
+    final_notes = []
+    for note in result.scalars().all():
+        note_dict = {
+            "id": note.id, "title": note.title, "university": note.university,
+            "branch": note.branch, "semester": note.semester, "subject": note.subject,
+            "is_premium": note.is_premium, "uploaded_by": note.uploaded_by,
+            "status": note.status, "created_at": note.created_at, "category": note.category,
+            "year": note.year, "vote_count": note.vote_count or 0, "rating": note.rating or 0.0,
+            "rating_count": note.rating_count or 0, "file_url": note.file_url,
+        }
+        if note.is_premium:
+            note_dict["file_url"] = "LOCKED"
+        final_notes.append(note_dict)
+    # What FastAPI does with response_model=List[NoteResponse]
+    return NOTE_LIST.dump_json(NOTE_LIST.validate_python(final_notes))
+
+async def projected_page(db, limit):
+    result = await db.execute(
+        select(*note_columns(lock_premium=True)).filter(Note.status == NoteStatus.APPROVED)
+        .order_by(Note.created_at.desc()).limit(limit)
+    )
+    return dumps(note_rows_to_dicts(result.all()))
+
+async def measure(name, build, limit, iterations):
+    async with Session() as db:
+        await build(db, limit)  # warm up
+        t0 = time.process_time()
+        for _ in range(iterations):
+            body = await build(db, limit)
+            db.expunge_all()  # don't let the identity map hand back cached objects
+        cpu = time.process_time() - t0
+    per_row_us = cpu / (iterations * limit) * 1e6
+    print(f"{name:<10} {per_row_us:8.2f} us CPU/row   {len(body)} bytes/page")
+    return per_row_us
+
+async def main(limit, iterations):
+    await seed(limit)
+    orm = await measure("ORM", orm_page, limit, iterations)
+    fast = await measure("projected", projected_page, limit, iterations)
+    print(f"speedup    {orm / fast:8.2f}x")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(limit, iterations))
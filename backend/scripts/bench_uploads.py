@@ -0,0 +1,108 @@
+"""
+Benchmark: peak RSS, throughput and event-loop stalls for concurrent note uploads.
+
+Compares the old upload_note I/O (await file.read() + blocking storage call on the
+event loop) with the shipped path (chunked spool + StorageBackend.put, bounded by
+transfer slots). Both write to local disk, throttled to the same fixed bandwidth:
+the old mode through a blocking stand-in for the old Supabase upload() call, the new
+one through app.core.storage.LocalStorage, waiting out the bandwidth without blocking
+the loop the way the pooled async Supabase client waits on the network. Each mode
+runs in its own process so peak RSS is measured independently.
+
+Usage: python scripts/bench_uploads.py [concurrent_uploads] [file_mb]
+"""
+import asyncio
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.datastructures import UploadFile, Headers
+from app.core.storage import LocalStorage
+from app.core.uploads import spooled_upload, transfer_slot
+
+STANDIN_BANDWIDTH = 200 * 1024 * 1024  # bytes/s, roughly a fast link to storage
+CHUNK = 1024 * 1024
+
+class OldStorageStandIn:
+    """Takes the whole file as bytes and blocks while it "uploads", like the old sync client."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def upload(self, path, file, file_options=None):
+        dest = os.path.join(self.root, path.replace("/", "_"))
+        with open(dest, "wb") as out:
+            for start in range(0, len(file), CHUNK):
+                out.write(file[start:start + CHUNK])
+                time.sleep(CHUNK / STANDIN_BANDWIDTH)
+
+class ThrottledLocalStorage(LocalStorage):
+    """The shipped LocalStorage, plus a non-blocking wait for the link's bandwidth."""
+
+    async def put(self, key, path, content_type=None):
+        await asyncio.sleep(os.path.getsize(path) / STANDIN_BANDWIDTH)
+        await super().put(key, path, content_type)
+
+def make_upload(size_mb):
+    spool = tempfile.SpooledTemporaryFile(max_size=CHUNK)
+    block = os.urandom(CHUNK)
+    for _ in range(size_mb):
+        spool.write(block)
+    spool.seek(0)
+    return UploadFile(file=spool, filename="paper.pdf", headers=Headers({"content-type": "application/pdf"}))
+
+async def old_io(storage, upload, n):
+    content = await upload.read()
+    storage.upload(f"user/{n}.pdf", content, {"content-type": upload.content_type})
+
+async def new_io(storage, upload, n):
+    async with spooled_upload(upload, max_bytes=1 << 40) as (spool_path, size, sha256):
+        async with transfer_slot():
+            await storage.put(f"user/{n}.pdf", spool_path, upload.content_type)
+
+async def loop_lag_probe(stop, lags):
+    # How late does a 10 ms timer fire? Big numbers mean the loop was blocked.
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - t0 - 0.01)
+
+async def run_mode(mode, concurrent, size_mb):
+    root = tempfile.mkdtemp(prefix="bench-storage-")
+    storage = OldStorageStandIn(root) if mode == "old" else ThrottledLocalStorage(root, "http://bench/uploads")
+    uploads = [make_upload(size_mb) for _ in range(concurrent)]
+    handler = old_io if mode == "old" else new_io
+
+    stop, lags = asyncio.Event(), []
+    probe = asyncio.create_task(loop_lag_probe(stop, lags))
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    await asyncio.gather(*(handler(storage, upload, n) for n, upload in enumerate(uploads)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await probe
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    shutil.rmtree(root, ignore_errors=True)
+
+    total_mb = concurrent * size_mb
+    print(
+        f"{mode:<4} {total_mb / elapsed:8.1f} MB/s   peak RSS {peak_rss / 1024:7.1f} MB "
+        f"(+{(peak_rss - baseline_rss) / 1024:.1f} during uploads)   max loop stall {max(lags or [0]) * 1000:7.1f} ms"
+    )
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        asyncio.run(run_mode(sys.argv[2], int(sys.argv[3]), int(sys.argv[4])))
+    else:
+        concurrent = sys.argv[1] if len(sys.argv) > 1 else "8"
+        size_mb = sys.argv[2] if len(sys.argv) > 2 else "50"
+        print(f"{concurrent} concurrent uploads of {size_mb} MB")
+        for mode in ("old", "new"):
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--mode", mode, concurrent, size_mb], check=True)
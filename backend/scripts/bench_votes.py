@@ -0,0 +1,100 @@
+"""
+Benchmark: votes/sec on a single hot note, with and without the write-behind
+vote counter (app/core/vote_counter.py).
+
+For each mode, creates one note and N users and has every user upvote it,
+`concurrency` requests at a time, through the vote_note endpoint function.
+After the run (and a final flush) vote_count must equal SUM(votes).
+Test rows are removed at the end.
+
+Runs against DATABASE_URL, or a throwaway SQLite file if it isn't set. The row
+lock contention this is about is a Postgres thing; on SQLite every write takes
+the database lock, so expect a smaller gap there.
+
+Usage: python scripts/bench_votes.py [votes] [concurrency]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_votes.db")
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func, delete, insert
+from app.core.database import engine, Base, SessionLocal
+from app.core import vote_counter
+from app.models.models import Note, User, Vote, NoteStatus
+from app.schemas.interaction import VoteCreate
+from app.api.notes import vote_note
+
+async def run(label: str, votes: int, concurrency: int, write_behind: bool):
+    tag = uuid.uuid4().hex[:8]
+    user_rows = [
+        {"id": uuid.uuid4(), "email": f"bench-vote-{tag}-{i}@example.com", "hashed_password": "x", "full_name": f"Voter {i}"}
+        for i in range(votes)
+    ]
+    note = Note(
+        title=f"hot note {tag}", file_url="", branch="CSE", semester=1, subject="Bench",
+        status=NoteStatus.APPROVED, vote_count=0,
+    )
+    async with SessionLocal() as session:
+        session.add(note)
+        await session.execute(insert(User), user_rows)
+        await session.commit()
+        users = (await session.execute(select(User).filter(User.id.in_([u["id"] for u in user_rows])))).scalars().all()
+
+    if write_behind:
+        vote_counter.VOTE_WRITE_BEHIND = True
+        await vote_counter.start_vote_counter()
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def cast(user):
+        async with slots:
+            async with SessionLocal() as session:
+                await vote_note(note.id, VoteCreate(vote_type=1), db=session, current_user=user)
+
+    try:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(cast(user) for user in users))
+        elapsed = time.perf_counter() - t0
+        if write_behind:
+            await vote_counter.stop_vote_counter()
+            vote_counter.VOTE_WRITE_BEHIND = False
+
+        async with SessionLocal() as session:
+            vote_count = (await session.execute(select(Note.vote_count).filter(Note.id == note.id))).scalar()
+            vote_sum = (await session.execute(
+                select(func.coalesce(func.sum(Vote.vote_type), 0)).filter(Vote.note_id == note.id)
+            )).scalar()
+        ok = vote_count == vote_sum == votes
+        print(f"{label:<14} {votes / elapsed:8.0f} votes/s   ({votes} votes in {elapsed:.2f}s, "
+              f"vote_count={vote_count}, sum(votes)={vote_sum}) {'OK' if ok else 'MISMATCH'}")
+        return ok
+    finally:
+        async with SessionLocal() as session:
+            await session.execute(delete(Vote).where(Vote.note_id == note.id))
+            await session.execute(delete(Note).where(Note.id == note.id))
+            await session.execute(delete(User).where(User.id.in_([u["id"] for u in user_rows])))
+            await session.commit()
+
+async def main(votes: int, concurrency: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    print(f"{votes} upvotes on one note, {concurrency} concurrent, flush every {vote_counter.VOTE_FLUSH_MS} ms")
+    ok = await run("direct", votes, concurrency, write_behind=False)
+    ok = await run("write-behind", votes, concurrency, write_behind=True) and ok
+    await engine.dispose()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    votes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(main(votes, concurrency))
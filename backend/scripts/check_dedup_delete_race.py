@@ -0,0 +1,150 @@
+"""
+Check that deleting a note never removes a stored file a duplicate upload is about
+to share (app/core/dedup.py).
+
+1. Interleaved: a duplicate upload claims the original's object and holds its
+   transaction open while an admin deletes the original. The delete must wait for
+   the upload, see the new reference and keep the file.
+2. Stress: `rounds` times, upload a file, then delete it while the same bytes are
+   uploaded again, with random jitter on both sides.
+
+Afterwards every note's file must exist in storage and stored_objects.refs must
+match the notes pointing at each file. Test rows and files are removed at the end.
+
+Runs against DATABASE_URL, or a throwaway SQLite file if it isn't set, with local
+storage in a temp dir.
+
+Usage: python scripts/check_dedup_delete_race.py [rounds]
+"""
+import asyncio
+import hashlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import uuid
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "dedup_check.db")
+STORAGE_ROOT = tempfile.mkdtemp(prefix="dedup-check-")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_DIR"] = STORAGE_ROOT
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+from sqlalchemy import select, delete
+from app.core.database import engine, Base, SessionLocal
+from app.core.search import ensure_search_schema
+from app.core import dedup
+from app.core.identity import UserSnapshot
+from app.core.storage import get_storage, close_storage
+from app.models.models import Note, User, StoredObject, NoteStatus, UserRole
+from app.api.notes import upload_note, delete_note
+
+def upload_file(content: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename="check.txt", headers=Headers({"content-type": "text/plain"}))
+
+async def upload(user, storage, content: bytes):
+    async with SessionLocal() as session:
+        note = await upload_note(
+            title="dedup check", branch="CSE", semester=1, subject="Check", category="NOTE", year=None,
+            file=upload_file(content), is_premium=False, background=False,
+            db=session, user=user, storage=storage,
+        )
+        return note.id
+
+async def remove(user, storage, note_id):
+    async with SessionLocal() as session:
+        await delete_note(note_id, db=session, admin=user, storage=storage)
+
+async def interleaved(user, storage) -> bool:
+    content = f"interleaved {uuid.uuid4()}".encode()
+    original_id = await upload(user, storage, content)
+
+    # The duplicate upload's transaction, stopped right after it claimed the object
+    async with SessionLocal() as session:
+        original = await dedup.claim_stored_copy(session, hashlib.sha256(content).hexdigest(), storage)
+        assert original is not None and original.id == original_id, "duplicate upload found no stored copy"
+        duplicate = Note(title="dedup check copy", file_url="", uploaded_by=user.id, branch="CSE", semester=1,
+                         subject="Check", status=NoteStatus.APPROVED, content_hash=original.content_hash)
+        dedup.mark_duplicate(duplicate, original)
+        session.add(duplicate)
+
+        deleting = asyncio.create_task(remove(user, storage, original_id))
+        await asyncio.sleep(0.5)  # The delete is now waiting on the claimed row
+        await session.commit()
+        duplicate_url = duplicate.file_url
+    await deleting
+
+    kept = os.path.exists(storage._path(storage.key_for_url(duplicate_url)))
+    print(f"Interleaved: delete during a duplicate upload {'kept' if kept else 'REMOVED'} the shared file")
+    return kept
+
+async def stress_round(user, storage):
+    content = f"stress {uuid.uuid4()}".encode()
+    original_id = await upload(user, storage, content)
+
+    async def jittered(coro):
+        await asyncio.sleep(random.random() * 0.02)
+        return await coro
+
+    await asyncio.gather(
+        jittered(remove(user, storage, original_id)),
+        jittered(upload(user, storage, content)),
+    )
+
+async def main(rounds: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(ensure_search_schema)
+
+    storage = await get_storage()  # Same backend the post-upload processing uses
+    async with SessionLocal() as session:
+        admin = User(email=f"dedup-check-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x", role=UserRole.ADMIN)
+        session.add(admin)
+        await session.commit()
+        user = UserSnapshot(id=admin.id, email=admin.email, role=admin.role, is_premium=False)
+
+    ok = await interleaved(user, storage)
+    for _ in range(rounds):
+        await stress_round(user, storage)
+
+    async with SessionLocal() as session:
+        rows = (await session.execute(
+            select(Note.id, Note.file_url).filter(Note.uploaded_by == user.id, Note.file_url != "")
+        )).all()
+        notes = [url for _, url in rows]
+        missing = [url for url in notes if not os.path.exists(storage._path(storage.key_for_url(url)))]
+        counts = {}
+        for url in notes:
+            counts[url] = counts.get(url, 0) + 1
+        refs = dict((await session.execute(
+            select(StoredObject.file_url, StoredObject.refs).filter(StoredObject.file_url.in_(counts))
+        )).all())
+        drift = {url: (refs.get(url), n) for url, n in counts.items() if refs.get(url) != n}
+
+        print(f"Stress: {rounds} rounds, {len(notes)} notes left, {len(missing)} pointing at missing files, {len(drift)} refcounts off")
+        ok = ok and not missing and not drift
+
+    # Clean up through the endpoint, so search/facets/leaderboard rows go too
+    for note_id, _ in rows:
+        await remove(user, storage, note_id)
+    async with SessionLocal() as session:
+        await session.execute(delete(User).where(User.id == user.id))
+        await session.commit()
+    await close_storage()
+    shutil.rmtree(STORAGE_ROOT, ignore_errors=True)
+    await engine.dispose()
+
+    print("OK" if ok else "FAILED")
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    asyncio.run(main(rounds))
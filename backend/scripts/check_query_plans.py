@@ -0,0 +1,145 @@
+"""
+Assert that every hot query in notes.py, auth.py, trending.py and deps.py is served by an index.
+
+Runs EXPLAIN for each query against DATABASE_URL (creating tables/indexes if missing)
+and fails if a table is scanned without an index or a listing needs an extra sort.
+On Postgres sequential scans are disabled for the session so the check reports
+whether an index *can* serve the query, independent of table size.
+
+Usage: python scripts/check_query_plans.py
+"""
+import asyncio
+import sys
+import os
+import uuid
+from datetime import datetime
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, tuple_, literal, text
+from app.core.database import engine, Base
+from app.models.models import Note, NoteStatus, User, Vote, Review, Download, LeaderboardEntry
+
+IS_SQLITE = engine.dialect.name == "sqlite"
+
+SOME_ID = uuid.uuid4()
+SOME_TIME = datetime(2026, 1, 1)
+
+def listing(*filters, order):
+    return select(Note).filter(Note.status == NoteStatus.APPROVED, *filters).order_by(*order).limit(21)
+
+def review_page(*filters):
+    return (
+        select(Review.id, Review.rating, Review.comment, Review.created_at, User.full_name)
+        .outerjoin(User, User.id == Review.user_id)
+        .filter(Review.note_id == SOME_ID, *filters)
+        .order_by(Review.created_at.desc(), Review.id.desc())
+        .limit(21)
+    )
+
+NEWEST = [Note.created_at.desc(), Note.id.desc()]
+RATING = [Note.rating.desc(), Note.vote_count.desc(), Note.id.desc()]
+DOWNLOADS = [Note.download_count.desc(), Note.id.desc()]
+TRENDING = [Note.trending_score.desc(), Note.id.desc()]
+
+# (name, statement, must_avoid_sort)
+HOT_QUERIES = [
+    # notes.py
+    ("list_notes newest", listing(order=NEWEST), True),
+    ("list_notes newest, next page",
+     listing(tuple_(Note.created_at, Note.id) < (SOME_TIME, SOME_ID), order=NEWEST), True),
+    ("list_notes rating", listing(order=RATING), True),
+    ("list_notes rating, next page",
+     listing(tuple_(Note.rating, Note.vote_count, Note.id) < (1.0, 1, SOME_ID), order=RATING), True),
+    ("list_notes downloads", listing(order=DOWNLOADS), True),
+    ("list_notes trending", listing(order=TRENDING), True),
+    ("list_notes trending, next page",
+     listing(tuple_(Note.trending_score, Note.id) < (1.0, SOME_ID), order=TRENDING), True),
+    ("list_notes category", listing(Note.category == "NOTE", order=NEWEST), True),
+    ("list_notes category+semester",
+     listing(Note.category == "UNIVERSITY_PAPER", Note.semester == 3, order=NEWEST), True),
+    ("list_notes branch+semester", listing(Note.branch == "CSE", Note.semester == 3, order=NEWEST), True),
+    ("note by id", select(Note).filter(Note.id == SOME_ID), False),
+    ("vote lookup", select(Vote).filter(Vote.user_id == SOME_ID, Vote.note_id == SOME_ID), False),
+    ("review lookup", select(Review).filter(Review.user_id == SOME_ID, Review.note_id == SOME_ID), False),
+    ("list_reviews", review_page(), True),
+    ("list_reviews, next page",
+     review_page(tuple_(Review.created_at, Review.id) < (SOME_TIME, SOME_ID)), True),
+    ("download lookup",
+     select(Download).filter(Download.user_id == SOME_ID, Download.note_id == SOME_ID), False),
+    ("leaderboard",
+     select(User.full_name, LeaderboardEntry.count).select_from(LeaderboardEntry)
+     .outerjoin(User, User.id == LeaderboardEntry.user_id)
+     .filter(LeaderboardEntry.period == "all", LeaderboardEntry.branch == "", LeaderboardEntry.count > 0)
+     .order_by(LeaderboardEntry.count.desc(), LeaderboardEntry.user_id.desc()).limit(10), True),
+    ("list_pending_notes",
+     select(Note).filter(Note.status == literal(NoteStatus.PENDING.value, literal_execute=True)), False),
+    # auth.py
+    ("login / register by email", select(User).filter(User.email == "someone@example.com"), False),
+    ("get_my_uploads",
+     select(Note).filter(Note.uploaded_by == SOME_ID).order_by(Note.created_at.desc()), True),
+    ("get_my_downloads",
+     select(Note).join(Download, Download.note_id == Note.id)
+     .filter(Download.user_id == SOME_ID).order_by(Download.created_at.desc()), True),
+    # trending.py re-normalization: recent events of each kind
+    ("trending recent votes",
+     select(Vote.note_id, Vote.vote_type, Vote.created_at).filter(Vote.created_at >= SOME_TIME), False),
+    ("trending recent reviews",
+     select(Review.note_id, Review.rating, Review.created_at).filter(Review.created_at >= SOME_TIME), False),
+    ("trending recent downloads",
+     select(Download.note_id, Download.created_at).filter(Download.created_at >= SOME_TIME), False),
+    # deps.py
+    ("get_current_user by email", select(User).filter(User.email == "someone@example.com"), False),
+]
+
+def plan_problems(plan_lines, must_avoid_sort):
+    problems = []
+    for line in plan_lines:
+        if IS_SQLITE:
+            if line.startswith("SCAN ") and "INDEX" not in line:
+                problems.append(line)
+            if must_avoid_sort and "USE TEMP B-TREE FOR ORDER BY" in line:
+                problems.append(line)
+        else:
+            if "Seq Scan" in line:
+                problems.append(line.strip())
+            if must_avoid_sort and line.strip().startswith(("Sort ", "Incremental Sort")):
+                problems.append(line.strip())
+    return problems
+
+async def explain(conn, stmt):
+    compiled = stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    if IS_SQLITE:
+        rows = await conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+        return [row[-1] for row in rows]
+    rows = await conn.execute(text(f"EXPLAIN {compiled}"))
+    return [row[0] for row in rows]
+
+async def main():
+    failures = 0
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    # Plain connect(): the session setting is rolled back when the connection closes
+    async with engine.connect() as conn:
+        if not IS_SQLITE:
+            await conn.execute(text("SET LOCAL enable_seqscan = off"))
+
+        for name, stmt, must_avoid_sort in HOT_QUERIES:
+            plan = await explain(conn, stmt)
+            problems = plan_problems(plan, must_avoid_sort)
+            status = "FAIL" if problems else "ok"
+            print(f"[{status:>4}] {name}")
+            for problem in problems:
+                print(f"         {problem}")
+            failures += bool(problems)
+    await engine.dispose()
+
+    if failures:
+        print(f"{failures} hot queries are not fully served by an index.")
+        sys.exit(1)
+    print("All hot queries use an index.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""
+Check that POST /notes/{id}/vote keeps notes.vote_count exact under concurrent voters.
+
+Creates one note and N users, then has every user vote at the same time. Users follow
+different patterns: upvote, downvote, vote twice (toggle off), switch up -> down,
+and a double-click that sends the same vote twice in parallel. Afterwards
+vote_count must equal SUM(votes.vote_type), each user may hold at most one vote,
+and the deterministic patterns must add up to the expected total.
+Test rows are removed at the end.
+
+Runs against DATABASE_URL, or a throwaway SQLite file if it isn't set.
+
+Usage: python scripts/check_vote_concurrency.py [voters]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "vote_check.db")
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func, delete
+from app.core.database import engine, Base, SessionLocal
+from app.models.models import Note, User, Vote, NoteStatus
+from app.schemas.interaction import VoteCreate
+from app.api.notes import vote_note
+
+async def cast(user, note_id, vote_type):
+    async with SessionLocal() as session:
+        return await vote_note(note_id, VoteCreate(vote_type=vote_type), db=session, current_user=user)
+
+async def voter(i, user, note_id):
+    pattern = i % 5
+    if pattern == 0:
+        await cast(user, note_id, 1)
+        return 1
+    if pattern == 1:
+        await cast(user, note_id, -1)
+        return -1
+    if pattern == 2:
+        await cast(user, note_id, 1)
+        await cast(user, note_id, 1)
+        return 0
+    if pattern == 3:
+        await cast(user, note_id, 1)
+        await cast(user, note_id, -1)
+        return -1
+    # Double-click: final state depends on timing, only the invariants are checked
+    await asyncio.gather(cast(user, note_id, 1), cast(user, note_id, 1))
+    return None
+
+async def main(voters: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    run = uuid.uuid4().hex[:8]
+    async with SessionLocal() as session:
+        users = [
+            User(email=f"vote-check-{run}-{i}@example.com", hashed_password="x", full_name=f"Voter {i}")
+            for i in range(voters)
+        ]
+        note = Note(
+            title=f"vote check {run}", file_url="", branch="CSE", semester=1, subject="Check",
+            status=NoteStatus.APPROVED, vote_count=0,
+        )
+        session.add_all(users + [note])
+        await session.commit()
+        note_id = note.id
+
+    try:
+        t0 = time.perf_counter()
+        expected = await asyncio.gather(*(voter(i, user, note_id) for i, user in enumerate(users)))
+        elapsed = time.perf_counter() - t0
+
+        async with SessionLocal() as session:
+            vote_count = (await session.execute(select(Note.vote_count).filter(Note.id == note_id))).scalar()
+            vote_sum = (await session.execute(
+                select(func.coalesce(func.sum(Vote.vote_type), 0)).filter(Vote.note_id == note_id)
+            )).scalar()
+            duplicated = (await session.execute(
+                select(func.count()).select_from(
+                    select(Vote.user_id).filter(Vote.note_id == note_id)
+                    .group_by(Vote.user_id).having(func.count() > 1).subquery()
+                )
+            )).scalar()
+            double_clicks = (await session.execute(
+                select(func.coalesce(func.sum(Vote.vote_type), 0))
+                .filter(Vote.note_id == note_id, Vote.user_id.in_([u.id for i, u in enumerate(users) if i % 5 == 4]))
+            )).scalar()
+
+        want = sum(e for e in expected if e is not None) + double_clicks
+        print(f"{voters} voters, {sum(1 + (i % 5 in (2, 3, 4)) for i in range(voters))} votes in {elapsed:.2f}s")
+        print(f"vote_count={vote_count}  sum(votes)={vote_sum}  expected={want}  users with >1 vote={duplicated}")
+        ok = vote_count == vote_sum == want and duplicated == 0
+        print("OK" if ok else "MISMATCH")
+    finally:
+        async with SessionLocal() as session:
+            await session.execute(delete(Vote).where(Vote.note_id == note_id))
+            await session.execute(delete(Note).where(Note.id == note_id))
+            await session.execute(delete(User).where(User.id.in_([u.id for u in users])))
+            await session.commit()
+        await engine.dispose()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    voters = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    asyncio.run(main(voters))
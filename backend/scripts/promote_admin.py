@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.database import SessionLocal
+from app.core import identity
 from app.models.models import User, UserRole
 from sqlalchemy import select
 
@@ -19,6 +20,8 @@ async def promote_to_admin(email: str):
             return
             
         user.role = UserRole.ADMIN
+        # Running API workers drop their cached identity for this user within seconds
+        await identity.invalidate(session, user.email)
         await session.commit()
         print(f"User '{email}' has been promoted to ADMIN.")
 
@@ -0,0 +1,30 @@
+"""
+Recompute every note's rating_sum, rating_count and rating from `reviews`.
+
+Ratings are normally kept incrementally by the review endpoints (app/core/ratings.py);
+run this after editing reviews by hand or if the aggregates are ever suspected to be
+off. One grouped UPDATE that only writes notes whose values actually differ.
+
+Usage: python scripts/repair_ratings.py
+"""
+import asyncio
+import sys
+import os
+import time
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal, engine
+from app.core.ratings import recompute_ratings
+
+async def repair():
+    started = time.monotonic()
+    async with SessionLocal() as session:
+        fixed = await recompute_ratings(session)
+        await session.commit()
+    await engine.dispose()
+    print(f"Repaired ratings on {fixed} notes ({time.monotonic() - started:.1f}s)")
+
+if __name__ == "__main__":
+    asyncio.run(repair())
@@ -5,8 +5,18 @@ import { API_BASE_URL } from "@/lib/config";
 import { useEffect, useState } from "react";
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from "@/components/ui/card";
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table";
+import { Button } from "@/components/ui/button";
 import { Trophy, Medal, Award, Loader2 } from "lucide-react";
 
+type LeaderboardWindow = "week" | "month" | "semester" | "all";
+
+const WINDOWS: { value: LeaderboardWindow; label: string }[] = [
+    { value: "week", label: "This Week" },
+    { value: "month", label: "This Month" },
+    { value: "semester", label: "This Semester" },
+    { value: "all", label: "All Time" },
+];
+
 interface LeaderboardEntry {
     rank: number;
     name: string;
@@ -16,11 +26,13 @@ interface LeaderboardEntry {
 export default function LeaderboardPage() {
     const [leaderboard, setLeaderboard] = useState<LeaderboardEntry[]>([]);
     const [loading, setLoading] = useState(true);
+    const [period, setPeriod] = useState<LeaderboardWindow>("all");
 
     useEffect(() => {
         const fetchLeaderboard = async () => {
+            setLoading(true);
             try {
-                const res = await fetch(`${API_BASE_URL}/notes/leaderboard`);
+                const res = await fetch(`${API_BASE_URL}/notes/leaderboard?window=${period}`);
                 if (res.ok) {
                     setLeaderboard(await res.json());
                 }
@@ -32,7 +44,7 @@ export default function LeaderboardPage() {
         };
 
         fetchLeaderboard();
-    }, []);
+    }, [period]);
 
     const getRankIcon = (rank: number) => {
         switch (rank) {
@@ -54,6 +66,18 @@ export default function LeaderboardPage() {
                 <CardHeader>
                     <CardTitle>Top Note Uploaders</CardTitle>
                     <CardDescription>Rankings based on number of approved notes.</CardDescription>
+                    <div className="flex flex-wrap gap-2 pt-2">
+                        {WINDOWS.map((w) => (
+                            <Button
+                                key={w.value}
+                                size="sm"
+                                variant={period === w.value ? "default" : "outline"}
+                                onClick={() => setPeriod(w.value)}
+                            >
+                                {w.label}
+                            </Button>
+                        ))}
+                    </div>
                 </CardHeader>
                 <CardContent>
                     {loading ? (
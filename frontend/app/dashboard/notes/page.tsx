@@ -2,7 +2,7 @@
 
 import { API_BASE_URL } from "@/lib/config";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useProfile } from "@/hooks/use-profile";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
@@ -47,7 +47,11 @@ interface Note {
 
 export default function NotesPage() {
     const [notes, setNotes] = useState<Note[]>([]);
+    const [userVotes, setUserVotes] = useState<Record<string, number>>({});
     const [isLoading, setIsLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const pageUrl = useRef<string | null>(null); // First-page URL; more pages add &cursor=
     const [searchQuery, setSearchQuery] = useState("");
     const [isDialogOpen, setIsDialogOpen] = useState(false);
 
@@ -65,7 +69,7 @@ export default function NotesPage() {
     const [file, setFile] = useState<File | null>(null);
 
     const [selectedSemester, setSelectedSemester] = useState<number | "ALL">("ALL");
-    const [sortBy, setSortBy] = useState<"newest" | "rating">("newest");
+    const [sortBy, setSortBy] = useState<"newest" | "rating" | "downloads" | "trending">("newest");
 
     const { user, loading: profileLoading } = useProfile();
     const [initDone, setInitDone] = useState(false);
@@ -83,7 +87,28 @@ export default function NotesPage() {
         }
     }, [profileLoading, user, initDone]);
 
-    const fetchNotes = async (semester?: number | "ALL", sortMethod: "newest" | "rating" = sortBy) => {
+    // One request for the whole page instead of one per card
+    const fetchUserVotes = async (noteIds: string[], token: string) => {
+        if (noteIds.length === 0) return;
+        try {
+            const res = await fetch(`${API_BASE_URL}/notes/votes/state`, {
+                method: "POST",
+                headers: {
+                    "Content-Type": "application/json",
+                    "Authorization": `Bearer ${token}`
+                },
+                body: JSON.stringify({ note_ids: noteIds })
+            });
+            if (res.ok) {
+                const states: { note_id: string; user_vote: number }[] = await res.json();
+                setUserVotes((prev) => ({ ...prev, ...Object.fromEntries(states.map((st) => [st.note_id, st.user_vote])) }));
+            }
+        } catch (error) {
+            console.error("Failed to fetch vote state", error);
+        }
+    };
+
+    const fetchNotes = async (semester?: number | "ALL", sortMethod: "newest" | "rating" | "downloads" | "trending" = sortBy) => {
         setIsLoading(true);
         const semToFetch = semester !== undefined ? semester : selectedSemester;
         const cacheKey = `notes_cache_${semToFetch}_${sortMethod}`;
@@ -104,7 +129,7 @@ export default function NotesPage() {
         }
 
         try {
-            let url = `${API_BASE_URL}/notes/?category=NOTE&sort_by=${sortMethod}`;
+            let url = `${API_BASE_URL}/notes/?category=NOTE&sort_by=${sortMethod}&limit=100`;
             if (semToFetch !== "ALL") {
                 url += `&semester=${semToFetch}`;
             }
@@ -115,10 +140,16 @@ export default function NotesPage() {
                 headers["Authorization"] = `Bearer ${token}`;
             }
 
+            pageUrl.current = url;
+            setNextCursor(null);
             const res = await fetch(url, { headers });
             if (res.ok) {
-                const data = await res.json();
+                const { items: data, next_cursor } = await res.json();
                 setNotes(data);
+                setNextCursor(next_cursor);
+                if (token) {
+                    fetchUserVotes(data.map((n: Note) => n.id), token);
+                }
                 // [CACHE] Save
                 sessionStorage.setItem(cacheKey, JSON.stringify({
                     data, timestamp: Date.now()
@@ -131,6 +162,35 @@ export default function NotesPage() {
         }
     };
 
+    // Next page of the same listing, from the keyset cursor of the previous response
+    const loadMore = async () => {
+        const url = pageUrl.current;
+        if (!url || !nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const token = localStorage.getItem("token");
+            const headers: HeadersInit = {};
+            if (token) {
+                headers["Authorization"] = `Bearer ${token}`;
+            }
+
+            const res = await fetch(`${url}&cursor=${encodeURIComponent(nextCursor)}`, { headers });
+            // Filters may have changed while this was in flight
+            if (res.ok && pageUrl.current === url) {
+                const { items, next_cursor } = await res.json();
+                setNotes((prev) => [...prev, ...items]);
+                setNextCursor(next_cursor);
+                if (token) {
+                    fetchUserVotes(items.map((n: Note) => n.id), token);
+                }
+            }
+        } catch (error) {
+            console.error("Failed to load more", error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleUpload = async (e: React.FormEvent) => {
         e.preventDefault();
         if (!file) return;
@@ -147,7 +207,7 @@ export default function NotesPage() {
         const token = localStorage.getItem("token");
 
         try {
-            const res = await fetch(`${API_BASE_URL}/notes/upload`, {
+            const res = await fetch(`${API_BASE_URL}/notes/upload?background=true`, {
                 method: "POST",
                 headers: {
                     "Authorization": `Bearer ${token}`
@@ -289,13 +349,15 @@ export default function NotesPage() {
                         className="flex h-10 w-full rounded-md border border-slate-200 bg-white px-3 py-2 text-sm ring-offset-white focus-visible:outline-none focus-visible:ring-2 focus-visible:ring-slate-950 disabled:cursor-not-allowed disabled:opacity-50 dark:border-slate-800 dark:bg-slate-950 dark:ring-offset-slate-950 dark:focus-visible:ring-slate-300 appearance-none"
                         value={sortBy}
                         onChange={(e) => {
-                            const val = e.target.value as "newest" | "rating";
+                            const val = e.target.value as "newest" | "rating" | "downloads" | "trending";
                             setSortBy(val);
                             fetchNotes(selectedSemester, val);
                         }}
                     >
                         <option value="newest">Newest First</option>
+                        <option value="trending">Trending</option>
                         <option value="rating">Highest Rated</option>
+                        <option value="downloads">Most Downloaded</option>
                     </select>
                     <ArrowUpDown className="absolute right-3 top-2.5 h-4 w-4 text-slate-500 pointer-events-none" />
                 </div>
@@ -359,9 +421,10 @@ export default function NotesPage() {
                             <CardFooter className="flex flex-wrap justify-between gap-2 border-t pt-3">
                                 {/* Interactions */}
                                 <VoteControl
+                                    key={`${note.id}:${userVotes[note.id] ?? 0}`}
                                     noteId={note.id}
                                     initialVoteCount={note.vote_count || 0}
-                                    initialUserVote={0} /** TODO: Fetch user vote status if possible, currently separate API call or need logic */
+                                    initialUserVote={userVotes[note.id] ?? 0}
                                 />
 
                                 <div className="flex gap-2">
@@ -411,6 +474,15 @@ export default function NotesPage() {
                 </div>
             )}
 
+            {!isLoading && nextCursor && (
+                <div className="flex justify-center">
+                    <Button variant="outline" disabled={loadingMore} onClick={loadMore}>
+                        {loadingMore && <Loader2 className="mr-2 h-4 w-4 animate-spin" />}
+                        Load more
+                    </Button>
+                </div>
+            )}
+
             {/* Note Viewer Modal */}
             {viewingNote && (
                 <NoteViewer
@@ -35,7 +35,7 @@ export default function DashboardPage() {
                 // Fetch Recent Notes (Limit 5)
                 const notesRes = await fetch(`${API_BASE_URL}/notes/?limit=5`);
                 if (notesRes.ok) {
-                    setRecentNotes(await notesRes.json());
+                    setRecentNotes((await notesRes.json()).items);
                 }
             } catch (error) {
                 console.error("Failed to fetch dashboard data", error);
@@ -2,7 +2,7 @@
 
 import { API_BASE_URL } from "@/lib/config";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useProfile } from "@/hooks/use-profile";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
@@ -45,6 +45,9 @@ interface Note {
 export default function UniversityPapersPage() {
     const [notes, setNotes] = useState<Note[]>([]);
     const [isLoading, setIsLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const pageUrl = useRef<string | null>(null); // First-page URL; more pages add &cursor=
     const [searchQuery, setSearchQuery] = useState("");
     const [isDialogOpen, setIsDialogOpen] = useState(false);
 
@@ -83,7 +86,7 @@ export default function UniversityPapersPage() {
     const fetchNotes = async (semester?: number | "ALL", year?: string | "ALL") => {
         setIsLoading(true);
         try {
-            let url = `${API_BASE_URL}/notes/?category=UNIVERSITY_PAPER`;
+            let url = `${API_BASE_URL}/notes/?category=UNIVERSITY_PAPER&limit=100`;
             const semToFetch = semester !== undefined ? semester : selectedSemester;
             const yearToFetch = year !== undefined ? year : selectedYear;
 
@@ -100,10 +103,13 @@ export default function UniversityPapersPage() {
                 headers["Authorization"] = `Bearer ${token}`;
             }
 
+            pageUrl.current = url;
+            setNextCursor(null);
             const res = await fetch(url, { headers });
             if (res.ok) {
-                const data = await res.json();
+                const { items: data, next_cursor } = await res.json();
                 setNotes(data);
+                setNextCursor(next_cursor);
             }
         } catch (error) {
             console.error("Failed to fetch notes", error);
@@ -112,6 +118,32 @@ export default function UniversityPapersPage() {
         }
     };
 
+    // Next page of the same listing, from the keyset cursor of the previous response
+    const loadMore = async () => {
+        const url = pageUrl.current;
+        if (!url || !nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const token = localStorage.getItem("token");
+            const headers: HeadersInit = {};
+            if (token) {
+                headers["Authorization"] = `Bearer ${token}`;
+            }
+
+            const res = await fetch(`${url}&cursor=${encodeURIComponent(nextCursor)}`, { headers });
+            // Filters may have changed while this was in flight
+            if (res.ok && pageUrl.current === url) {
+                const { items, next_cursor } = await res.json();
+                setNotes((prev) => [...prev, ...items]);
+                setNextCursor(next_cursor);
+            }
+        } catch (error) {
+            console.error("Failed to load more", error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleUpload = async (e: React.FormEvent) => {
         e.preventDefault();
         if (!file) return;
@@ -134,7 +166,7 @@ export default function UniversityPapersPage() {
         const token = localStorage.getItem("token");
 
         try {
-            const res = await fetch(`${API_BASE_URL}/notes/upload`, {
+            const res = await fetch(`${API_BASE_URL}/notes/upload?background=true`, {
                 method: "POST",
                 headers: {
                     "Authorization": `Bearer ${token}`
@@ -383,6 +415,15 @@ export default function UniversityPapersPage() {
                 </div>
             )}
 
+            {!isLoading && nextCursor && (
+                <div className="flex justify-center">
+                    <Button variant="outline" disabled={loadingMore} onClick={loadMore}>
+                        {loadingMore && <Loader2 className="mr-2 h-4 w-4 animate-spin" />}
+                        Load more
+                    </Button>
+                </div>
+            )}
+
             {/* Note Viewer Modal */}
             {viewingNote && (
                 <NoteViewer
@@ -33,6 +33,7 @@ interface ReviewSectionProps {
 
 export function ReviewSection({ noteId, noteTitle, initialRating, initialRatingCount }: ReviewSectionProps) {
     const [reviews, setReviews] = useState<Review[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [isOpen, setIsOpen] = useState(false);
     const [isLoading, setIsLoading] = useState(false);
     const [stats, setStats] = useState({ rating: initialRating, count: initialRatingCount });
@@ -42,16 +43,21 @@ export function ReviewSection({ noteId, noteTitle, initialRating, initialRatingC
     const [comment, setComment] = useState("");
     const [isSubmitting, setIsSubmitting] = useState(false);
 
-    const fetchReviews = async () => {
+    const fetchReviews = async (cursor?: string) => {
         setIsLoading(true);
         try {
             const token = localStorage.getItem("token");
-            const res = await fetch(`${API_BASE_URL}/notes/${noteId}/reviews`, {
+            let url = `${API_BASE_URL}/notes/${noteId}/reviews?limit=20`;
+            if (cursor) {
+                url += `&cursor=${encodeURIComponent(cursor)}`;
+            }
+            const res = await fetch(url, {
                 headers: { "Authorization": `Bearer ${token}` }
             });
             if (res.ok) {
-                const data = await res.json();
-                setReviews(data);
+                const { items, next_cursor } = await res.json();
+                setReviews(cursor ? (prev) => [...prev, ...items] : items);
+                setNextCursor(next_cursor);
             }
         } catch (error) {
             console.error("Failed to fetch reviews", error);
@@ -145,7 +151,7 @@ export function ReviewSection({ noteId, noteTitle, initialRating, initialRatingC
 
                     {/* Review List */}
                     <div className="space-y-4">
-                        {isLoading ? (
+                        {isLoading && reviews.length === 0 ? (
                             <p className="text-center text-sm text-slate-500">Loading reviews...</p>
                         ) : reviews.length === 0 ? (
                             <p className="text-center text-sm text-slate-500">No reviews yet. Be the first!</p>
@@ -168,6 +174,17 @@ export function ReviewSection({ noteId, noteTitle, initialRating, initialRatingC
                                 </div>
                             ))
                         )}
+                        {nextCursor && (
+                            <Button
+                                variant="ghost"
+                                size="sm"
+                                className="w-full"
+                                disabled={isLoading}
+                                onClick={() => fetchReviews(nextCursor)}
+                            >
+                                {isLoading ? "Loading..." : "Load more reviews"}
+                            </Button>
+                        )}
                     </div>
                 </div>
             </DialogContent>